@@ -0,0 +1,551 @@
+# Motor sin mesa: el estado de los bomberos vive en arreglos paralelos de
+# NumPy (struct-of-arrays) y la ocupación del tablero en una matriz de índices.
+# Las reglas y el comportamiento son los mismos de fireRescueCore, así que con
+# la misma semilla juega exactamente la misma partida que agentModel. Lo que en
+# el turno secuencial recorre a todos los bomberos (asignar roles) es una sola
+# operación sobre la tabla, y el humo que pasa a fuego se busca con las vecinas
+# sin pared de cada celda ya guardadas. engineBenchmark.py mide los dos motores.
+#
+# Con simultaneous=True (para cientos de bomberos) la fase de agentes es un solo
+# turno de todos: cada tick cada bombero elige una acción (entregar, apagar su
+# celda, revelar su POI o avanzar por un campo de flujo) contra el mismo estado,
+# los conflictos (misma celda destino, misma pared) se resuelven por lotes
+# ganando el índice menor y los movimientos se aplican juntos.
+#
+# Los campos de flujo se arman a lo más una vez por fase de agentes: el de fuego
+# con las celdas de fuego y humo al empezar la fase, y el de las salidas y el de
+# cada POI solo si desde que se armó cambió una pared de su árbol de caminos.
+# Dentro de la fase las paredes solo se abren o pierden puntos, así que un
+# campo viejo sigue dando caminos válidos (a lo más un poco más largos). Cada
+# campo se calcula solo hasta cubrir a los bomberos que lo siguen y se extiende
+# si llega uno que queda fuera.
+
+import numpy as np
+
+from fireRescueCore import (
+  grid_layout, EXITS, FireState, POIType, FireFighterRole, ROLES, ROLE_CODES, ROLE_VALUES,
+  FireFighterBehavior, FireRescueGame
+)
+from flowField import FlowField
+
+NO_POI = 0
+MAX_AP = 4
+# Con menos pares (POI, bombero libre) asignar roles recorriendo a los bomberos
+# como FireRescueGame es más rápido que armar los arreglos
+MIN_VECTOR_PAIRS = 32
+DX = np.array([0, 1, 0, -1])  # arriba, derecha, abajo, izquierda
+DY = np.array([-1, 0, 1, 0])
+OPPOSITE = np.array([2, 3, 0, 1])
+# Dirección por (dy + 1, dx + 1) hacia una celda vecina
+DIRECTION_OF = np.full((3, 3), -1, dtype=np.int8)
+DIRECTION_OF[DY + 1, DX + 1] = np.arange(4)
+NEIGHBOR_OFFSETS = tuple(zip(DX.tolist(), DY.tolist()))
+
+
+def tiled_layout(rows, cols, layout=grid_layout, exits=EXITS):
+  # Tablero grande repitiendo el layout; cada copia conserva sus salidas. El
+  # modelo escala fuegos, POIs y límites con tiles=(rows, cols)
+  height, width = np.shape(layout)[:2]
+  grid = np.tile(np.asarray(layout), (rows, cols, 1))
+  tile_exits = [(x + c * width, y + r * height)
+                for r in range(rows) for c in range(cols) for x, y in exits]
+  return grid, tile_exits
+
+class AgentTable:
+  # Una fila por bombero. carrying y target guardan el id del POI (0 = ninguno).
+  __slots__ = ('count', 'unique_id', 'x', 'y', 'action_points', 'role',
+               'knockout', 'carrying', 'target', 'paths')
+
+  def __init__(self, capacity):
+    self.count = 0
+    self.unique_id = np.zeros(capacity, dtype=np.int32)
+    self.x = np.zeros(capacity, dtype=np.int32)
+    self.y = np.zeros(capacity, dtype=np.int32)
+    self.action_points = np.zeros(capacity, dtype=np.int8)
+    self.role = np.zeros(capacity, dtype=np.int8)
+    self.knockout = np.zeros(capacity, dtype=np.int8)
+    # int32: en tableros por copias (tiles) los ids de POI pasan de 32767
+    self.carrying = np.zeros(capacity, dtype=np.int32)
+    self.target = np.zeros(capacity, dtype=np.int32)
+    self.paths = [[] for _ in range(capacity)]
+
+  def add(self, unique_id, pos):
+    i = self.count
+    self.unique_id[i] = unique_id
+    self.x[i], self.y[i] = pos
+    self.count += 1
+    return i
+
+  def positions(self):
+    return np.stack((self.x[:self.count], self.y[:self.count]), axis=1)
+
+  def knocked_out(self):
+    return np.flatnonzero(self.knockout[:self.count] > 0)
+
+  def carrying_victim(self):
+    return np.flatnonzero(self.carrying[:self.count] != NO_POI)
+
+  def with_role(self, role):
+    return np.flatnonzero(self.role[:self.count] == ROLE_CODES[role])
+
+  def nbytes(self):
+    arrays = (self.unique_id, self.x, self.y, self.action_points, self.role,
+              self.knockout, self.carrying, self.target)
+    return sum(a.nbytes for a in arrays)
+
+class ArrayAgent(FireFighterBehavior):
+  # Vista liviana sobre una fila de AgentTable con la misma interfaz que FireAgent.
+  # item() lee la fila como entero de Python sin pasar por un escalar de NumPy
+  __slots__ = ('model', 'index')
+
+  def __init__(self, model, index):
+    self.model = model
+    self.index = index
+
+  @property
+  def unique_id(self):
+    return self.model.agents.unique_id.item(self.index)
+
+  @property
+  def pos(self):
+    table = self.model.agents
+    return (table.x.item(self.index), table.y.item(self.index))
+
+  @property
+  def action_points(self):
+    return self.model.agents.action_points.item(self.index)
+
+  @action_points.setter
+  def action_points(self, value):
+    self.model.agents.action_points[self.index] = value
+
+  @property
+  def role(self):
+    return ROLES[self.model.agents.role.item(self.index)]
+
+  @role.setter
+  def role(self, value):
+    self.model.agents.role[self.index] = ROLE_CODES[value]
+
+  @property
+  def knockout_timer(self):
+    return self.model.agents.knockout.item(self.index)
+
+  @knockout_timer.setter
+  def knockout_timer(self, value):
+    self.model.agents.knockout[self.index] = value
+
+  @property
+  def target_poi(self):
+    return self.model.poi_by_id.get(self.model.agents.target.item(self.index))
+
+  @target_poi.setter
+  def target_poi(self, poi):
+    self.model.agents.target[self.index] = poi.id if poi is not None else NO_POI
+
+  @property
+  def carrying_victim(self):
+    return self.model.poi_by_id.get(self.model.agents.carrying.item(self.index))
+
+  @carrying_victim.setter
+  def carrying_victim(self, poi):
+    self.model.agents.carrying[self.index] = poi.id if poi is not None else NO_POI
+
+  @property
+  def path(self):
+    return self.model.agents.paths[self.index]
+
+  @path.setter
+  def path(self, value):
+    self.model.agents.paths[self.index] = value
+
+class ArrayFireRescueModel(FireRescueGame):
+  def __init__(self, grid_data, num_firefighters=5, exits=None, seed=None, policy=None,
+               simultaneous=False, risk_weight=0, tiles=(1, 1)):
+    height, width = np.shape(grid_data)[:2]
+    self.num_firefighters = num_firefighters
+    self.simultaneous = simultaneous
+    # Campos de flujo ("fire", "exit" o por POI) y paredes cambiadas desde la
+    # última fase de agentes
+    self._fields = {}
+    self._wall_changes = []
+    self.agents = AgentTable(num_firefighters)
+    # Índice + 1 del bombero en cada celda (0 = vacía)
+    self.occupancy = np.zeros((height, width), dtype=np.int32)
+    # Valor FireState de cada celda, al día con _set_fire_state
+    self.fire_values = np.zeros((height, width), dtype=np.int8)
+    # Vecinas sin pared por celda (ver _open_neighbors)
+    self._open_cells = {}
+    self.poi_by_id = {}
+    FireRescueGame.__init__(self, grid_data, exits, seed, policy, risk_weight, tiles)
+    self.exit_mask = np.zeros((height, width), dtype=bool)
+    for x, y in self.exits:
+      self.exit_mask[y, x] = True
+
+  def _create_poi_pool(self):
+    super()._create_poi_pool()
+    self.poi_by_id = {poi.id: poi for poi in self.all_pois}
+
+  def place_firefighters(self):
+    valid_positions = self._get_valid_positions_for_firefighters()
+    selected_positions = self.poi_random.sample(valid_positions, self.num_firefighters)
+    for i, pos in enumerate(selected_positions):
+      index = self.agents.add(i, pos)
+      self.occupancy[pos[1], pos[0]] = index + 1
+      self.agent_list.append(ArrayAgent(self, index))
+
+    self.assign_roles()
+
+  def is_cell_empty(self, pos):
+    return self.occupancy[pos[1], pos[0]] == 0
+
+  def move_agent(self, agent, pos):
+    table = self.agents
+    i = agent.index
+    self.occupancy[table.y[i], table.x[i]] = 0
+    table.x[i], table.y[i] = pos
+    self.occupancy[pos[1], pos[0]] = i + 1
+
+  def _set_fire_state(self, x, y, state):
+    super()._set_fire_state(x, y, state)
+    self.fire_values[y, x] = state.value
+
+  def fire_codes(self):
+    return self.fire_values.copy()
+
+  def spread_smoke_to_fire(self):
+    # Como FireRescueGame.spread_smoke_to_fire, con los vecinos sin pared de
+    # cada celda guardados en vez de armar la lista de adyacentes en cada fase.
+    # Los cambios se aplican después de revisar el frente, así que el orden no importa
+    smoke = self.smoke_cells
+    spread = {cell for fire in self.fire_frontier for cell in self._open_neighbors(fire) if cell in smoke}
+    for x, y in spread:
+      self._set_fire_state(x, y, FireState.FIRE)
+
+  def _open_neighbors(self, cell):
+    # Vecinas de cell sin pared (0) en medio; walls_changed borra la entrada
+    neighbors = self._open_cells.get(cell)
+    if neighbors is None:
+      x, y = cell
+      walls = self.grid_data[y, x].tolist()
+      neighbors = self._open_cells[cell] = tuple(
+        (x + dx, y + dy) for (dx, dy), wall in zip(NEIGHBOR_OFFSETS, walls)
+        if wall == 0 and 0 <= x + dx < self.width and 0 <= y + dy < self.height)
+    return neighbors
+
+  def greedy_assign_roles(self):
+    # Misma asignación que FireRescueGame.greedy_assign_roles (mismos desempates por
+    # orden estable), con la matriz de distancias POI x bombero libre por vector
+    table = self.agents
+    n = table.count
+    if self._few_pairs():
+      return super().greedy_assign_roles()
+    roles = np.full(n, ROLE_CODES[FireFighterRole.EXTINGUISHER], dtype=np.int8)
+    targets = np.full(n, NO_POI, dtype=np.int32)
+    free = np.flatnonzero(table.carrying[:n] == NO_POI)
+    pois = self.active_pois
+    if free.size and pois:
+      px = np.array([poi.x for poi in pois])
+      py = np.array([poi.y for poi in pois])
+      distances = np.abs(table.x[free] - px[:, None]) + np.abs(table.y[free] - py[:, None])
+      # Los 3 más cercanos de cada POI; la llave única distancia * libres + orden
+      # da los mismos desempates que argsort estable y de ella salen los dos valores
+      k = min(3, free.size)
+      keys = distances.astype(np.int64) * free.size + np.arange(free.size)
+      if free.size > k:
+        keys = np.partition(keys, k - 1, axis=1)[:, :k]
+      keys = np.sort(keys, axis=1)
+      nearest = keys % free.size
+      scores = keys // free.size
+      if self.risk_weight:
+        scores = scores - np.array([self.poi_risk_bonus(poi) for poi in pois])[:, None]
+      scores = scores.ravel()
+
+      assigned_rescuers = set()
+      for j in np.argsort(scores, kind='stable').tolist():
+        index = int(free[nearest.flat[j]])
+        if index not in assigned_rescuers:
+          roles[index] = ROLE_CODES[FireFighterRole.RESCUER]
+          targets[index] = pois[j // k].id
+          assigned_rescuers.add(index)
+          if len(assigned_rescuers) == 3:
+            break
+
+    table.role[:n] = roles
+    table.target[:n] = targets
+    self.touch("agents")
+
+  def _few_pairs(self):
+    n = self.agents.count
+    free = n - np.count_nonzero(self.agents.carrying[:n])
+    return free * len(self.active_pois) < MIN_VECTOR_PAIRS
+
+  def strategy_assign_roles(self, max_rescuers):
+    # Misma asignación que FireRescueGame.strategy_assign_roles: los candidatos
+    # (POI sin revelar, bombero libre) en el mismo orden y con argsort estable
+    table = self.agents
+    n = table.count
+    if self._few_pairs():
+      return super().strategy_assign_roles(max_rescuers)
+    carrying = table.carrying[:n] != NO_POI
+    roles = np.where(carrying, ROLE_CODES[FireFighterRole.RESCUER], ROLE_CODES[None]).astype(np.int8)
+    targets = np.full(n, NO_POI, dtype=np.int32)
+    free = np.flatnonzero(~carrying)
+    pois = [poi for poi in self.active_pois if not poi.revealed]
+    assigned = int(carrying.sum())
+    if free.size and pois and assigned < max_rescuers:
+      px = np.array([poi.x for poi in pois])
+      py = np.array([poi.y for poi in pois])
+      scores = np.abs(table.x[free] - px[:, None]) + np.abs(table.y[free] - py[:, None])
+      if self.risk_weight:
+        scores = scores - np.array([self.poi_risk_bonus(poi) for poi in pois])[:, None]
+
+      targeted = set()
+      for j in np.argsort(scores, axis=None, kind='stable').tolist():
+        p, index = divmod(j, free.size)
+        index = free.item(index)
+        if roles[index] == ROLE_CODES[None] and p not in targeted:
+          roles[index] = ROLE_CODES[FireFighterRole.RESCUER]
+          targets[index] = pois[p].id
+          targeted.add(p)
+          assigned += 1
+          if assigned >= max_rescuers:
+            break
+
+    roles[(roles == ROLE_CODES[None]) & (table.knockout[:n] == 0)] = ROLE_CODES[FireFighterRole.EXTINGUISHER]
+    table.role[:n] = roles
+    table.target[:n] = targets
+    self.touch("agents")
+
+  def agent_turn(self):
+    if self.simultaneous:
+      self.simultaneous_turn()
+    else:
+      super().agent_turn()
+
+  def walls_changed(self, x, y, direction, previous):
+    super().walls_changed(x, y, direction, previous)
+    self._open_cells.pop((x, y), None)
+    if not self.simultaneous:
+      # Solo el turno simultáneo usa (y vacía) la lista en _refresh_fields
+      return
+    nx, ny = x + int(DX[direction]), y + int(DY[direction])
+    if 0 <= nx < self.width and 0 <= ny < self.height:
+      self._wall_changes.append((x, y, nx, ny))
+
+  # --- turno simultáneo ---
+
+  def simultaneous_turn(self):
+    table = self.agents
+    n = table.count
+    print(f"\n-- Turn: {n} agents (simultaneous) ---")
+    knockout = table.knockout[:n]
+    knockout[knockout > 0] -= 1
+    table.action_points[:n] = MAX_AP
+    active = knockout == 0
+    self._refresh_fields()
+
+    # Cada acción cuesta al menos 1 AP: a lo más MAX_AP ticks
+    for _ in range(MAX_AP):
+      ready = np.flatnonzero(active & (table.action_points[:n] > 0))
+      if ready.size == 0 or self.game_over or not self._batched_tick(ready):
+        break
+
+    # Igual que check_knockout, para todos los bomberos
+    on_fire = self._fire_values(table.x[:n], table.y[:n]) == FireState.FIRE.value
+    knockout[on_fire] = 5
+    self.phase = "FIRE"
+    self.step_count += 1
+    self.touch("agents")
+
+  def _refresh_fields(self):
+    # Al empezar la fase: el campo de fuego se vuelve a armar al usarlo y se
+    # descartan los campos de POIs que ya no están y los que tienen en su árbol
+    # de caminos (celda -> siguiente celda) una pared que cambió
+    active = {(poi.id, poi.x, poi.y) for poi in self.active_pois}
+    active.add("exit")
+    changes = np.array(self._wall_changes, dtype=np.int64).reshape(-1, 4)
+    self._wall_changes = []
+    ax, ay, bx, by = changes.T
+    for key, field in list(self._fields.items()):
+      if key not in active:
+        del self._fields[key]
+      elif changes.size and (((field.next_x[ay, ax] == bx) & (field.next_y[ay, ax] == by)) |
+                             ((field.next_x[by, bx] == ax) & (field.next_y[by, bx] == ay))).any():
+        del self._fields[key]
+
+  def _target_field(self, key, targets, xs, ys):
+    # Campo hacia targets() que cubre las celdas (xs, ys) de quienes lo siguen
+    field = self._fields.get(key)
+    if field is None or (field.cost[ys, xs] > field.limit).any():
+      field = self._fields[key] = FlowField(self.grid_data, targets(), stop_at=zip(xs.tolist(), ys.tolist()))
+    return field
+
+  def _batched_tick(self, ready):
+    # Una acción por bombero listo; devuelve False si nadie pudo actuar
+    table = self.agents
+    xs = table.x[ready]
+    ys = table.y[ready]
+    acted = np.zeros(ready.size, dtype=bool)
+
+    # Apagar la celda propia (nadie comparte celda, así que no hay conflictos)
+    here = self._fire_values(xs, ys)
+    burning = here != FireState.CLEAR.value
+    if burning.any():
+      ap = table.action_points[ready[burning]]
+      to_clear = (here[burning] == FireState.SMOKE.value) | (ap >= 2)
+      cost = np.where(here[burning] == FireState.FIRE.value, np.where(to_clear, 2, 1), 1)
+      table.action_points[ready[burning]] = ap - cost
+      for x, y, clear in zip(xs[burning].tolist(), ys[burning].tolist(), to_clear.tolist()):
+        self._set_fire_state(x, y, FireState.CLEAR if clear else FireState.SMOKE)
+      acted |= burning
+
+    # Revelar el POI objetivo al llegar a él
+    carrying = table.carrying[ready] != NO_POI
+    targets = table.target[ready]
+    for k in np.flatnonzero(~acted & ~carrying & (targets != NO_POI)):
+      poi = self.poi_by_id[int(targets[k])]
+      if (poi.x, poi.y) == (int(xs[k]), int(ys[k])) and not poi.revealed:
+        self._reveal_for(int(ready[k]), poi)
+        acted[k] = True
+
+    # Siguiente celda según el campo de cada grupo: salida si carga, su POI si
+    # es rescatista con objetivo sin revelar, el fuego o humo más cercano si no
+    next_x = np.full(ready.size, -1, dtype=np.int32)
+    next_y = np.full(ready.size, -1, dtype=np.int32)
+    pending = ~acted
+    hidden = {poi.id: poi for poi in self.active_pois if not poi.revealed}
+    groups = {}
+    for k in np.flatnonzero(pending).tolist():
+      if carrying[k]:
+        key = "exit"
+      else:
+        poi = hidden.get(int(targets[k]))
+        key = (poi.id, poi.x, poi.y) if poi is not None else "fire"
+      groups.setdefault(key, []).append(k)
+    for key, members in groups.items():
+      members = np.array(members)
+      mx, my = xs[members], ys[members]
+      if key == "exit":
+        field = self._target_field(key, lambda: self.exits, mx, my)
+      elif key == "fire":
+        if not (self.fire_cells or self.smoke_cells):
+          continue
+        field = self._target_field(key, lambda: sorted(self.fire_cells | self.smoke_cells), mx, my)
+      else:
+        field = self._target_field(key, lambda: [key[1:]], mx, my)
+      next_x[members] = field.next_x[my, mx]
+      next_y[members] = field.next_y[my, mx]
+
+    going = pending & (next_x >= 0)
+    direction = np.full(ready.size, -1, dtype=np.int64)
+    direction[going] = DIRECTION_OF[next_y[going] - ys[going] + 1, next_x[going] - xs[going] + 1]
+    wall = np.full(ready.size, -1, dtype=np.int64)
+    wall[going] = self.grid_data[ys[going], xs[going], direction[going]]
+
+    walk = np.flatnonzero(going & ((wall == 0) | (wall == 3)))
+    if walk.size:
+      moved = self._resolve_moves(ready[walk], next_x[walk], next_y[walk])
+      winners = walk[moved]
+      self.occupancy[ys[winners], xs[winners]] = 0
+      self.occupancy[next_y[winners], next_x[winners]] = ready[winners] + 1
+      table.x[ready[winners]] = next_x[winners]
+      table.y[ready[winners]] = next_y[winners]
+      table.action_points[ready[winners]] -= 1
+      acted[winners] = True
+
+    # Puertas y paredes: un golpe por pared y tick aunque la ataquen de ambos lados
+    breach = np.flatnonzero(going & ((wall == 1) | (wall == 2) | (wall == 4)))
+    if breach.size:
+      cell = ys[breach] * self.width + xs[breach]
+      other = next_y[breach] * self.width + next_x[breach]
+      d = direction[breach]
+      key = np.minimum(cell * 4 + d, other * 4 + OPPOSITE[d])
+      _, first = np.unique(key, return_index=True)
+      for k in breach[np.sort(first)].tolist():
+        x, y, d = int(xs[k]), int(ys[k]), int(direction[k])
+        if wall[k] == 4:
+          self.grid_data[y, x, d] = 3
+          self.walls_changed(x, y, d, 4)
+        else:
+          self.damage_wall(x, y, d)
+        table.action_points[ready[k]] -= 1
+        acted[k] = True
+
+    self._deliver_at_exits(ready)
+    return bool(acted.any())
+
+  def _fire_values(self, xs, ys):
+    # Valores FireState de las celdas (xs, ys)
+    return self.fire_values[ys, xs]
+
+  def _resolve_moves(self, movers, tx, ty):
+    # Entre los que van a la misma celda gana el índice menor (movers viene
+    # ordenado); una celda ocupada solo se libera si su ocupante se va.
+    # Se repite hasta que nadie quede bloqueado, todo con operaciones de arreglo.
+    target = ty * self.width + tx
+    order = np.argsort(target, kind='stable')
+    ok = np.ones(movers.size, dtype=bool)
+    ok[order[1:]] = target[order[1:]] != target[order[:-1]]
+    occupant = self.occupancy[ty, tx] - 1
+    leaving = np.zeros(self.agents.count, dtype=bool)
+    while True:
+      leaving[:] = False
+      leaving[movers[ok]] = True
+      blocked = ok & (occupant >= 0) & ~leaving[np.maximum(occupant, 0)]
+      if not blocked.any():
+        return ok
+      ok &= ~blocked
+
+  def _reveal_for(self, index, poi):
+    # Como StrategyPolicy.reveal: la víctima revelada sale del tablero en brazos
+    table = self.agents
+    self.reveal_poi(poi.x, poi.y)
+    if poi.type == POIType.VICTIM and poi not in self.lost_victims:
+      table.carrying[index] = poi.id
+      if poi in self.active_pois:
+        self.active_pois.remove(poi)
+        self.touch("pois")
+    table.target[index] = NO_POI
+    table.action_points[index] -= 1
+
+  def _deliver_at_exits(self, indices):
+    table = self.agents
+    delivered = indices[(table.carrying[indices] != NO_POI) & self.exit_mask[table.y[indices], table.x[indices]]]
+    for index in delivered.tolist():
+      victim = self.poi_by_id[int(table.carrying[index])]
+      table.carrying[index] = NO_POI
+      self.rescue_victims(victim)
+
+  def agent_columns(self):
+    table = self.agents
+    n = table.count
+    return {
+      "id": table.unique_id[:n],
+      "x": table.x[:n],
+      "y": table.y[:n],
+      "role": table.role[:n],
+      "knocked_out": table.knockout[:n] > 0,
+      "carrying": table.carrying[:n] != NO_POI,
+    }
+
+  def agent_records(self):
+    table = self.agents
+    n = table.count
+    ids = table.unique_id[:n].tolist()
+    xs = table.x[:n].tolist()
+    ys = table.y[:n].tolist()
+    roles = table.role[:n].tolist()
+    knocked_out = (table.knockout[:n] > 0).tolist()
+    return [
+      {"id": i, "x": x, "y": y, "role": ROLE_VALUES[r], "knocked_out": k}
+      for i, x, y, r, k in zip(ids, xs, ys, roles, knocked_out)
+    ]
+
+
+if __name__ == "__main__":
+  model = ArrayFireRescueModel(grid_layout)
+  for _ in range(20):
+    model.step()
+  print(f"Bomberos noqueados: {model.agents.knocked_out().tolist()}")
+  print(f"Memoria de la tabla de agentes: {model.agents.nbytes()} bytes")
@@ -0,0 +1,237 @@
+# Motor de fuego con bitboards para rollouts de Monte Carlo.
+# Fuego, humo, POIs y paredes abiertas (tipo 0) por dirección se guardan como
+# enteros de Python con un bit por celda (bit y * width + x). La propagación de
+# humo a fuego y la pérdida de POIs se calculan con shifts y máscaras; solo la
+# explosión de la celda elegida al azar se resuelve celda por celda.
+#
+# Usa dos generadores como el modelo: fire_rng para la celda de la explosión y
+# poi_rng para reponer POIs. Con copias de model.fire_random y model.poi_random
+# produce exactamente las mismas fases de fuego que
+# FireRescueGame.fire_spread_phase (sin la reasignación de roles, que no
+# consume números aleatorios). Los enteros de Python no tienen tamaño fijo, así
+# que los tableros de más de 64 celdas se reparten solos en varias palabras.
+
+import random
+
+import numpy as np
+
+from chunkedGrid import FreeCells
+from fireRescueCore import DAMAGE_LIMIT, LOST_VICTIMS_LIMIT, FireState, POIType
+
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+
+def _mask_to_bits(mask):
+  flat = np.ascontiguousarray(mask, dtype=bool).ravel()
+  return int.from_bytes(np.packbits(flat, bitorder="little").tobytes(), "little")
+
+def _iter_bits(bits):
+  while bits:
+    low = bits & -bits
+    yield low.bit_length() - 1
+    bits ^= low
+
+def copy_rng(rng):
+  # Generador independiente con el mismo estado (también sirve con el módulo random)
+  other = random.Random()
+  other.setstate(rng.getstate())
+  return other
+
+class BitboardFire:
+  def __init__(self, width, height, wall_codes, fire, smoke, active_pois, poi_pool,
+               damage_count=0, lost_victims=0, fire_rng=random, poi_rng=random,
+               damage_limit=DAMAGE_LIMIT, lost_victims_limit=LOST_VICTIMS_LIMIT):
+    self.width = width
+    self.height = height
+    self.size = width * height
+    self.fire_rng = fire_rng
+    self.poi_rng = poi_rng
+
+    self.full = (1 << self.size) - 1
+    first_col = 0
+    for y in range(height):
+      first_col |= 1 << (y * width)
+    last_col = first_col << (width - 1)
+    self.not_first_col = self.full & ~first_col
+    self.not_last_col = self.full & ~last_col
+
+    # wall_codes[(y * width + x) * 4 + dir] con los tipos de pared del layout
+    self.wall_codes = list(wall_codes)
+    self.open_walls = [0, 0, 0, 0]
+    for i in range(self.size):
+      for d in range(4):
+        if self.wall_codes[i * 4 + d] == 0:
+          self.open_walls[d] |= 1 << i
+
+    self.fire = fire
+    self.smoke = smoke
+    # POIs como (id, es_victima, indice_de_celda), en el mismo orden que el modelo
+    self.active_pois = list(active_pois)
+    self.poi_pool = list(poi_pool)
+    self.damage_count = damage_count
+    self.lost_victims = lost_victims
+    self.damage_limit = damage_limit
+    self.lost_victims_limit = lost_victims_limit
+
+    self.game_over = False
+    self.end_reason = ""
+    self.rounds = 0
+
+  @classmethod
+  def from_model(cls, model, fire_rng=None, poi_rng=None):
+    # Por defecto copia el estado de los generadores del modelo, sin avanzarlos.
+    # Sin semilla fuego y POIs comparten el módulo random: una sola copia para
+    # los dos, así se intercalan los números como en el modelo
+    if fire_rng is None and poi_rng is None and model.fire_random is model.poi_random:
+      fire_rng = poi_rng = copy_rng(model.fire_random)
+    if fire_rng is None:
+      fire_rng = copy_rng(model.fire_random)
+    if poi_rng is None:
+      poi_rng = copy_rng(model.poi_random)
+    codes = model.fire_codes()
+    width = model.width
+    active = [(poi.id, poi.type == POIType.VICTIM, poi.y * width + poi.x) for poi in model.active_pois]
+    pool = [(poi.id, poi.type == POIType.VICTIM) for poi in model.all_pois]
+    engine = cls(width, model.height, model.grid_data.reshape(-1).tolist(),
+                 _mask_to_bits(codes == FireState.FIRE.value),
+                 _mask_to_bits(codes == FireState.SMOKE.value),
+                 active, pool, model.damage_count, len(model.lost_victims), fire_rng, poi_rng,
+                 model.damage_limit, model.lost_victims_limit)
+    engine.game_over = model.game_over
+    engine.end_reason = model.end_reason
+    return engine
+
+  def copy(self, fire_rng=None, poi_rng=None):
+    other = object.__new__(BitboardFire)
+    other.__dict__.update(self.__dict__)
+    other.wall_codes = list(self.wall_codes)
+    other.open_walls = list(self.open_walls)
+    other.active_pois = list(self.active_pois)
+    other.poi_pool = list(self.poi_pool)
+    if fire_rng is not None:
+      other.fire_rng = fire_rng
+    if poi_rng is not None:
+      other.poi_rng = poi_rng
+    return other
+
+  def fire_codes(self):
+    # Estados como arreglo (height, width) con los valores de FireState
+    codes = np.zeros(self.size, dtype=np.int8)
+    codes[list(_iter_bits(self.smoke))] = FireState.SMOKE.value
+    codes[list(_iter_bits(self.fire))] = FireState.FIRE.value
+    return codes.reshape(self.height, self.width)
+
+  def end_game(self, reason):
+    self.game_over = True
+    self.end_reason = reason
+
+  def damage_wall(self, index, direction):
+    slot = index * 4 + direction
+    current_wall = self.wall_codes[slot]
+    if current_wall == 0:
+      return True
+    self.wall_codes[slot] = 1 if current_wall == 2 else 0
+    if self.wall_codes[slot] == 0:
+      self.open_walls[direction] |= 1 << index
+    self.damage_count += 1
+    if self.damage_count > self.damage_limit:
+      self.end_game("Derrota: Demasiados daños")
+    return current_wall != 2
+
+  def spread_fire_random(self):
+    x = self.fire_rng.randint(0, self.width - 1)
+    y = self.fire_rng.randint(0, self.height - 1)
+    bit = 1 << (y * self.width + x)
+
+    if self.fire & bit:
+      for direction, (dx, dy) in enumerate(DIRECTIONS):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < self.width and 0 <= ny < self.height:
+          index = ny * self.width + nx
+          # Igual que el modelo: se daña la pared de la celda vecina en esa dirección
+          if self.damage_wall(index, direction):
+            self.smoke &= ~(1 << index)
+            self.fire |= 1 << index
+    elif self.smoke & bit:
+      self.smoke &= ~bit
+      self.fire |= bit
+    else:
+      self.smoke |= bit
+
+  def spread_smoke_to_fire(self):
+    fire = self.fire
+    width = self.width
+    reach = ((fire & self.open_walls[0]) >> width)
+    reach |= ((fire & self.open_walls[1] & self.not_last_col) << 1)
+    reach |= ((fire & self.open_walls[2]) << width) & self.full
+    reach |= ((fire & self.open_walls[3] & self.not_first_col) >> 1)
+    flashover = self.smoke & reach
+    self.smoke &= ~flashover
+    self.fire |= flashover
+
+  def place_new_poi(self):
+    if len(self.poi_pool) == 0:
+      return None
+
+    valid_positions = FreeCells(self.width, self.size, [index for _, _, index in self.active_pois])
+    if len(valid_positions) == 0:
+      return None
+
+    poi_id, is_victim = self.poi_rng.choice(self.poi_pool)
+    x, y = self.poi_rng.choice(valid_positions)
+    index = y * self.width + x
+    clear = ~(1 << index)
+    self.fire &= clear
+    self.smoke &= clear
+    self.active_pois.append((poi_id, is_victim, index))
+    self.poi_pool.remove((poi_id, is_victim))
+    return poi_id
+
+  def check_pois_in_danger(self):
+    pois_lost = []
+    for poi in self.active_pois[:]:
+      if self.fire >> poi[2] & 1:
+        if poi[1]:
+          self.lost_victims += 1
+        self.active_pois.remove(poi)
+        pois_lost.append(poi)
+        self.place_new_poi()
+
+    if self.lost_victims >= self.lost_victims_limit:
+      self.end_game(f"Derrota: {self.lost_victims} victimas perdidas por fuego")
+
+    return pois_lost
+
+  def fire_phase(self):
+    self.spread_fire_random()
+    self.spread_smoke_to_fire()
+    lost = self.check_pois_in_danger()
+    self.rounds += 1
+    return lost
+
+  def rollout(self, max_rounds):
+    # Avanza solo el fuego hasta que el juego termine o se acaben las rondas
+    while not self.game_over and self.rounds < max_rounds:
+      self.fire_phase()
+    return {
+      "rounds": self.rounds,
+      "game_over": self.game_over,
+      "end_reason": self.end_reason,
+      "lost_victims": self.lost_victims,
+      "damage_count": self.damage_count,
+      "fire_cells": self.fire.bit_count(),
+      "smoke_cells": self.smoke.bit_count(),
+    }
+
+
+def monte_carlo(model, rollouts=1000, max_rounds=50, seed=None):
+  # Probabilidad de perder por fuego dentro de max_rounds desde el estado actual
+  base = BitboardFire.from_model(model)
+  streams = random.Random(seed)
+  fire_rng = random.Random(streams.getrandbits(64))
+  poi_rng = random.Random(streams.getrandbits(64))
+  losses = 0
+  for _ in range(rollouts):
+    result = base.copy(fire_rng, poi_rng).rollout(max_rounds)
+    if result["game_over"]:
+      losses += 1
+  return losses / rollouts
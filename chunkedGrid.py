@@ -0,0 +1,109 @@
+# Tablero por bloques para mapas muy grandes y casi inactivos. El mapa se
+# parte en bloques de CHUNK_SIZE x CHUNK_SIZE celdas y solo existen en memoria
+# los bloques con alguna celda distinta del valor por defecto; el resto se lee
+# como el valor por defecto sin ocupar espacio. counts lleva cuántas celdas
+# activas tiene cada bloque (la bandera de actividad): un bloque que vuelve a
+# quedar todo en el valor por defecto se libera.
+#
+# FreeCells es la lista de celdas libres en orden por filas sin construirla:
+# random.choice y random.sample solo usan len() e índices, así que consumen los
+# mismos números que con la lista completa y no hace falta recorrer el tablero.
+
+from bisect import bisect_right
+from collections.abc import Sequence
+
+import numpy as np
+
+CHUNK_SIZE = 16
+
+
+class ChunkedGrid:
+  def __init__(self, height, width, default=0, dtype=np.int8, chunk_size=CHUNK_SIZE):
+    self.height = height
+    self.width = width
+    self.shape = (height, width)
+    self.default = default
+    self.dtype = dtype
+    self.chunk_size = chunk_size
+    self.chunks = {}
+    self.counts = {}
+
+  def __getitem__(self, index):
+    y, x = index
+    size = self.chunk_size
+    chunk = self.chunks.get((y // size, x // size))
+    if chunk is None:
+      return self.default
+    return chunk[y % size, x % size]
+
+  def __setitem__(self, index, value):
+    y, x = index
+    size = self.chunk_size
+    key = (y // size, x // size)
+    chunk = self.chunks.get(key)
+    if chunk is None:
+      if value == self.default:
+        return
+      chunk = self.chunks[key] = np.full((size, size), self.default, dtype=self.dtype)
+      self.counts[key] = 0
+
+    previous = chunk[y % size, x % size]
+    if previous == value:
+      return
+    chunk[y % size, x % size] = value
+    if previous == self.default:
+      self.counts[key] += 1
+    elif value == self.default:
+      self.counts[key] -= 1
+      if self.counts[key] == 0:
+        del self.chunks[key]
+        del self.counts[key]
+
+  def active_chunks(self):
+    return self.chunks.keys()
+
+  def chunk_bounds(self, key):
+    # (y0, y1, x0, x1) del bloque, recortado al borde del mapa
+    cy, cx = key
+    size = self.chunk_size
+    return (cy * size, min((cy + 1) * size, self.height),
+            cx * size, min((cx + 1) * size, self.width))
+
+  def to_dense(self):
+    dense = np.full(self.shape, self.default, dtype=self.dtype)
+    for key, chunk in self.chunks.items():
+      y0, y1, x0, x1 = self.chunk_bounds(key)
+      dense[y0:y1, x0:x1] = chunk[:y1 - y0, :x1 - x0]
+    return dense
+
+  def update_digest(self, digest):
+    # Agrega el contenido a un hash (hashlib) recorriendo solo los bloques
+    # activos, en orden; el mismo contenido da siempre los mismos bytes
+    for key in sorted(self.chunks):
+      digest.update(np.array(key, dtype=np.int32).tobytes())
+      digest.update(self.chunks[key].tobytes())
+
+  def nbytes(self):
+    return sum(chunk.nbytes for chunk in self.chunks.values())
+
+
+class FreeCells(Sequence):
+  # Celdas (x, y) en orden por filas salvo las de taken (índices y * width + x)
+  def __init__(self, width, size, taken):
+    self.width = width
+    self.size = size
+    self.taken = sorted(set(taken))
+
+  def __len__(self):
+    return self.size - len(self.taken)
+
+  def __getitem__(self, k):
+    if not 0 <= k < len(self):
+      raise IndexError(k)
+    # El índice real es k más las celdas ocupadas hasta él (punto fijo)
+    index = k
+    while True:
+      shifted = k + bisect_right(self.taken, index)
+      if shifted == index:
+        return (index % self.width, index // self.width)
+      index = shifted
@@ -0,0 +1,297 @@
+# Conformidad y speedup de los motores optimizados contra el de referencia.
+# Cada (política, semilla) se juega en el motor de referencia (mesa) y en cada
+# motor a comparar; después de cada medio paso (turno de agente o fase de
+# fuego) se guarda un hash del estado completo y se comparan las secuencias.
+# La primera diferencia se reporta con un volcado de ambos estados, que se
+# obtiene repitiendo la partida hasta ese medio paso (las partidas con semilla
+# son reproducibles). El tiempo de cada motor cuenta solo model.step().
+#
+# "bitboard" compara BitboardFire (bitboardFire.py) solo en las fases de fuego:
+# antes de cada fase de fuego de la partida de referencia se copia el estado con
+# BitboardFire.from_model, se juega engine.fire_phase() y se compara el hash de
+# fuego, humo, paredes, daño, víctimas perdidas y POIs con el del modelo después
+# de su step(). El speedup compara fire_phase() con ese step() (la conversión
+# from_model no cuenta). Un speedup menor que 1 se marca como más lento.
+#
+# La política "planner" decide con un presupuesto de tiempo, así que no es
+# reproducible y no se incluye por defecto.
+#
+#   python conformance.py --games 2000
+#   python conformance.py --games 500 --policies greedy random --engines array
+#   python conformance.py --games 500 --engines bitboard
+
+import argparse
+import contextlib
+import hashlib
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from bitboardFire import BitboardFire
+from fireRescueCore import create_model
+from policies import POLICIES
+
+REFERENCE = "mesa"
+ENGINES = ("mesa", "array")
+BITBOARD = "bitboard"
+DETERMINISTIC_POLICIES = ("greedy", "estrategia", "random")
+
+
+def half_step_hash(model):
+  # state_hash (fuego, paredes, bomberos, POIs) más contadores, temporizadores
+  # de noqueo y objetivos, que también deciden el resto de la partida
+  extra = (
+    model.phase, model.current_agent_index, model.step_count, model.round_count,
+    model.damage_count, len(model.rescued_victims), len(model.lost_victims),
+    model.game_over, model.end_reason,
+    [(agent.knockout_timer, agent.target_poi.id if agent.target_poi else 0) for agent in model.agent_list],
+  )
+  digest = hashlib.blake2b(model.state_hash().encode(), digest_size=16)
+  digest.update(repr(extra).encode())
+  return digest.hexdigest()
+
+
+def model_fire_state(model):
+  # Lo que deja una fase de fuego, en la forma de BitboardFire
+  width = model.width
+  return {
+    "codes": model.fire_codes().tolist(),
+    "walls": model.grid_data.reshape(-1).tolist(),
+    "damage": model.damage_count,
+    "lost": len(model.lost_victims),
+    "pois": [(poi.id, poi.y * width + poi.x) for poi in model.active_pois],
+  }
+
+
+def bitboard_fire_state(engine):
+  return {
+    "codes": engine.fire_codes().tolist(),
+    "walls": engine.wall_codes,
+    "damage": engine.damage_count,
+    "lost": engine.lost_victims,
+    "pois": [(poi_id, index) for poi_id, _, index in engine.active_pois],
+  }
+
+
+def fire_phase_hash(state):
+  return hashlib.blake2b(repr(sorted(state.items())).encode(), digest_size=16).hexdigest()
+
+
+def new_model(engine, policy_name, seed):
+  return create_model(engine=engine, seed=seed, policy=POLICIES[policy_name]())
+
+
+def play(engine, policy_name, seed, max_steps, bitboard=False):
+  # Hashes del estado inicial y de cada medio paso, y segundos dentro de step().
+  # Con bitboard también juega cada fase de fuego en BitboardFire y devuelve
+  # cuántas fases hubo, el medio paso de la primera que difiere y los segundos
+  # de step() y de fire_phase() en esas fases
+  model = new_model(engine, policy_name, seed)
+  hashes = [half_step_hash(model)]
+  elapsed = 0.0
+  fire = {"phases": 0, "divergence": None, "times": {REFERENCE: 0.0, BITBOARD: 0.0}}
+  while not model.is_game_over() and model.step_count < max_steps:
+    fire_engine = None
+    if bitboard and model.phase == "FIRE":
+      fire_engine = BitboardFire.from_model(model)
+      start = time.perf_counter()
+      fire_engine.fire_phase()
+      fire["times"][BITBOARD] += time.perf_counter() - start
+    start = time.perf_counter()
+    model.step()
+    step_time = time.perf_counter() - start
+    elapsed += step_time
+    hashes.append(half_step_hash(model))
+    if fire_engine is not None:
+      fire["phases"] += 1
+      fire["times"][REFERENCE] += step_time
+      same = fire_phase_hash(model_fire_state(model)) == fire_phase_hash(bitboard_fire_state(fire_engine))
+      if fire_engine.game_over:
+        same = same and model.game_over and model.end_reason == fire_engine.end_reason
+      if not same and fire["divergence"] is None:
+        fire["divergence"] = len(hashes) - 2
+  return hashes, elapsed, fire
+
+
+def replay(engine, policy_name, seed, steps):
+  model = new_model(engine, policy_name, seed)
+  for _ in range(steps):
+    model.step()
+  return model
+
+
+def first_divergence(reference, other):
+  for index, (a, b) in enumerate(zip(reference, other)):
+    if a != b:
+      return index
+  if len(reference) != len(other):
+    return min(len(reference), len(other))
+  return None
+
+
+def check_game(task):
+  policy_name, seed, engines, max_steps = task
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    reference, reference_time, fire = play(REFERENCE, policy_name, seed, max_steps, BITBOARD in engines)
+    result = {
+      "policy": policy_name,
+      "seed": seed,
+      "steps": len(reference) - 1,
+      "times": {REFERENCE: reference_time},
+      "divergence": {},
+    }
+    if BITBOARD in engines:
+      result["fire"] = fire
+      result["divergence"][BITBOARD] = fire["divergence"]
+    for engine in engines:
+      if engine == BITBOARD:
+        continue
+      hashes, elapsed, _ = play(engine, policy_name, seed, max_steps)
+      result["times"][engine] = elapsed
+      result["divergence"][engine] = first_divergence(reference, hashes)
+  return result
+
+
+def run_conformance(policy_names, engines=("array",), games=1000, max_steps=2000, base_seed=0, workers=None):
+  tasks = [(name, base_seed + i, tuple(engines), max_steps) for i in range(games) for name in policy_names]
+  with Pool(processes=workers) as pool:
+    results = list(pool.imap_unordered(check_game, tasks, chunksize=max(1, len(tasks) // 64)))
+  results.sort(key=lambda result: (result["seed"], result["policy"]))
+  return results
+
+
+def state_dump(model):
+  return {
+    "step": model.step_count,
+    "phase": model.phase,
+    "current_agent": model.current_agent_index,
+    "round": model.round_count,
+    "damage": model.damage_count,
+    "rescued": [poi.id for poi in model.rescued_victims],
+    "lost": [poi.id for poi in model.lost_victims],
+    "game_over": model.game_over,
+    "end_reason": model.end_reason,
+    "fire": model.sorted_cells(model.fire_cells),
+    "smoke": model.sorted_cells(model.smoke_cells),
+    "agents": [
+      {
+        "id": agent.unique_id,
+        "pos": tuple(agent.pos),
+        "role": agent.role.value if agent.role else None,
+        "knockout": agent.knockout_timer,
+        "carrying": agent.carrying_victim.id if agent.carrying_victim else None,
+        "target": agent.target_poi.id if agent.target_poi else None,
+      }
+      for agent in model.agent_list
+    ],
+    "pois": [(poi.id, poi.x, poi.y, poi.type.value, poi.revealed) for poi in model.active_pois],
+  }
+
+
+def print_fire_divergence(policy_name, seed, index):
+  # Fuego, paredes, daño y POIs del modelo y de BitboardFire después de la
+  # fase de fuego que difiere (index es el medio paso anterior a esa fase)
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    model = replay(REFERENCE, policy_name, seed, index)
+    engine = BitboardFire.from_model(model)
+    engine.fire_phase()
+    model.step()
+  print(f"\nPrimera diferencia: {BITBOARD} vs {REFERENCE}, política {policy_name}, semilla {seed}, "
+        f"fase de fuego después del medio paso {index}")
+  ref_state = model_fire_state(model)
+  other_state = bitboard_fire_state(engine)
+  for key in ref_state:
+    marker = "  " if ref_state[key] == other_state[key] else "!="
+    print(f"{marker} {key:<14} {REFERENCE}: {ref_state[key]}")
+    if ref_state[key] != other_state[key]:
+      print(f"   {'':<14} {BITBOARD}: {other_state[key]}")
+  if engine.game_over:
+    print(f"   fin {REFERENCE}: {model.end_reason!r}, {BITBOARD}: {engine.end_reason!r}")
+
+
+def print_divergence(policy_name, seed, engine, index):
+  # Estado de ambos motores justo después del medio paso que difiere
+  if engine == BITBOARD:
+    print_fire_divergence(policy_name, seed, index)
+    return
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    reference = replay(REFERENCE, policy_name, seed, index)
+    other = replay(engine, policy_name, seed, index)
+  print(f"\nPrimera diferencia: {engine} vs {REFERENCE}, política {policy_name}, semilla {seed}, "
+        f"medio paso {index}")
+  ref_dump = state_dump(reference)
+  other_dump = state_dump(other)
+  for key in ref_dump:
+    marker = "  " if ref_dump[key] == other_dump[key] else "!="
+    print(f"{marker} {key:<14} {REFERENCE}: {ref_dump[key]}")
+    if ref_dump[key] != other_dump[key]:
+      print(f"   {'':<14} {engine}: {other_dump[key]}")
+  walls = np.argwhere(np.asarray(reference.grid_data, dtype=np.int8) != np.asarray(other.grid_data, dtype=np.int8))
+  for y, x, direction in walls.tolist():
+    print(f"!= pared ({x}, {y}) dir {direction}: {REFERENCE} {reference.grid_data[y, x, direction]}, "
+          f"{engine} {other.grid_data[y, x, direction]}")
+
+
+def speedup_label(speedup):
+  # El speedup contra la referencia; si es menor que 1 lo dice en palabras
+  return f"{speedup:.2f}x" + ("" if speedup >= 1 else " (más lento)")
+
+
+def print_report(results, engines):
+  steps = sum(result["steps"] for result in results)
+  print(f"\n{'='*70}")
+  print(f"CONFORMIDAD: {len(results)} partidas, {steps} medios pasos, referencia = {REFERENCE}")
+  print(f"{'='*70}")
+  reference_time = sum(result["times"][REFERENCE] for result in results)
+  speedups = {}
+  print(f"{'motor':<10}{'divergen':>10}{'step s':>10}{'pasos/s':>12}  speedup")
+  print(f"{REFERENCE:<10}{'-':>10}{reference_time:>10.2f}{steps / reference_time:>12.0f}  {speedup_label(1.0)}")
+  for engine in engines:
+    if engine == BITBOARD:
+      continue
+    elapsed = sum(result["times"][engine] for result in results)
+    diverged = sum(1 for result in results if result["divergence"][engine] is not None)
+    speedups[engine] = reference_time / elapsed
+    print(f"{engine:<10}{diverged:>10}{elapsed:>10.2f}{steps / elapsed:>12.0f}  {speedup_label(speedups[engine])}")
+
+  if BITBOARD in engines:
+    phases = sum(result["fire"]["phases"] for result in results)
+    model_time = sum(result["fire"]["times"][REFERENCE] for result in results)
+    fire_time = sum(result["fire"]["times"][BITBOARD] for result in results)
+    diverged = sum(1 for result in results if result["divergence"][BITBOARD] is not None)
+    speedups[BITBOARD] = model_time / fire_time
+    print(f"\nFases de fuego: {phases} (step() del modelo contra BitboardFire.fire_phase())")
+    print(f"{'motor':<10}{'divergen':>10}{'fuego s':>10}{'fases/s':>12}  speedup")
+    print(f"{REFERENCE:<10}{'-':>10}{model_time:>10.2f}{phases / model_time:>12.0f}  {speedup_label(1.0)}")
+    print(f"{BITBOARD:<10}{diverged:>10}{fire_time:>10.2f}{phases / fire_time:>12.0f}  "
+          f"{speedup_label(speedups[BITBOARD])}")
+
+  for engine, speedup in speedups.items():
+    if speedup < 1:
+      print(f"\n{engine} es más lento que {REFERENCE}: {speedup:.2f}x ({1 / speedup:.2f} veces el tiempo)")
+
+  for engine in engines:
+    failures = [result for result in results if result["divergence"][engine] is not None]
+    if failures:
+      first = failures[0]
+      print_divergence(first["policy"], first["seed"], engine, first["divergence"][engine])
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Compara motores optimizados contra el de referencia")
+  parser.add_argument("--policies", nargs="+", default=list(DETERMINISTIC_POLICIES), choices=list(POLICIES))
+  others = [engine for engine in ENGINES if engine != REFERENCE] + [BITBOARD]
+  parser.add_argument("--engines", nargs="+", default=others, choices=others,
+                      help=f"{BITBOARD} compara solo las fases de fuego")
+  parser.add_argument("--games", type=int, default=1000, help="semillas por política")
+  parser.add_argument("--max-steps", type=int, default=2000)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--workers", type=int, default=None)
+  args = parser.parse_args()
+
+  results = run_conformance(args.policies, args.engines, args.games, args.max_steps, args.seed, args.workers)
+  print_report(results, args.engines)
+  failed = any(result["divergence"][engine] is not None for result in results for engine in args.engines)
+  raise SystemExit(1 if failed else 0)
@@ -0,0 +1,85 @@
+# Benchmark de model.step() por motor en el tablero estándar (o en uno por
+# copias con --tiles). A diferencia de conformance.py no compara estados ni usa
+# varios procesos: juega las mismas (política, semilla) en cada motor, una
+# pasada por motor intercalada con las de los demás, y se queda con la pasada
+# más rápida de cada uno para que el ruido de la máquina no cambie el speedup.
+#
+#   python engineBenchmark.py
+#   python engineBenchmark.py --games 200 --repeat 5 --policies greedy
+#   python engineBenchmark.py --tiles 4 4 --games 10
+
+import argparse
+import contextlib
+import io
+import time
+
+from arrayModel import tiled_layout
+from conformance import DETERMINISTIC_POLICIES, ENGINES, REFERENCE, speedup_label
+from fireRescueCore import create_model
+from policies import POLICIES
+
+
+def time_games(engine, policy_name, seeds, max_steps, tiles=None):
+  # Segundos dentro de step() y pasos jugados en todas las partidas
+  kwargs = {}
+  if tiles is not None:
+    grid, kwargs["exits"] = tiled_layout(*tiles)
+    kwargs.update(grid_data=grid, tiles=tiles)
+  elapsed = 0.0
+  steps = 0
+  with contextlib.redirect_stdout(io.StringIO()):
+    for seed in seeds:
+      model = create_model(engine=engine, seed=seed, policy=POLICIES[policy_name](), **kwargs)
+      while not model.is_game_over() and model.step_count < max_steps:
+        start = time.perf_counter()
+        model.step()
+        elapsed += time.perf_counter() - start
+        steps += 1
+  return elapsed, steps
+
+
+def run_benchmark(policy_names, engines=ENGINES, games=100, repeat=3, max_steps=2000, base_seed=0, tiles=None):
+  # {(política, motor): (mejor tiempo, pasos)}
+  seeds = range(base_seed, base_seed + games)
+  best = {}
+  for _ in range(repeat):
+    for name in policy_names:
+      for engine in engines:
+        elapsed, steps = time_games(engine, name, seeds, max_steps, tiles)
+        previous = best.get((name, engine))
+        if previous is None or elapsed < previous[0]:
+          best[(name, engine)] = (elapsed, steps)
+  return best
+
+
+def print_report(best, policy_names, engines):
+  print(f"{'política':<12}{'motor':<10}{'step s':>10}{'pasos/s':>12}  speedup")
+  totals = {engine: 0.0 for engine in engines}
+  for name in policy_names:
+    reference = best[(name, REFERENCE)][0] if REFERENCE in engines else None
+    for engine in engines:
+      elapsed, steps = best[(name, engine)]
+      totals[engine] += elapsed
+      speedup = speedup_label(reference / elapsed) if reference else "-"
+      print(f"{name:<12}{engine:<10}{elapsed:>10.2f}{steps / elapsed:>12.0f}  {speedup}")
+  if REFERENCE in engines:
+    for engine in engines:
+      if engine != REFERENCE:
+        print(f"\n{engine} contra {REFERENCE}, todas las políticas: "
+              f"{speedup_label(totals[REFERENCE] / totals[engine])}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Mide model.step() en cada motor")
+  parser.add_argument("--policies", nargs="+", default=list(DETERMINISTIC_POLICIES), choices=list(POLICIES))
+  parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+  parser.add_argument("--games", type=int, default=100, help="semillas por política")
+  parser.add_argument("--repeat", type=int, default=3, help="pasadas por motor; cuenta la más rápida")
+  parser.add_argument("--max-steps", type=int, default=2000)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--tiles", type=int, nargs=2, metavar=("FILAS", "COLUMNAS"))
+  args = parser.parse_args()
+
+  tiles = tuple(args.tiles) if args.tiles else None
+  best = run_benchmark(args.policies, args.engines, args.games, args.repeat, args.max_steps, args.seed, tiles)
+  print_report(best, args.policies, args.engines)
@@ -0,0 +1,1022 @@
+# Nucleo de la simulacion: tablero, fuego, paredes, POIs y condiciones de fin.
+# Solo depende de NumPy; mesa y la visualizacion viven en otros modulos
+# (agentModel.py y gridVisualization.py) y se importan solo cuando se usan.
+
+import hashlib
+import numpy as np
+import random
+import heapq
+import uuid
+from enum import Enum
+
+from chunkedGrid import ChunkedGrid, FreeCells
+from flowField import FlowField
+from fireRisk import FireRiskMap, DEFAULT_HORIZON
+
+wall_type = [0, 1, 2, 3, 4] # 0: none, 1: wall 1hp, 2: wall 2hp, 3: open door
+                              # 4: closed door
+
+grid_layout = [[(2, 0, 2, 2), (2, 0, 2, 0), (2, 4, 2, 0), (2, 0, 0, 4), (2, 0, 0, 0), (2, 2, 0, 0), (2, 0, 0, 2), (2, 2, 0, 0)],
+               [(2, 0, 0, 2), (2, 0, 0, 0), (2, 2, 0, 0), (0, 0, 2, 2), (0, 0, 2, 0), (0, 4, 4, 0), (0, 0, 0, 4), (0, 2, 0, 0)],
+               [(0, 0, 0, 3), (0, 0, 2, 0), (0, 2, 0, 0), (2, 0, 0, 2), (2, 0, 0, 0), (4, 2, 0, 0), (0, 0, 0, 2), (0, 2, 0, 0)],
+               [(0, 2, 4, 2), (2, 2, 0, 2), (0, 2, 0, 2), (0, 0, 2, 2), (0, 0, 0, 0), (0, 2, 0, 0), (0, 0, 2, 2), (0, 2, 2, 0)],
+               [(4, 0, 0, 2), (0, 2, 0, 0), (0, 0, 2, 2), (2, 3, 2, 0), (0, 0, 4, 3), (0, 3, 2, 0), (2, 0, 0, 3), (2, 3, 0, 0)],
+               [(0, 0, 2, 2), (0, 0, 2, 0), (2, 0, 2, 0), (2, 0, 2, 0), (4, 0, 2, 0), (2, 2, 2, 0), (0, 0, 2, 2), (0, 2, 2, 0)]
+               ]
+
+grid_layout = np.array(grid_layout)
+
+EXITS = [(0, 2), (7, 4)]
+
+# Escenario por copia del layout: fuegos y POIs iniciales, reserva de POIs y
+# límites de la partida. Un tablero de rows x cols copias (tiles, ver
+# arrayModel.tiled_layout) los multiplica; con una copia son las reglas originales.
+INITIAL_FIRES = [(1, 3), (3, 3), (5, 1)]
+INITIAL_POIS = 3
+POOL_VICTIMS = 10
+POOL_FALSE_ALARMS = 5
+DAMAGE_LIMIT = 24
+LOST_VICTIMS_LIMIT = 4
+VICTIMS_TO_WIN = 7
+
+# Versión de las reglas y del comportamiento de los agentes. Súbela con cada
+# cambio que altere el resultado de una partida: los resultados guardados en
+# resultStore con otra versión dejan de reutilizarse
+MODEL_VERSION = 1
+
+# Partida estancada: rondas seguidas sin progreso o veces que se repite el
+# mismo estado sin progreso (ver check_stalemate)
+STALL_ROUNDS = 30
+CYCLE_REPEATS = 3
+
+def wall_keys(width, x, y, direction, value):
+  # Clave de 64 bits (splitmix64) de cada pared con su valor; acepta arreglos.
+  # El hash de las paredes es el XOR de las claves de las paredes no vacías,
+  # así que un cambio se aplica con dos XOR sin recorrer el mapa
+  z = ((np.asarray(y, dtype=np.uint64) * np.uint64(width) + np.asarray(x, dtype=np.uint64)) * np.uint64(4)
+       + np.asarray(direction, dtype=np.uint64)) * np.uint64(8) + np.asarray(value, dtype=np.uint64)
+  z = z + np.uint64(0x9E3779B97F4A7C15)
+  z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+  z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+  return z ^ (z >> np.uint64(31))
+
+def layout_wall_hash(grid_data):
+  ys, xs, directions = np.nonzero(grid_data)
+  keys = wall_keys(grid_data.shape[1], xs, ys, directions, grid_data[ys, xs, directions])
+  return int(np.bitwise_xor.reduce(keys, initial=0))
+
+def wall_change_key(width, x, y, direction, previous, current):
+  # Lo que cambia wall_hash cuando la pared pasa de previous a current
+  values = np.array([previous, current])
+  keys = wall_keys(width, x, y, direction, values)
+  return int(np.bitwise_xor.reduce(keys[values != 0], initial=0))
+
+class FireState(Enum):
+  CLEAR = 0
+  SMOKE = 1
+  FIRE = 2
+
+# FireState por valor, para leer los códigos guardados en FireStateGrid
+FIRE_STATES = tuple(FireState)
+
+class FireStateGrid(ChunkedGrid):
+  # Estados de fuego por bloques: solo existen los bloques con fuego o humo.
+  # Se indexa como el arreglo anterior (fire_states[y, x]) con valores FireState.
+  def __init__(self, height, width):
+    super().__init__(height, width, default=FireState.CLEAR.value, dtype=np.int8)
+
+  def __getitem__(self, index):
+    return FIRE_STATES[super().__getitem__(index)]
+
+  def __setitem__(self, index, state):
+    super().__setitem__(index, state.value)
+
+class POIType(Enum):
+  VICTIM = "victim"
+  FALSE = "false_alarm"
+
+class FireFighterRole(Enum):
+  RESCUER = "rescuer"
+  EXTINGUISHER = "extinguisher"
+
+class POI:
+  __slots__ = ('id', 'type', 'x', 'y', 'revealed')
+
+  def __init__(self, poi_id, poi_type, x, y):
+    self.id = poi_id
+    self.type = poi_type
+    self.x = x
+    self.y = y
+    self.revealed = False
+
+class FireFighterBehavior:
+  # Comportamiento de un bombero. No guarda estado propio: las subclases
+  # definen model, pos, action_points, role, target_poi, carrying_victim,
+  # knockout_timer y path (como atributos o como propiedades).
+  __slots__ = ()
+
+  def reset_ap(self):
+    self.action_points = 4
+
+  def is_knocked_out(self):
+    return self.knockout_timer > 0
+
+  def update_knockout(self):
+    if self.knockout_timer > 0:
+      self.knockout_timer -= 1
+
+  def check_knockout(self):
+    fire_state = self.model._get_fire_state(self.pos[0], self.pos[1])
+    if fire_state == FireState.FIRE:
+      self.knockout_timer = 5
+
+  def step(self):
+    self.reset_ap()
+    self.update_knockout()
+
+    if self.is_knocked_out():
+      return
+
+    if self.role == FireFighterRole.RESCUER:
+      self.model.policy.rescuer_behavior(self)
+    elif self.role == FireFighterRole.EXTINGUISHER:
+      self.model.policy.extinguisher_behavior(self)
+
+    self.check_knockout()
+
+  def rescuer_behavior(self):
+    if self.carrying_victim:
+      # Campo de flujo compartido hacia la salida más barata (costo por paredes)
+      self.move_towards_exit()
+      if self.pos in self.model.exits:
+        print(f"Victim rescued by FireFighter {self.unique_id}!")
+        self.carrying_victim = None
+    elif self.target_poi:
+      self.move_towards_target((self.target_poi.x, self.target_poi.y))
+      if self.pos == (self.target_poi.x, self.target_poi.y):
+        self.reveal_and_handle_poi()
+    else:
+      pass
+
+  def extinguisher_behavior(self):
+    while self.action_points > 0:
+      target = self.find_nearest_fire()
+      if target:
+        if self.pos == target:
+          self.extinguish_fire(target[0], target[1])
+        else:
+          moved = self.move_towards_target(target)
+          if not moved:
+            break
+      else:
+        break
+
+  def find_nearest_fire(self):
+    # Empates por orden de filas, igual que el recorrido completo del tablero
+    best_target = None
+    best_key = None
+    px, py = self.pos
+
+    for cells in (self.model.fire_cells, self.model.smoke_cells):
+      for x, y in cells:
+        key = (abs(x - px) + abs(y - py), y, x)
+        if best_key is None or key < best_key:
+          best_key = key
+          best_target = (x, y)
+
+    return best_target
+
+  def extinguish_fire(self, x, y):
+    fire_state = self.model._get_fire_state(x, y)
+
+    if fire_state == FireState.FIRE:
+      if self.action_points >= 2:
+        self.action_points -= 2
+        self.model._set_fire_state(x, y, FireState.CLEAR)
+      elif self.action_points >= 1:
+        self.action_points -= 1
+        self.model._set_fire_state(x, y, FireState.SMOKE)
+    elif fire_state == FireState.SMOKE:
+      if self.action_points >= 1:
+        self.action_points -= 1
+        self.model._set_fire_state(x, y, FireState.CLEAR)
+
+  def get_nearest_exit(self, exits):
+    best_exit = None
+    best_distance = float('inf')
+
+    for exit in exits:
+      distance = abs(exit[0] - self.pos[0]) + abs(exit[1] - self.pos[1])
+      if distance < best_distance:
+        best_exit = exit
+        best_distance = distance
+
+    return best_exit
+
+  def reveal_and_handle_poi(self):
+    if self.action_points > 0:
+      self.model.reveal_poi(self.target_poi.x, self.target_poi.y)
+      if self.target_poi.type == POIType.VICTIM and not self.target_poi in self.model.lost_victims:
+        self.carrying_victim = self.target_poi
+      self.target_poi = None
+      self.action_points -= 1
+
+  def move_towards_target(self, target):
+    if self.action_points <= 0:
+      return False
+
+    if not self.path or (len(self.path) > 0 and self.path[-1] != target):
+      self.path = self.a_star_pathfinding(self.pos, target)
+
+    if self.path and len(self.path) > 1:
+      next_pos = self.path[1]
+      acted = self.take_step(next_pos)
+      if self.pos == next_pos:
+        self.path.pop(0)
+      return acted
+
+    return False
+
+  def move_towards_exit(self):
+    if self.action_points <= 0:
+      return False
+
+    next_pos = self.model.exit_flow_field().next_step(self.pos)
+    if next_pos is None:
+      return False
+    return self.take_step(next_pos)
+
+  def take_step(self, next_pos):
+    # Un paso hacia una celda vecina: cortar pared, abrir puerta o moverse
+    cost = self.get_move_cost(self.pos, next_pos)
+    if self.action_points < cost:
+      return False
+
+    wall_type, wall_dir = self.model._get_wall_between_cells(self.pos[0], self.pos[1], next_pos[0], next_pos[1])
+    if wall_type == 2:
+      self.chop_wall(self.pos[0], self.pos[1], wall_dir)
+      return True
+    elif wall_type == 1:
+      self.chop_wall(self.pos[0], self.pos[1], wall_dir)
+      if self.action_points >= 1:
+        if self.model.is_cell_empty(next_pos):
+          self.model.move_agent(self, next_pos)
+          self.action_points -= 1
+          return True
+    elif wall_type == 4:
+      self.open_door(self.pos[0], self.pos[1], wall_dir)
+      return True
+    else:
+      if self.model.is_cell_empty(next_pos):
+        self.model.move_agent(self, next_pos)
+        self.action_points -= cost
+        return True
+
+    return False
+
+  def get_move_cost(self, pos, next_pos):
+    wall_type, _ = self.model._get_wall_between_cells(pos[0], pos[1], next_pos[0], next_pos[1])
+    if wall_type == 0 or wall_type ==3:
+      return 1
+    elif wall_type == 1:
+      return 2
+    elif wall_type == 2:
+      return 3
+    elif wall_type == 4:
+      return 2
+    else:
+      return float('inf')
+
+  def chop_wall(self, x, y, direction):
+    if self.action_points >= 1:
+      success = self.model.damage_wall(x, y, direction)
+      self.action_points -= 1
+
+  def open_door(self, x, y, direction):
+    if self.action_points >= 1 and 0 <= x < self.model.width and 0 <= y < self.model.height:
+      if self.model.grid_data[y, x, direction] == 4:
+        self.model.grid_data[y, x, direction] = 3
+        self.model.walls_changed(x, y, direction, 4)
+        self.action_points -= 1
+
+  def a_star_pathfinding(self, start, goal):
+    if start == goal:
+      return [start]
+
+    f_score = {start: self.heuristic(start, goal)}
+    open_set = [(f_score[start], start)]
+    came_from = {}
+    g_score = {start: 0}
+
+    while open_set:
+      current = heapq.heappop(open_set)[1]
+
+      if current == goal:
+        path = []
+        while current in came_from:
+          path.append(current)
+          current = came_from[current]
+        path.append(start)
+        path.reverse()
+        return path
+
+      neighbors = self.get_neighbors(current)
+      for neighbor in neighbors:
+        tentative_g_score = g_score[current] + self.get_move_cost(current, neighbor) + self.risk_cost(neighbor)
+
+        if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+          came_from[neighbor] = current
+          g_score[neighbor] = tentative_g_score
+          f_score[neighbor] = tentative_g_score + self.heuristic(neighbor, goal)
+          heapq.heappush(open_set, (f_score[neighbor], neighbor))
+
+    return []
+
+  def risk_cost(self, pos):
+    # Costo extra por riesgo de fuego; sin peso (por defecto) no cambia el camino
+    weight = self.model.risk_weight
+    if not weight:
+      return 0
+    return weight * self.model.fire_risk()[pos[1], pos[0]]
+
+  def get_neighbors(self, pos):
+    x, y = pos
+    neighbors = []
+    directions = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+
+    for dx, dy in directions:
+      nx, ny = x + dx, y + dy
+
+      if 0 <= nx < self.model.width and 0 <= ny < self.model.height:
+        neighbors.append((nx, ny))
+
+    return neighbors
+
+  def heuristic(self, pos, goal):
+    x1, y1 = pos
+    x2, y2 = goal
+    return abs(x1 - x2) + abs(y1 - y2)
+
+# Códigos numéricos compartidos por el motor de arreglos y el formato binario
+ROLES = (None, FireFighterRole.RESCUER, FireFighterRole.EXTINGUISHER)
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+ROLE_VALUES = tuple(role.value if role else None for role in ROLES)
+
+STATE_VIEWS = ("fires", "smoke", "agents", "pois", "gamestate", "risk")
+
+class Policy:
+  # Política de decisión de los bomberos. Esta es la del modelo original
+  # (asignación greedy por distancia); las variantes viven en policies.py y
+  # sobreescriben solo los métodos que cambian.
+  name = "greedy"
+  # Misma semilla, misma partida. Si la política depende del reloj (plazos de
+  # tiempo) debe ser False y sus partidas no se reutilizan desde resultStore
+  reproducible = True
+
+  def assign_roles(self, model):
+    model.greedy_assign_roles()
+
+  def rescuer_behavior(self, agent):
+    agent.rescuer_behavior()
+
+  def extinguisher_behavior(self, agent):
+    agent.extinguisher_behavior()
+
+class FireRescueGame:
+  # Reglas del juego independientes de como se guardan los agentes.
+  # Las subclases crean los bomberos en place_firefighters() y llenan
+  # self.agent_list con objetos que tengan pos, role, target_poi, etc.
+  def __init__(self, grid_data, exits=None, seed=None, policy=None, risk_weight=0, tiles=(1, 1)):
+    # Copia propia: damage_wall modifica las paredes y el layout se reutiliza al reiniciar
+    self.grid_data = np.array(grid_data, dtype=np.int8)
+    height, width = self.grid_data.shape[:2]
+    self.height = height
+    self.width = width
+
+    self.exits = list(exits) if exits is not None else list(EXITS)
+    # Copias del layout en el tablero; escalan conteos iniciales y límites
+    self.tiles = tuple(tiles)
+    copies = self.tiles[0] * self.tiles[1]
+    self.damage_limit = DAMAGE_LIMIT * copies
+    self.lost_victims_limit = LOST_VICTIMS_LIMIT * copies
+    self.victims_to_win = VICTIMS_TO_WIN * copies
+    self.policy = policy if policy is not None else Policy()
+    self._seed_streams(seed)
+    # Sube con cada cambio de paredes o puertas; invalida el campo de flujo
+    self.walls_version = 0
+    # Hash de todas las paredes, actualizado en walls_changed (ver wall_keys)
+    self.wall_hash = layout_wall_hash(self.grid_data)
+    self._exit_field = None
+    # Riesgo de fuego a DEFAULT_HORIZON rondas (ver fireRisk.py). risk_weight > 0
+    # lo suma al costo de A* y a la prioridad de los POIs; en 0 es el modelo original
+    self.risk_weight = risk_weight
+    self.risk_map = FireRiskMap(DEFAULT_HORIZON)
+    self._risk_key = None
+
+    # Versión de cada vista de la API; sube cada vez que cambia su contenido.
+    # game_token distingue partidas distintas (p. ej. después de un reset).
+    self.game_token = uuid.uuid4().hex[:12]
+    self.state_versions = {view: 0 for view in STATE_VIEWS}
+
+    self.running = True
+    self.fire_states = FireStateGrid(height, width)
+    # Conjuntos de celdas (x, y) mantenidos por _set_fire_state. El frente son
+    # las celdas con fuego que tienen al menos un vecino sin fuego.
+    self.fire_cells = set()
+    self.smoke_cells = set()
+    self.fire_frontier = set()
+    self.step_count = 0
+    self.damage_count = 0
+
+    self.all_pois = []
+    self.active_pois = []
+    self.revealed_pois = []
+    self.lost_victims = []
+    self.rescued_victims = []
+
+    self.current_agent_index = 0
+    self.agent_list = []
+    self.round_count = 0
+    self.phase = "AGENT"
+
+    self.game_over = False
+    self.game_won = False
+    self.game_lost = False
+    self.end_reason = ""
+
+    # Detección de estancamiento; stall_rounds = 0 la desactiva
+    self.stall_rounds = STALL_ROUNDS
+    self.cycle_repeats = CYCLE_REPEATS
+    self.stalled = False
+    self._progress = None
+    self._rounds_without_progress = 0
+    self._seen_states = {}
+
+    self._create_poi_pool()
+    self._place_initial_pois()
+    self._place_initial_fires()
+    self.place_firefighters()
+
+  def place_firefighters(self):
+    raise NotImplementedError
+
+  def _seed_streams(self, seed):
+    # Sin semilla todo usa el módulo random (random.seed() reproduce la partida).
+    # Con semilla, fuego, POIs y política tienen generadores separados: dos
+    # políticas con la misma semilla ven la misma secuencia de fuego y de POIs
+    # aunque tomen decisiones distintas (números aleatorios comunes).
+    if seed is None:
+      self.fire_random = random
+      self.poi_random = random
+      self.policy_random = random
+    else:
+      streams = random.Random(seed)
+      self.fire_random = random.Random(streams.getrandbits(64))
+      self.poi_random = random.Random(streams.getrandbits(64))
+      self.policy_random = random.Random(streams.getrandbits(64))
+
+  def touch(self, *views):
+    for view in views:
+      self.state_versions[view] += 1
+
+  def _create_poi_pool(self):
+    poi_id = 1
+    copies = self.tiles[0] * self.tiles[1]
+    for i in range(POOL_VICTIMS * copies):
+      poi = POI(poi_id, POIType.VICTIM, -1, -1)
+      self.all_pois.append(poi)
+      poi_id += 1
+
+    for i in range(POOL_FALSE_ALARMS * copies):
+      poi = POI(poi_id, POIType.FALSE, -1, -1)
+      self.all_pois.append(poi)
+      poi_id += 1
+
+    self.poi_random.shuffle(self.all_pois)
+
+  def _get_valid_positions_for_poi(self):
+    # Celdas sin POI en orden por filas, sin recorrer el tablero
+    taken = [poi.y * self.width + poi.x for poi in self.active_pois]
+    return FreeCells(self.width, self.width * self.height, taken)
+
+  def _get_valid_positions_for_firefighters(self):
+    # Celdas sin fuego, humo ni POI en orden por filas
+    taken = [y * self.width + x for x, y in self.fire_cells | self.smoke_cells]
+    taken.extend(poi.y * self.width + poi.x for poi in self.active_pois)
+    return FreeCells(self.width, self.width * self.height, taken)
+
+  def _place_initial_pois(self):
+    valid_positions = self._get_valid_positions_for_poi()
+
+    # Selecciona 2 victim y 1 false_alarm
+
+    count = INITIAL_POIS * self.tiles[0] * self.tiles[1]
+    initial_pois = self.poi_random.sample(self.all_pois, count)
+    selected_positions = self.poi_random.sample(valid_positions, count)
+
+    for poi, (x, y) in zip(initial_pois, selected_positions):
+      poi.x = x
+      poi.y = y
+      self.active_pois.append(poi)
+
+    for poi in initial_pois:
+      self.all_pois.remove(poi)
+    self.touch("pois")
+
+  def _get_poi_at_position(self, x, y):
+    print(f"\nBuscando POI en posición ({x}, {y})")
+    print(f"POIs activos:")
+    for poi in self.active_pois:
+      print(f"- POI en ({poi.x}, {poi.y})")
+      if poi.x == x and poi.y == y:
+        print(f"¡POI encontrado! Tipo: {poi.type.value}")
+        return poi
+    print("No se encontró ningún POI en esa posición")
+    return None
+
+  def place_new_poi(self):
+    if len(self.all_pois) == 0:
+      return None
+
+    valid_positions = self._get_valid_positions_for_poi()
+    if len(valid_positions) == 0:
+      return None
+
+    new_poi = self.poi_random.choice(self.all_pois)
+    selected_position = self.poi_random.choice(valid_positions)
+
+    new_poi.x = selected_position[0]
+    new_poi.y = selected_position[1]
+    self._set_fire_state(new_poi.x, new_poi.y, FireState.CLEAR)
+    self.active_pois.append(new_poi)
+    self.all_pois.remove(new_poi)
+    self.touch("pois")
+
+    self.assign_roles()
+
+    return new_poi
+
+  def reveal_poi(self, x, y):
+    for poi in self.active_pois:
+      if poi.x == x and poi.y == y and not poi.revealed:
+        poi.revealed = True
+        self.revealed_pois.append(poi)
+        self.touch("pois")
+
+        if poi.type == POIType.VICTIM:
+          print(f"Es una victima.")
+        elif poi.type == POIType.FALSE:
+          print(f"Es una falsa alarma.")
+          self.place_new_poi()
+
+    return False
+
+  def rescue_victims(self, victim_poi):
+    if victim_poi.type == POIType.VICTIM:
+      self.rescued_victims.append(victim_poi)
+      if victim_poi in self.active_pois:
+        self.active_pois.remove(victim_poi)
+      self.touch("pois")
+
+      self.check_win_condition()
+      self.place_new_poi()
+      self.assign_roles()
+
+  def check_pois_in_danger(self):
+    pois_lost = []
+    for poi in self.active_pois[:]:
+      fire_state = self._get_fire_state(poi.x, poi.y)
+      if fire_state == FireState.FIRE:
+        if poi.type == POIType.VICTIM:
+          self.lost_victims.append(poi)
+        self.active_pois.remove(poi)
+        pois_lost.append(poi)
+        self.touch("pois")
+        self.place_new_poi()
+
+    if len(self.lost_victims) >= self.lost_victims_limit:
+      self.end_game(False, f"Derrota: {len(self.lost_victims)} victimas perdidas por fuego")
+
+    return pois_lost
+
+  def _place_initial_fires(self):
+      # Los mismos fuegos en cada copia del layout
+      rows, cols = self.tiles
+      tile_height, tile_width = self.height // rows, self.width // cols
+      for row in range(rows):
+        for col in range(cols):
+          for x, y in INITIAL_FIRES:
+            self._set_fire_state(x + col * tile_width, y + row * tile_height, FireState.FIRE)
+
+  def spread_fire_random(self):
+    x = self.fire_random.randint(0, self.width - 1)
+    y = self.fire_random.randint(0, self.height - 1)
+
+    current_state = self._get_fire_state(x, y)
+
+    if current_state == FireState.CLEAR:
+      self._set_fire_state(x, y, FireState.SMOKE)
+
+    elif current_state == FireState.SMOKE:
+      self._set_fire_state(x, y, FireState.FIRE)
+
+    elif current_state == FireState.FIRE:
+      adjacent_cells = self._get_adjacent_cells(x, y)
+
+      for adj in adjacent_cells:
+        ax, ay = adj['pos']
+        wall_type = adj['wall_type']
+        wall_dir = adj['wall_dir']
+
+        can_pass = self.damage_wall(ax, ay, wall_dir)
+
+        if can_pass:
+          adj_state = self._get_fire_state(ax, ay)
+
+          if adj_state == FireState.CLEAR:
+            self._set_fire_state(ax, ay, FireState.FIRE)
+          elif adj_state == FireState.SMOKE:
+            self._set_fire_state(ax, ay, FireState.FIRE)
+
+  def spread_smoke_to_fire(self):
+    # Solo el frente puede tener humo al lado; el interior del incendio no cambia
+    smoke_to_convert = []
+    for fx, fy in self.fire_frontier:
+      adjacent_cells = self._get_adjacent_cells(fx, fy)
+      for adj in adjacent_cells:
+        ax, ay = adj['pos']
+        wall_type = adj['wall_type']
+        if (self._get_fire_state(ax, ay) == FireState.SMOKE and wall_type == 0):
+          smoke_to_convert.append((ax, ay))
+
+    for sx, sy in smoke_to_convert:
+      self._set_fire_state(sx, sy, FireState.FIRE)
+
+  def _get_fire_state(self, x, y):
+    # Los conjuntos responden más rápido que el tablero por bloques
+    cell = (x, y)
+    if cell in self.fire_cells:
+      return FireState.FIRE
+    if cell in self.smoke_cells:
+      return FireState.SMOKE
+    return FireState.CLEAR
+
+  def _set_fire_state(self, x, y, state):
+    previous = self._get_fire_state(x, y)
+    if previous == state:
+      return
+    self.fire_states[y, x] = state
+    if FireState.FIRE in (previous, state):
+      self.touch("fires")
+    if FireState.SMOKE in (previous, state):
+      self.touch("smoke")
+    self.touch("risk")
+
+    cell = (x, y)
+    if previous == FireState.FIRE:
+      self.fire_cells.discard(cell)
+    elif previous == FireState.SMOKE:
+      self.smoke_cells.discard(cell)
+    if state == FireState.FIRE:
+      self.fire_cells.add(cell)
+    elif state == FireState.SMOKE:
+      self.smoke_cells.add(cell)
+
+    self._update_frontier(x, y)
+    for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+      nx, ny = x + dx, y + dy
+      if 0 <= nx < self.width and 0 <= ny < self.height:
+        self._update_frontier(nx, ny)
+
+  def _update_frontier(self, x, y):
+    fire_cells = self.fire_cells
+    if (x, y) in fire_cells:
+      for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < self.width and 0 <= ny < self.height and (nx, ny) not in fire_cells:
+          self.fire_frontier.add((x, y))
+          return
+    self.fire_frontier.discard((x, y))
+
+  def sorted_cells(self, cells):
+    # Orden por filas, el mismo que daba recorrer el tablero completo
+    return sorted(cells, key=lambda cell: (cell[1], cell[0]))
+
+  def assign_roles(self):
+    self.policy.assign_roles(self)
+
+  def greedy_assign_roles(self):
+    assignments = []
+    for poi in self.active_pois:
+      distances = []
+      for firefighter in self.agent_list:
+        if not firefighter.carrying_victim:
+          distance = abs(poi.x - firefighter.pos[0]) + abs(poi.y - firefighter.pos[1])
+          distances.append((distance - self.poi_risk_bonus(poi), firefighter, poi))
+      distances.sort(key=lambda x: x[0])
+      assignments.extend(distances[:3])
+
+    assigned_rescuers = set()
+    poi_assignments = {}
+
+    assignments.sort(key=lambda x: x[0])
+    for distance, firefighter, poi in assignments:
+      if firefighter not in assigned_rescuers and len(assigned_rescuers) < 3:
+        firefighter.target_poi = poi
+        firefighter.role = FireFighterRole.RESCUER
+        poi_assignments[poi] = firefighter
+        assigned_rescuers.add(firefighter)
+
+    for firefighter in self.agent_list:
+      if firefighter not in assigned_rescuers:
+        firefighter.role = FireFighterRole.EXTINGUISHER
+        firefighter.target_poi = None
+    self.touch("agents")
+
+  def strategy_assign_roles(self, max_rescuers):
+    # Roles de StrategyPolicy: quien carga una víctima sigue de rescatista y
+    # cada POI sin revelar tiene a lo más un rescatista (el más cercano libre)
+    assigned = set()
+    for agent in self.agent_list:
+      agent.target_poi = None
+      if agent.carrying_victim:
+        agent.role = FireFighterRole.RESCUER
+        assigned.add(agent)
+      else:
+        agent.role = None
+
+    candidates = []
+    for poi in self.active_pois:
+      if poi.revealed:
+        continue
+      for agent in self.agent_list:
+        if not agent.carrying_victim:
+          distance = abs(poi.x - agent.pos[0]) + abs(poi.y - agent.pos[1])
+          candidates.append((distance - self.poi_risk_bonus(poi), agent, poi))
+    candidates.sort(key=lambda x: x[0])
+
+    targeted = set()
+    for distance, agent, poi in candidates:
+      if len(assigned) >= max_rescuers:
+        break
+      if agent not in assigned and poi.id not in targeted:
+        agent.role = FireFighterRole.RESCUER
+        agent.target_poi = poi
+        assigned.add(agent)
+        targeted.add(poi.id)
+
+    for agent in self.agent_list:
+      if agent.role is None and not agent.is_knocked_out():
+        agent.role = FireFighterRole.EXTINGUISHER
+    self.touch("agents")
+
+  def fire_codes(self):
+    # Estados como arreglo (height, width) con los valores de FireState; solo
+    # se copian los bloques activos
+    return self.fire_states.to_dense()
+
+  def fire_risk(self):
+    # Mapa (height, width) de probabilidad de fuego; se recalcula solo la zona
+    # que cambió desde la última consulta
+    key = self.state_versions["risk"]
+    if key != self._risk_key:
+      self.risk_map.update(self.fire_codes(), self.grid_data)
+      self._risk_key = key
+    return self.risk_map.risk
+
+  def poi_risk_bonus(self, poi):
+    # Un POI con más riesgo de fuego se atiende antes (se resta a la distancia)
+    if not self.risk_weight:
+      return 0
+    return self.risk_weight * self.fire_risk()[poi.y, poi.x]
+
+  def agent_records(self):
+    return [
+      {
+        "id": agent.unique_id,
+        "x": agent.pos[0],
+        "y": agent.pos[1],
+        "role": agent.role.value if agent.role else None,
+        "knocked_out": agent.is_knocked_out()
+      }
+      for agent in self.agent_list
+    ]
+
+  def agent_columns(self):
+    # Columnas (id, x, y, rol, noqueado, cargando) como arreglos de NumPy
+    agents = self.agent_list
+    return {
+      "id": np.array([agent.unique_id for agent in agents], dtype=np.int64),
+      "x": np.array([agent.pos[0] for agent in agents], dtype=np.int64),
+      "y": np.array([agent.pos[1] for agent in agents], dtype=np.int64),
+      "role": np.array([ROLE_CODES[agent.role] for agent in agents], dtype=np.int64),
+      "knocked_out": np.array([agent.is_knocked_out() for agent in agents], dtype=bool),
+      "carrying": np.array([bool(agent.carrying_victim) for agent in agents], dtype=bool),
+    }
+
+  def get_current_agent(self):
+    if not self.agent_list:
+      return None
+    return self.agent_list[self.current_agent_index]
+
+  def agent_turn(self):
+    current_agent = self.get_current_agent()
+    if current_agent is None:
+        self.phase = "FIRE"
+        return
+
+    print(f"\n-- Turn: Agent {current_agent.unique_id} ({current_agent.role.value if current_agent.role else 'No Role'}) ---")
+    current_agent.update_knockout()
+    current_agent.reset_ap()
+
+    if not current_agent.is_knocked_out():
+      if current_agent.role == FireFighterRole.RESCUER:
+        self.policy.rescuer_behavior(current_agent)
+      elif current_agent.role == FireFighterRole.EXTINGUISHER:
+        self.policy.extinguisher_behavior(current_agent)
+
+    current_agent.check_knockout()
+    self.current_agent_index = (self.current_agent_index + 1) % len(self.agent_list)
+    self.phase = "FIRE"
+    self.step_count += 1
+    self.touch("agents")
+
+  def fire_spread_phase(self):
+    print(f"\n-- FIRE SPREAD PHASE (Round {self.round_count}) ---")
+    self.spread_fire_random()
+    self.spread_smoke_to_fire()
+    lost_pois = self.check_pois_in_danger()
+    if lost_pois:
+      victims_lost = sum(1 for p in lost_pois if p.type == POIType.VICTIM)
+      alarms_destroyed = sum(1 for p in lost_pois if p.type == POIType.FALSE)
+      print(f"¡{victims_lost} víctima(s) y {alarms_destroyed} falsa(s) alarma(s) perdidas por fuego!")
+      self.assign_roles()
+    self.step_count += 1
+    self.phase = "AGENT"
+    print(f"Damage count: {self.damage_count}")
+    # La ronda termina cuando todos los bomberos jugaron su turno
+    if self.current_agent_index == 0:
+      self.round_count += 1
+      self.check_stalemate()
+
+  def _get_adjacent_cells(self, x, y):
+    adjacent = []
+    directions = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+    for i, (dx, dy) in enumerate(directions):
+      nx, ny = x + dx, y + dy
+      if 0 <= nx < self.width and 0 <= ny < self.height:
+        wall_type, wall_dir = self._get_wall_between_cells(x, y, nx, ny)
+        adjacent.append({
+            'pos': (nx, ny),
+            'wall_type': wall_type,
+            'wall_dir': wall_dir,
+            'source_pos': (x, y)
+        })
+    return adjacent
+
+  def _get_wall_between_cells(self, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+
+    if dx == 0 and dy == -1: # Arriba
+      direction = 0
+    elif dx == 1 and dy == 0: # Derecha
+      direction = 1
+    elif dx == 0 and dy == 1: # Abajo
+      direction = 2
+    elif dx == -1 and dy == 0: # Izquierda
+      direction = 3
+    else: # No son adyacentes
+      return 0, -1
+
+    if 0 <= x1 < self.width and 0 <= y1 < self.height:
+      wall_type = self.grid_data[y1, x1, direction]
+      return wall_type, direction
+    else:
+      return 0, -1
+
+  def exit_flow_field(self):
+    if self._exit_field is None or self._exit_field.version != self.walls_version:
+      self._exit_field = FlowField(self.grid_data, self.exits, self.walls_version)
+    return self._exit_field
+
+  def walls_changed(self, x, y, direction, previous):
+    # La pared de (x, y) en direction pasó de previous a su valor actual (daño
+    # o puerta abierta); se llama después de modificar grid_data
+    self.walls_version += 1
+    self.wall_hash ^= wall_change_key(self.width, x, y, direction, previous, self.grid_data[y, x, direction])
+    self.touch("risk")
+
+  def damage_wall(self, x, y, direction):
+    if 0 <= x < self.width and 0 <= y < self.height:
+      current_wall = self.grid_data[y, x, direction]
+      if current_wall == 2:
+        self.grid_data[y, x, direction] = 1
+        self.walls_changed(x, y, direction, current_wall)
+        self.damage_count += 1
+        self.check_damage_loss_condition()
+        return False
+      elif current_wall == 1:
+        self.grid_data[y, x, direction] = 0
+        self.walls_changed(x, y, direction, current_wall)
+        self.damage_count += 1
+        self.check_damage_loss_condition()
+        return True
+      elif current_wall in [3, 4]:
+        self.grid_data[y, x, direction] = 0
+        self.walls_changed(x, y, direction, current_wall)
+        self.damage_count += 1
+        self.check_damage_loss_condition()
+        return True
+      else:
+        return True
+
+  def progress_counters(self):
+    return (len(self.rescued_victims), len(self.lost_victims), self.damage_count, len(self.revealed_pois))
+
+  def state_hash(self):
+    # Hash del tablero (fuego, paredes, bomberos y POIs) con tipos fijos, así
+    # que los dos motores dan el mismo hash para el mismo estado. Fuego y humo
+    # salen de los bloques activos y las paredes de wall_hash: no se recorre el mapa
+    digest = hashlib.blake2b(digest_size=16)
+    self.fire_states.update_digest(digest)
+    digest.update(self.wall_hash.to_bytes(8, "little"))
+    columns = self.agent_columns()
+    for key in ("id", "x", "y", "role", "knocked_out", "carrying"):
+      digest.update(np.asarray(columns[key], dtype=np.int32).tobytes())
+    digest.update(repr([(poi.id, poi.x, poi.y, poi.revealed) for poi in self.active_pois]).encode())
+    return digest.hexdigest()
+
+  def check_stalemate(self):
+    # Se llama al cerrar cada ronda. Un cambio en los contadores de progreso
+    # reinicia la cuenta; sin progreso, la partida termina tras stall_rounds
+    # rondas o cuando el mismo estado aparece cycle_repeats veces
+    if self.game_over or not self.stall_rounds:
+      return
+    progress = self.progress_counters()
+    state = self.state_hash()
+    if progress != self._progress:
+      self._progress = progress
+      self._rounds_without_progress = 0
+      self._seen_states = {state: 1}
+      return
+
+    self._rounds_without_progress += 1
+    seen = self._seen_states[state] = self._seen_states.get(state, 0) + 1
+    if seen >= self.cycle_repeats:
+      self.end_stalemate(f"Estancado: el mismo estado se repitió {seen} veces sin progreso")
+    elif self._rounds_without_progress >= self.stall_rounds:
+      self.end_stalemate(f"Estancado: {self._rounds_without_progress} rondas sin progreso")
+
+  def end_stalemate(self, reason):
+    self.stalled = True
+    self.end_game(False, reason)
+
+  def check_damage_loss_condition(self):
+    if self.damage_count > self.damage_limit:
+      self.end_game(False, "Derrota: Demasiados daños")
+
+  def check_win_condition(self):
+    if len(self.rescued_victims) >= self.victims_to_win:
+      self.end_game(True, f"Victoria: {self.victims_to_win} victimas rescatadas")
+
+  def end_game(self, won, reason):
+    self.game_over = True
+    self.game_won = won
+    self.game_lost = not won
+    self.end_reason = reason
+    self.running = False
+    self.touch("gamestate")
+
+    print(f"JUEGO TERMINADO")
+    print(f"{'='*50}")
+    print(f"Resultado: {reason}")
+    print(f"Estadísticas finales:")
+    print(f"- Víctimas rescatadas: {len(self.rescued_victims)}")
+    print(f"- Víctimas perdidas: {len(self.lost_victims)}")
+    print(f"- Daño estructural: {self.damage_count}")
+    print(f"- Rounds jugados: {self.round_count}")
+
+  def is_game_over(self):
+    return self.game_over
+
+  def step(self):
+    if self.phase == "AGENT":
+      self.agent_turn()
+    elif self.phase == "FIRE":
+      self.fire_spread_phase()
+    self.touch("gamestate")
+
+
+def create_model(grid_data=None, engine="mesa", **kwargs):
+  # Construye el modelo bajo demanda. "mesa" es el modelo de referencia
+  # (agentModel); "array" es el motor sin mesa con agentes en arreglos.
+  if grid_data is None:
+    grid_data = grid_layout
+  if engine == "array":
+    from arrayModel import ArrayFireRescueModel
+    return ArrayFireRescueModel(grid_data, **kwargs)
+  if engine == "mesa":
+    from agentModel import FireRescueModel
+    return FireRescueModel(grid_data, **kwargs)
+  raise ValueError(f"Motor desconocido: {engine}")
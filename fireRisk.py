@@ -0,0 +1,104 @@
+# Mapa de riesgo de incendio: probabilidad de que cada celda esté en fuego
+# dentro de K fases de fuego, calculada a partir del estado actual.
+#
+# Cada fase de fuego elige una celda uniforme (prob. q = 1 / celdas): despejada
+# pasa a humo, humo a fuego y fuego explota hacia sus vecinas (la vecina en la
+# dirección d se enciende salvo que su pared en d sea de 2 puntos). Después el
+# humo junto a fuego con pared 0 hacia él se vuelve fuego. Como en cada fase se
+# elige una sola celda, los eventos de la primera parte son excluyentes y se
+# suman; entre celdas se supone independencia (campo medio). El fuego no se
+# apaga en la fase de fuego, así que P(fuego en la fase K) = P(fuego en algún
+# momento antes de K). Las paredes se toman como están ahora.
+#
+# Cada fase lee vecinas dos veces (explosión y humo), así que un cambio en una
+# celda afecta el riesgo hasta 2K celdas de distancia: update() solo recalcula
+# esa zona (con 4K de contexto) y deja el resto del mapa como estaba.
+
+import numpy as np
+
+# Valores de FireState (fireRescueCore importa este módulo)
+SMOKE = 1
+FIRE = 2
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+DEFAULT_HORIZON = 3
+
+
+def _shift(a, dx, dy):
+  # out[y, x] = a[y - dy, x - dx]: lo que la celda u aporta a su vecina u + (dx, dy)
+  out = np.zeros_like(a)
+  h, w = a.shape
+  out[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = \
+    a[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+  return out
+
+
+def ignition_risk(codes, walls, horizon=DEFAULT_HORIZON, cells=None):
+  # codes: valores de FireState (h, w); walls: tipos de pared (h, w, 4).
+  # cells es el total del tablero (define q) cuando codes es solo una ventana.
+  cells = cells or codes.size
+  q = 1.0 / cells
+  fire = (codes == FIRE).astype(float)
+  smoke = (codes == SMOKE).astype(float)
+  clear = 1.0 - fire - smoke
+
+  # La explosión de u alcanza a v = u + d si la pared de v en d no es de 2 puntos;
+  # el humo de v se enciende desde u si la pared de u hacia v es 0
+  explode_pass = [(walls[..., d] != 2).astype(float) for d in range(4)]
+  flash_open = [(walls[..., d] == 0).astype(float) for d in range(4)]
+
+  for _ in range(horizon):
+    explosion = np.zeros_like(fire)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+      explosion += q * _shift(fire, dx, dy) * explode_pass[d]
+
+    fire = fire + smoke * (q + explosion) + clear * explosion
+    smoke = smoke * (1.0 - q - explosion) + clear * q
+    clear = 1.0 - fire - smoke
+
+    no_flash = np.ones_like(fire)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+      no_flash *= 1.0 - _shift(fire * flash_open[d], dx, dy)
+    flash = smoke * (1.0 - no_flash)
+    fire = fire + flash
+    smoke = smoke - flash
+
+  return np.clip(fire, 0.0, 1.0)
+
+
+class FireRiskMap:
+  def __init__(self, horizon=DEFAULT_HORIZON):
+    self.horizon = horizon
+    self.risk = None
+    self._codes = None
+    self._walls = None
+
+  def update(self, codes, walls):
+    codes = np.asarray(codes)
+    walls = np.asarray(walls)
+    if self.risk is None or self._codes.shape != codes.shape:
+      self.risk = ignition_risk(codes, walls, self.horizon)
+    else:
+      changed = (codes != self._codes) | (walls != self._walls).any(axis=2)
+      if changed.any():
+        self._update_window(codes, walls, changed)
+    self._codes = codes.copy()
+    self._walls = walls.copy()
+    return self.risk
+
+  def _update_window(self, codes, walls, changed):
+    h, w = codes.shape
+    ys, xs = np.nonzero(changed)
+    reach = 2 * self.horizon
+    # Zona afectada (reach) y contexto necesario para calcularla bien (2 * reach)
+    inner = (max(ys.min() - reach, 0), min(ys.max() + reach + 1, h),
+             max(xs.min() - reach, 0), min(xs.max() + reach + 1, w))
+    outer = (max(ys.min() - 2 * reach, 0), min(ys.max() + 2 * reach + 1, h),
+             max(xs.min() - 2 * reach, 0), min(xs.max() + 2 * reach + 1, w))
+    if inner == (0, h, 0, w):
+      self.risk = ignition_risk(codes, walls, self.horizon)
+      return
+
+    y0, y1, x0, x1 = outer
+    window = ignition_risk(codes[y0:y1, x0:x1], walls[y0:y1, x0:x1], self.horizon, cells=h * w)
+    iy0, iy1, ix0, ix1 = inner
+    self.risk[iy0:iy1, ix0:ix1] = window[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0]
@@ -0,0 +1,80 @@
+# Campos de flujo: Dijkstra inverso desde un conjunto de celdas destino con
+# el mismo costo de movimiento que FireFighterBehavior.get_move_cost. Una vez
+# construido, el siguiente paso hacia el destino más barato es una consulta
+# directa, compartida por todos los agentes que van al mismo destino.
+#
+# Con stop_at y/o max_cost la búsqueda se corta antes: al fijar todas las
+# celdas de stop_at o al pasar de max_cost. Las celdas con costo <= limit
+# (entre ellas las de stop_at) tienen costo y siguiente paso exactos; el resto
+# puede quedar en infinito o con una cota superior.
+
+import heapq
+import numpy as np
+
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+OPPOSITE = [2, 3, 0, 1]
+MOVE_COSTS = {0: 1, 1: 2, 2: 3, 3: 1, 4: 2}
+
+class FlowField:
+  def __init__(self, grid_data, targets, version=None, stop_at=None, max_cost=None):
+    height, width = grid_data.shape[:2]
+    walls = grid_data.tolist()
+    inf = float('inf')
+    cost = [[inf] * width for _ in range(height)]
+    next_x = [[-1] * width for _ in range(height)]
+    next_y = [[-1] * width for _ in range(height)]
+
+    heap = []
+    for x, y in targets:
+      if 0 <= x < width and 0 <= y < height:
+        cost[y][x] = 0
+        heap.append((0, y, x))
+    heapq.heapify(heap)
+
+    pending = None
+    if stop_at is not None:
+      pending = {(x, y) for x, y in stop_at if 0 <= x < width and 0 <= y < height}
+    if max_cost is None:
+      max_cost = inf
+
+    limit = inf
+    while heap:
+      distance, y, x = heapq.heappop(heap)
+      if distance > cost[y][x]:
+        continue
+      if distance > max_cost:
+        limit = max_cost
+        break
+      if pending is not None:
+        pending.discard((x, y))
+        if not pending:
+          limit = distance
+          break
+      for direction, (dx, dy) in enumerate(DIRECTIONS):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < width and 0 <= ny < height:
+          # Costo de ir del vecino a (x, y): la pared del vecino en dirección a (x, y)
+          step = MOVE_COSTS.get(walls[ny][nx][OPPOSITE[direction]], inf)
+          new_distance = distance + step
+          if new_distance < cost[ny][nx]:
+            cost[ny][nx] = new_distance
+            next_x[ny][nx] = x
+            next_y[ny][nx] = y
+            heapq.heappush(heap, (new_distance, ny, nx))
+
+    self.version = version
+    self.limit = limit
+    self.targets = list(targets)
+    self.cost = np.array(cost)
+    self.next_x = np.array(next_x, dtype=np.int32)
+    self.next_y = np.array(next_y, dtype=np.int32)
+
+  def next_step(self, pos):
+    x, y = pos
+    nx = self.next_x[y, x]
+    if nx < 0:
+      return None
+    return (int(nx), int(self.next_y[y, x]))
+
+  def distance(self, pos):
+    return self.cost[pos[1], pos[0]]
@@ -144,6 +144,9 @@ public class FireManager : MonoBehaviour
     private readonly List<GameObject> activePOIs = new List<GameObject>();
     private readonly List<GameObject> activeSmoke = new List<GameObject>();
 
+    // Último ETag recibido por URL; el servidor responde 304 si la vista no cambió
+    private readonly Dictionary<string, string> etags = new Dictionary<string, string>();
+
     void Start()
     {
         if (firePrefab == null)
@@ -186,6 +189,7 @@ public class FireManager : MonoBehaviour
         
         savedVictims = 0;
         deadVictims = 0;
+        etags.Clear();
         
         using (UnityWebRequest www = UnityWebRequest.PostWwwForm("http://192.168.0.110:3690/api/reset", ""))
         {
@@ -314,10 +318,16 @@ public class FireManager : MonoBehaviour
 IEnumerator GetPOIs()
 {
     Debug.Log("Iniciando GetPOIs");
-    using (UnityWebRequest www = UnityWebRequest.Get("http://192.168.0.110:3690/api/pois"))
+    string url = "http://192.168.0.110:3690/api/pois";
+    using (UnityWebRequest www = UnityWebRequest.Get(url))
     {
+        AddETag(www, url);
         yield return www.SendWebRequest();
-        if (www.result == UnityWebRequest.Result.Success)
+        if (NotModified(www, url))
+        {
+            Debug.Log("POIs sin cambios (304)");
+        }
+        else if (www.result == UnityWebRequest.Result.Success)
         {
             string json = www.downloadHandler.text;
             Debug.Log($"API POIs Response: {json}");
@@ -424,10 +434,16 @@ IEnumerator GetPOIs()
 
     IEnumerator GetSmoke()
     {
-        using (UnityWebRequest www = UnityWebRequest.Get("http://192.168.0.110:3690/api/smoke"))
+        string url = "http://192.168.0.110:3690/api/smoke";
+        using (UnityWebRequest www = UnityWebRequest.Get(url))
         {
+            AddETag(www, url);
             yield return www.SendWebRequest();
-            if (www.result == UnityWebRequest.Result.Success)
+            if (NotModified(www, url))
+            {
+                // El humo no cambió desde la última petición
+            }
+            else if (www.result == UnityWebRequest.Result.Success)
             {
                 string json = www.downloadHandler.text;
                 Debug.Log("Respuesta API Smoke: " + json);  // Debug para ver la respuesta
@@ -464,10 +480,16 @@ IEnumerator GetPOIs()
 
     private IEnumerator GetGameState()
     {
-        using (UnityWebRequest www = UnityWebRequest.Get("http://192.168.0.110:3690/api/gamestate"))
+        string url = "http://192.168.0.110:3690/api/gamestate";
+        using (UnityWebRequest www = UnityWebRequest.Get(url))
         {
+            AddETag(www, url);
             yield return www.SendWebRequest();
-            if (www.result == UnityWebRequest.Result.Success)
+            if (NotModified(www, url))
+            {
+                // El estado del juego no cambió desde la última petición
+            }
+            else if (www.result == UnityWebRequest.Result.Success)
             {
                 string json = www.downloadHandler.text;
                 GameStateResponse response = JsonUtility.FromJson<GameStateResponse>(json);
@@ -600,6 +622,29 @@ IEnumerator GetPOIs()
         }
     }
 
+    private void AddETag(UnityWebRequest www, string url)
+    {
+        if (etags.TryGetValue(url, out string etag))
+        {
+            www.SetRequestHeader("If-None-Match", etag);
+        }
+    }
+
+    // Devuelve true si el servidor respondió 304; si no, guarda el nuevo ETag
+    private bool NotModified(UnityWebRequest www, string url)
+    {
+        if (www.responseCode == 304)
+        {
+            return true;
+        }
+        string etag = www.GetResponseHeader("ETag");
+        if (!string.IsNullOrEmpty(etag))
+        {
+            etags[url] = etag;
+        }
+        return false;
+    }
+
     void ClearFires()
     {
         foreach (GameObject fire in activeFires)
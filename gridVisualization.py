@@ -0,0 +1,194 @@
+# Visualización del modelo con matplotlib. Se importa solo cuando se quiere
+# dibujar, para que el modelo y la API no carguen la pila de graficación.
+
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+import matplotlib.animation as animation
+import matplotlib.lines as lines
+
+import seaborn as sns
+
+from fireRescueCore import FireState, POIType, FireFighterRole
+
+_style_ready = False
+
+def setup_style():
+  global _style_ready
+  if _style_ready:
+    return
+  sns.set()
+  plt.rcParams['animation.html'] = 'jshtml'
+  plt.rcParams['figure.figsize'] = (5, 5)
+  _style_ready = True
+
+def get_wall_visual_style(wall_type):
+  if wall_type == 0:
+    return None, 0, '-'
+  elif wall_type == 1:
+    return 'black', 2, '-'
+  elif wall_type == 2:
+    return 'black', 4, '-'
+  elif wall_type == 3:
+    return 'green', 4, '--'
+  elif wall_type == 4:
+    return 'red', 4, '-'
+
+def draw_grid(ax, model):
+  rows = model.height
+  cols = model.width
+  ax.clear()
+  ax.set_xlim(0, cols)
+  ax.set_ylim(0, rows)
+  ax.set_aspect('equal', adjustable='box')
+  ax.invert_yaxis()
+
+  border_color = 'lightblue'
+  border_width = 6
+  ax.add_line(lines.Line2D([0, cols], [0, 0], color=border_color, linewidth=border_width))         # Superior
+  ax.add_line(lines.Line2D([0, cols], [rows, rows], color=border_color, linewidth=border_width))   # Inferior
+  ax.add_line(lines.Line2D([0, 0], [0, rows], color=border_color, linewidth=border_width))         # Izquierdo
+  ax.add_line(lines.Line2D([cols, cols], [0, rows], color=border_color, linewidth=border_width))   # Derecho
+
+  for exit_x, exit_y in model.exits:
+    if 0 <= exit_x < cols and 0 <= exit_y < rows:
+      exit_rect = patches.Rectangle(
+        (exit_x, exit_y), 1, 1,
+        facecolor='lightpink',
+        edgecolor='black',
+        linewidth=0.5,
+        alpha=0.8,
+        zorder = 1
+      )
+      ax.add_patch(exit_rect)
+
+  for y in range(rows):
+    for x in range(cols):
+      fire_state = model._get_fire_state(x, y)
+
+      if fire_state == FireState.CLEAR:
+        face_color = 'lightgray'
+        alpha = 0.7
+      elif fire_state == FireState.SMOKE:
+        face_color = 'darkgray'
+        alpha = 0.8
+      elif fire_state == FireState.FIRE:
+        face_color = 'orange'
+        alpha = 0.9
+
+      rect = patches.Rectangle(
+        (x, y), 1, 1,
+        facecolor=face_color,
+        edgecolor='black',
+        linewidth=0.5,
+        alpha=alpha,
+        zorder = 2
+      )
+      ax.add_patch(rect)
+
+      walls = model.grid_data[y][x]
+
+      wall_positions = [([x, x + 1], [y, y]),        # Arriba
+                ([x + 1, x + 1], [y, y + 1]), # Derecha
+                ([x, x + 1], [y + 1, y + 1]), # Abajo
+                ([x, x], [y, y + 1])]         # Izquierda
+
+      for i, wall_type in enumerate(walls):
+        color, linewidth, linestyle = get_wall_visual_style(wall_type)
+        if color is not None:
+          x_coords, y_coords = wall_positions[i]
+
+          if linestyle == '--':
+            line = lines.Line2D(
+              x_coords, y_coords,
+              color=color,
+              linewidth=linewidth,
+              linestyle=linestyle,
+              dashes=[2,2],
+              zorder = 5
+            )
+          else:
+            line = lines.Line2D(
+              x_coords, y_coords,
+              color=color,
+              linewidth=linewidth,
+              linestyle=linestyle,
+              zorder = 5
+            )
+          ax.add_line(line)
+
+  ax.set_xticks(range(cols + 1))
+  ax.set_yticks(range(rows + 1))
+  ax.grid(True, alpha=0.2, color='blue')
+
+  for agent in model.agent_list:
+    if agent.carrying_victim:
+      agent_color = 'lightblue'
+    elif agent.role == FireFighterRole.RESCUER:
+      agent_color = 'purple'
+    elif agent.role == FireFighterRole.EXTINGUISHER:
+      agent_color = 'red'
+    else:
+      agent_color = 'gray'
+
+    if agent.is_knocked_out():
+      agent_alpha = 0.2
+    else:
+      agent_alpha = 0.9
+
+    ax.scatter(agent.pos[0] + 0.5, agent.pos[1] + 0.5,
+          color=agent_color,
+          s=400,
+          marker='^',
+          edgecolors='black',
+          linewidth=2,
+          alpha=agent_alpha,
+          zorder=8)
+
+    ax.text(agent.pos[0] + 0.5, agent.pos[1] + 0.5, str(agent.unique_id),
+        ha='center', va='center',
+        color='white', fontweight='bold', fontsize=10, zorder=9)
+
+  for poi in model.active_pois:
+    if poi.type == POIType.VICTIM:
+      if poi.revealed:
+        color = 'gold'
+        alpha = 1.0
+      else:
+        color = 'yellow'
+        alpha = 0.9
+      marker = 'o'
+      size = 300
+    else:
+      color = 'purple'
+      marker = 's'
+      size = 250
+      alpha = 0.9
+
+    ax.scatter(poi.x + 0.5, poi.y + 0.5,
+          color=color,
+          s=size,
+          marker=marker,
+          edgecolors='black',
+          linewidth=2,
+          alpha=alpha,
+          zorder=10)  # Encima de todo
+
+    # Agregar número del POI
+    ax.text(poi.x + 0.5, poi.y + 0.5, str(poi.id),
+        ha='center', va='center',
+        color='black', fontweight='bold', fontsize=8,
+        zorder=11)  # Encima del círculo
+
+def animate_model(model, frames=100, interval=1000):
+  setup_style()
+  fig, ax = plt.subplots(figsize=(model.width, model.height))
+  draw_grid(ax, model)
+
+  def animate(i):
+    model.step()
+    draw_grid(ax, model)
+    return []
+
+  anim = animation.FuncAnimation(fig, animate, frames=frames, interval=interval)
+  plt.show()
+  return anim
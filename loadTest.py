@@ -0,0 +1,212 @@
+# Generador de carga para testApi.py: N clientes concurrentes repiten la misma
+# mezcla de peticiones que gameManager.cs:
+#   reset -> gamestate, pois, smoke -> gamestate, pois, smoke
+#   ciclo: step -> check_poi_in_fire por cada fuego (+ pois si destruyó uno)
+#          -> gamestate -> smoke -> reveal_poi por cada agente sobre un POI
+#          (+ pois si se reveló) -> espera
+# Como Unity, pois/smoke/gamestate se piden con If-None-Match; un 304 cuenta
+# como respuesta correcta.
+#
+#   python loadTest.py --clients 30 --steps 50               (servidor propio)
+#   python loadTest.py --url http://192.168.0.110:3690 --clients 30 --think 1
+
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+# Mismo tablero que gameManager.cs (totalCols)
+TOTAL_COLS = 8
+
+
+def unity_to_python(row, col):
+    # Igual que gameManager.UnityToPythonCoords: el cliente espeja las columnas
+    return TOTAL_COLS - 1 - col, row
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+class GameClient:
+    # Un visor de Unity: conexión propia, ETags propios y el mismo orden de peticiones
+    def __init__(self, host, port, stats, think=0.0):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.stats = stats
+        self.think = think
+        self.etags = {}
+        self.pois = []
+
+    def request(self, method, path, params=None, endpoint=None, cached=False):
+        endpoint = endpoint or path
+        headers = {}
+        body = None
+        if method == "POST":
+            body = urlencode(params or {})
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif params:
+            path = f"{path}?{urlencode(params)}"
+        if cached and endpoint in self.etags:
+            headers["If-None-Match"] = self.etags[endpoint]
+
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.stats.record(endpoint, time.perf_counter() - start, False)
+            return None
+        elapsed = time.perf_counter() - start
+
+        payload = None
+        ok = status < 400
+        if ok and status != 304:
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                ok = False
+        self.stats.record(endpoint, elapsed, ok)
+
+        if payload is not None and cached and response.getheader("ETag"):
+            self.etags[endpoint] = response.getheader("ETag")
+        return payload
+
+    def get_pois(self):
+        payload = self.request("GET", "/api/pois", cached=True)
+        if payload is not None:
+            self.pois = payload.get("pois", [])
+
+    def refresh(self):
+        self.request("GET", "/api/gamestate", cached=True)
+        self.get_pois()
+        self.request("GET", "/api/smoke", cached=True)
+
+    def reset(self):
+        self.etags.clear()
+        if self.request("POST", "/api/reset") is not None:
+            self.refresh()
+        self.request("GET", "/api/gamestate", cached=True)
+
+    def step(self):
+        payload = self.request("POST", "/api/step")
+        if payload is None:
+            return
+
+        for fire in payload.get("fires", []):
+            x, y = unity_to_python(fire["row"], fire["col"])
+            result = self.request("GET", "/api/check_poi_in_fire", {"x": x, "y": y})
+            if result and result.get("success") and not result.get("wasRevealed"):
+                self.get_pois()
+
+        self.request("GET", "/api/gamestate", cached=True)
+        self.request("GET", "/api/smoke", cached=True)
+
+        # Colisiones: el agente se dibuja en (row=y, col=x) y el POI que toca se
+        # revela con las coordenadas convertidas por el cliente
+        hidden = {(poi["x"], poi["y"]) for poi in self.pois if not poi["revealed"]}
+        for agent in payload.get("agents", []):
+            if (agent["x"], agent["y"]) in hidden:
+                x, y = unity_to_python(agent["y"], agent["x"])
+                result = self.request("POST", "/api/reveal_poi", {"x": x, "y": y})
+                if result and result.get("success"):
+                    self.get_pois()
+
+    def run(self, steps, deadline):
+        self.reset()
+        for _ in range(steps):
+            if time.perf_counter() >= deadline:
+                break
+            self.step()
+            if self.think:
+                time.sleep(self.think)
+        self.conn.close()
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(url, clients=10, steps=50, duration=None, think=0.0):
+    parts = urlsplit(url)
+    stats = Stats()
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    workers = [GameClient(parts.hostname, parts.port or 80, stats, think) for _ in range(clients)]
+    threads = [threading.Thread(target=client.run, args=(steps, deadline), daemon=True) for client in workers]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - start
+
+
+def print_report(stats, elapsed, clients):
+    total = sum(len(values) for values in stats.latencies.values())
+    total_errors = sum(stats.errors.values())
+    print(f"\n{'='*78}")
+    print(f"CARGA: {clients} clientes, {total} peticiones en {elapsed:.1f} s "
+          f"({total / elapsed:.1f} req/s), errores {total_errors} ({total_errors / max(total, 1):.2%})")
+    print(f"{'='*78}")
+    print(f"{'endpoint':<26}{'req':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'error %':>9}")
+    for endpoint in sorted(stats.latencies):
+        values = sorted(stats.latencies[endpoint])
+        errors = stats.errors.get(endpoint, 0)
+        print(f"{endpoint:<26}{len(values):>7}{len(values) / elapsed:>9.1f}"
+              f"{percentile(values, 50) * 1000:>9.2f}{percentile(values, 95) * 1000:>9.2f}"
+              f"{percentile(values, 99) * 1000:>9.2f}{errors / len(values):>9.2%}")
+
+
+@contextlib.contextmanager
+def local_server():
+    # testApi en un hilo con el servidor de werkzeug (un hilo por petición,
+    # como app.run), sin prints ni log de accesos
+    from werkzeug.serving import make_server
+    import testApi
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, testApi.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}"
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga con la mezcla de peticiones de gameManager.cs")
+    parser.add_argument("--url", help="servidor ya levantado; sin --url se levanta testApi localmente")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=50, help="pasos por cliente")
+    parser.add_argument("--duration", type=float, default=None, help="tope en segundos")
+    parser.add_argument("--think", type=float, default=0.0, help="espera entre pasos (Unity usa 1 s)")
+    args = parser.parse_args()
+
+    if args.url:
+        stats, elapsed = run_load(args.url, args.clients, args.steps, args.duration, args.think)
+    else:
+        with local_server() as url:
+            stats, elapsed = run_load(url, args.clients, args.steps, args.duration, args.think)
+    print_report(stats, elapsed, args.clients)
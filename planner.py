@@ -0,0 +1,343 @@
+# Planificador de turno: busca la mejor secuencia de acciones de un bombero
+# dentro de sus puntos de acción (moverse, cortar pared, abrir puerta, apagar
+# fuego/humo, revelar POI). Durante el turno de un agente el fuego no cambia,
+# así que la búsqueda trabaja sobre una copia local de lo que el turno puede
+# modificar (posición, AP, paredes, fuego, POIs revelados) con make/unmake.
+#
+# Cada estado tiene un hash de Zobrist que se actualiza con xor en cada acción;
+# la tabla de transposición guarda el mejor valor alcanzable desde un estado,
+# así que órdenes distintos que llegan al mismo estado (abrir y luego apagar o
+# al revés) se evalúan una sola vez. La profundización iterativa deja siempre
+# un plan completo aunque se acabe el tiempo del turno. El plazo es uno por
+# turno (PlannerPolicy lo fija antes del primer plan y lo comparte entre
+# replanes). El campo de distancia a la meta solo se calcula hasta fijar las
+# celdas que el bombero alcanza con sus AP (la evaluación no mira más lejos) y
+# se guarda mientras no cambien las paredes ni el fuego: un replan del mismo
+# turno siempre cae dentro de la zona ya calculada.
+
+import random
+import time
+
+from fireRescueCore import FireState, POIType, FireFighterRole
+from flowField import FlowField
+
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+PASSABLE = (0, 3)
+
+MOVE = "move"
+CHOP = "chop"
+OPEN = "open"
+EXTINGUISH = "extinguish"
+REVEAL = "reveal"
+
+# Pesos de la evaluación
+DELIVER_SCORE = 1000
+CARRY_SCORE = 400
+REVEAL_SCORE = 60
+FIRE_UNIT_SCORE = 40
+NEAR_POI_FACTOR = 2
+DAMAGE_PENALTY = 30
+KNOCKOUT_PENALTY = 500
+EXIT_STEP_PENALTY = 12
+TARGET_STEP_PENALTY = 8
+MAX_GOAL_DISTANCE = 50  # la evaluación no distingue distancias mayores
+
+
+class _Timeout(Exception):
+  pass
+
+
+class ZobristKeys:
+  # Llaves aleatorias de 64 bits por (celda), (celda, dirección, pared),
+  # (celda, estado de fuego), AP, carga y POI revelado. Semilla fija para no
+  # consumir números de los generadores del juego.
+  _cache = {}
+
+  def __init__(self, width, height, max_ap=8, max_pois=64):
+    rng = random.Random(0x5EED)
+    cells = width * height
+    self.pos = [rng.getrandbits(64) for _ in range(cells)]
+    self.wall = [[[rng.getrandbits(64) for _ in range(5)] for _ in range(4)] for _ in range(cells)]
+    self.fire = [[rng.getrandbits(64) for _ in range(3)] for _ in range(cells)]
+    self.ap = [rng.getrandbits(64) for _ in range(max_ap + 1)]
+    self.carrying = rng.getrandbits(64)
+    self.delivered = [rng.getrandbits(64) for _ in range(8)]
+    self.revealed = [rng.getrandbits(64) for _ in range(max_pois + 1)]
+
+  @classmethod
+  def for_board(cls, width, height):
+    keys = cls._cache.get((width, height))
+    if keys is None:
+      keys = cls._cache[(width, height)] = cls(width, height)
+    return keys
+
+
+class TurnPlanner:
+  def __init__(self, time_budget=0.01, max_depth=8):
+    self.time_budget = time_budget
+    self.max_depth = max_depth
+    self.nodes = 0
+    self._fields = {}
+
+  def plan(self, agent, deadline=None):
+    # Devuelve la lista de acciones del mejor plan encontrado. deadline es el
+    # plazo del turno completo (time.perf_counter()); sin él, time_budget desde ahora
+    if deadline is None:
+      deadline = time.perf_counter() + self.time_budget
+    self._setup(agent)
+    best_plan = []
+    try:
+      # Cada acción cuesta al menos 1 AP: nunca hay más acciones que AP. La
+      # profundidad 1 (a lo sumo una acción por vecino) siempre se completa
+      for depth in range(1, min(self.max_depth, self.ap) + 1):
+        self.deadline = deadline if depth > 1 else float('inf')
+        value, plan = self._search(depth)
+        best_plan = list(plan)
+    except _Timeout:
+      pass
+    return best_plan
+
+  def _goal_field(self, key, targets):
+    # Campo de distancias por meta; la llave incluye las versiones de las que
+    # depende. Sirve si la zona alcanzable ahora (rombo de radio ap) está
+    # dentro de la zona con la que se calculó.
+    cached = self._fields.get(key)
+    if cached is not None:
+      field, cx, cy, radius = cached
+      if abs(self.x - cx) + abs(self.y - cy) + self.ap <= radius:
+        return field
+    if len(self._fields) >= 32:
+      self._fields.clear()
+    reach = [(self.x + dx, self.y + dy)
+             for dy in range(-self.ap, self.ap + 1)
+             for dx in range(-(self.ap - abs(dy)), self.ap - abs(dy) + 1)]
+    field = FlowField(self.model.grid_data, targets, stop_at=reach, max_cost=MAX_GOAL_DISTANCE)
+    self._fields[key] = (field, self.x, self.y, self.ap)
+    return field
+
+  def _setup(self, agent):
+    model = agent.model
+    self.model = model
+    self.width = model.width
+    self.keys = ZobristKeys.for_board(model.width, model.height)
+    self.table = {}
+    self.nodes = 0
+
+    self.x, self.y = agent.pos
+    self.ap = agent.action_points
+    self.carrying = bool(agent.carrying_victim)
+    self.delivered = 0
+    self.walls = {}
+    self.fires = {}
+    self.revealed = {}
+    self.damage = 0
+    self.hash = self.keys.pos[self.y * self.width + self.x] ^ self.keys.ap[min(self.ap, 8)]
+    if self.carrying:
+      self.hash ^= self.keys.carrying
+
+    self.exits = set(model.exits)
+    self.hidden = {(poi.x, poi.y): poi for poi in model.active_pois if not poi.revealed}
+    self.poi_cells = {(poi.x, poi.y) for poi in model.active_pois}
+
+    # Distancias a la meta del rol: salida si carga, su POI si es rescatista,
+    # el fuego o humo más cercano si no
+    self.exit_field = model.exit_flow_field()
+    target = agent.target_poi
+    if agent.role == FireFighterRole.RESCUER and target is not None and not target.revealed:
+      key = (model.game_token, model.walls_version, "poi", target.x, target.y)
+      self.goal_field = self._goal_field(key, [(target.x, target.y)])
+    elif model.fire_cells or model.smoke_cells:
+      versions = model.state_versions
+      key = (model.game_token, model.walls_version, "fire", versions["fires"], versions["smoke"])
+      self.goal_field = self._goal_field(key, list(model.fire_cells) + list(model.smoke_cells))
+    else:
+      self.goal_field = None
+
+  # --- estado local ---
+
+  def _wall(self, x, y, direction):
+    return self.walls.get((x, y, direction), self.model.grid_data[y, x, direction])
+
+  def _fire(self, x, y):
+    state = self.fires.get((x, y))
+    if state is None:
+      return self.model.fire_states[y, x].value
+    return state
+
+  def _set_wall(self, x, y, direction, new):
+    old = self._wall(x, y, direction)
+    cell = y * self.width + x
+    self.hash ^= self.keys.wall[cell][direction][old] ^ self.keys.wall[cell][direction][new]
+    had = (x, y, direction) in self.walls
+    self.walls[(x, y, direction)] = new
+    return old, had
+
+  def _set_fire(self, x, y, new):
+    old = self._fire(x, y)
+    cell = y * self.width + x
+    self.hash ^= self.keys.fire[cell][old] ^ self.keys.fire[cell][new]
+    self.fires[(x, y)] = new
+    return old
+
+  def _set_ap(self, new):
+    self.hash ^= self.keys.ap[min(self.ap, 8)] ^ self.keys.ap[min(new, 8)]
+    self.ap = new
+
+  def _move_to(self, x, y):
+    self.hash ^= self.keys.pos[self.y * self.width + self.x] ^ self.keys.pos[y * self.width + x]
+    self.x, self.y = x, y
+
+  def _set_carrying(self, carrying):
+    if carrying != self.carrying:
+      self.hash ^= self.keys.carrying
+      self.carrying = carrying
+
+  def _set_delivered(self, delivered):
+    self.hash ^= self.keys.delivered[min(self.delivered, 7)] ^ self.keys.delivered[min(delivered, 7)]
+    self.delivered = delivered
+
+  # --- acciones ---
+
+  def _actions(self):
+    if self.ap < 1:
+      return []
+    x, y = self.x, self.y
+    actions = []
+
+    state = self._fire(x, y)
+    if state != FireState.CLEAR.value:
+      actions.append((EXTINGUISH, x, y))
+    if (x, y) in self.hidden and (x, y) not in self.revealed:
+      actions.append((REVEAL, x, y))
+
+    for direction, (dx, dy) in enumerate(DIRECTIONS):
+      nx, ny = x + dx, y + dy
+      if not (0 <= nx < self.model.width and 0 <= ny < self.model.height):
+        continue
+      wall = self._wall(x, y, direction)
+      if wall in PASSABLE:
+        if self.model.is_cell_empty((nx, ny)):
+          actions.append((MOVE, direction))
+        if self._fire(nx, ny) != FireState.CLEAR.value:
+          actions.append((EXTINGUISH, nx, ny))
+      elif wall in (1, 2):
+        actions.append((CHOP, direction))
+      elif wall == 4:
+        actions.append((OPEN, direction))
+    return actions
+
+  def _apply(self, action):
+    # Devuelve la información para deshacer la acción
+    kind = action[0]
+    ap = self.ap
+    if kind == MOVE:
+      dx, dy = DIRECTIONS[action[1]]
+      prev = (self.x, self.y, self.carrying, self.delivered)
+      self._move_to(self.x + dx, self.y + dy)
+      self._set_ap(ap - 1)
+      if self.carrying and (self.x, self.y) in self.exits:
+        self._set_carrying(False)
+        self._set_delivered(self.delivered + 1)
+      return (kind, ap, prev)
+    if kind == CHOP:
+      old = self._set_wall(self.x, self.y, action[1], self._wall(self.x, self.y, action[1]) - 1)
+      self.damage += 1
+      self._set_ap(ap - 1)
+      return (kind, ap, (self.x, self.y, action[1]) + old)
+    if kind == OPEN:
+      old = self._set_wall(self.x, self.y, action[1], 3)
+      self._set_ap(ap - 1)
+      return (kind, ap, (self.x, self.y, action[1]) + old)
+    if kind == EXTINGUISH:
+      _, fx, fy = action
+      state = self._fire(fx, fy)
+      if state == FireState.FIRE.value and ap >= 2:
+        new, cost = FireState.CLEAR.value, 2
+      else:
+        new, cost = state - 1, 1
+      had = (fx, fy) in self.fires
+      old = self._set_fire(fx, fy, new)
+      self._set_ap(ap - cost)
+      return (kind, ap, (fx, fy, old, had))
+    # REVEAL
+    _, px, py = action
+    poi = self.hidden[(px, py)]
+    self.revealed[(px, py)] = poi
+    self.hash ^= self.keys.revealed[min(poi.id, len(self.keys.revealed) - 1)]
+    prev_carrying = self.carrying
+    if poi.type == POIType.VICTIM and not self.carrying:
+      self._set_carrying(True)
+    self._set_ap(ap - 1)
+    return (kind, ap, (px, py, poi, prev_carrying))
+
+  def _undo(self, undo):
+    kind, ap, data = undo
+    if kind == MOVE:
+      x, y, carrying, delivered = data
+      self._set_delivered(delivered)
+      self._set_carrying(carrying)
+      self._move_to(x, y)
+    elif kind in (CHOP, OPEN):
+      x, y, direction, old, had = data
+      self._set_wall(x, y, direction, old)
+      if not had:
+        del self.walls[(x, y, direction)]
+      if kind == CHOP:
+        self.damage -= 1
+    elif kind == EXTINGUISH:
+      fx, fy, old, had = data
+      self._set_fire(fx, fy, old)
+      if not had:
+        del self.fires[(fx, fy)]
+    else:
+      px, py, poi, carrying = data
+      self._set_carrying(carrying)
+      del self.revealed[(px, py)]
+      self.hash ^= self.keys.revealed[min(poi.id, len(self.keys.revealed) - 1)]
+    self._set_ap(ap)
+
+  # --- búsqueda ---
+
+  def _evaluate(self):
+    score = DELIVER_SCORE * self.delivered - DAMAGE_PENALTY * self.damage
+    pos = (self.x, self.y)
+
+    if self.carrying:
+      distance = self.exit_field.distance(pos)
+      score += CARRY_SCORE - EXIT_STEP_PENALTY * min(distance, MAX_GOAL_DISTANCE)
+    elif self.goal_field is not None:
+      score -= TARGET_STEP_PENALTY * min(self.goal_field.distance(pos), MAX_GOAL_DISTANCE)
+
+    score += REVEAL_SCORE * len(self.revealed)
+
+    for (fx, fy), state in self.fires.items():
+      units = self.model.fire_states[fy, fx].value - state
+      near_poi = any(abs(fx - px) + abs(fy - py) <= 1 for px, py in self.poi_cells)
+      score += FIRE_UNIT_SCORE * units * (NEAR_POI_FACTOR if near_poi else 1)
+
+    if self._fire(self.x, self.y) == FireState.FIRE.value:
+      score -= KNOCKOUT_PENALTY
+    return score
+
+  def _search(self, depth):
+    self.nodes += 1
+    if time.perf_counter() > self.deadline:
+      raise _Timeout()
+
+    entry = self.table.get(self.hash)
+    if entry is not None and entry[0] >= depth:
+      return entry[1], entry[2]
+
+    best_value = self._evaluate()
+    best_plan = ()
+    if depth > 0:
+      for action in self._actions():
+        undo = self._apply(action)
+        value, plan = self._search(depth - 1)
+        self._undo(undo)
+        if value > best_value:
+          best_value = value
+          best_plan = (action,) + plan
+
+    self.table[self.hash] = (depth, best_value, best_plan)
+    return best_value, best_plan
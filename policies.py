@@ -0,0 +1,247 @@
+# Políticas de decisión de los bomberos. Una política decide los roles
+# (assign_roles) y qué hace cada bombero en su turno según su rol
+# (rescuer_behavior / extinguisher_behavior). Se elige al crear el modelo:
+#   create_model(policy=POLICIES["estrategia"]())
+# Policy (en fireRescueCore) es la política original y la base de las demás.
+
+import time
+
+from fireRescueCore import FireState, POIType, FireFighterRole, Policy
+from planner import TurnPlanner, MOVE, CHOP, OPEN, EXTINGUISH, REVEAL
+
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # arriba, derecha, abajo, izquierda
+
+class GreedyPolicy(Policy):
+  # La del modelo original, con nombre propio para el torneo
+  name = "greedy"
+
+class StrategyPolicy(Policy):
+  # Variante de fireRescueEstrategia.ipynb: un POI sin revelar por rescatista,
+  # apagar el fuego de la celda propia antes de seguir y entregar la víctima
+  # en la salida (cuenta para la victoria).
+  name = "estrategia"
+  max_rescuers = 3
+
+  def assign_roles(self, model):
+    model.strategy_assign_roles(self.max_rescuers)
+
+  def rescuer_behavior(self, agent):
+    model = agent.model
+    if agent.carrying_victim:
+      if self.deliver_victim(agent):
+        return
+      if model._get_fire_state(agent.pos[0], agent.pos[1]) == FireState.FIRE:
+        agent.extinguish_fire(agent.pos[0], agent.pos[1])
+        return
+      while agent.action_points > 0 and agent.move_towards_exit():
+        if self.deliver_victim(agent):
+          return
+
+    elif agent.target_poi:
+      target = (agent.target_poi.x, agent.target_poi.y)
+      if agent.pos == target:
+        self.reveal_target(agent)
+        return
+      if model._get_fire_state(agent.pos[0], agent.pos[1]) == FireState.FIRE:
+        agent.extinguish_fire(agent.pos[0], agent.pos[1])
+        return
+      self.move_with_fire_handling(agent, target)
+
+    else:
+      nearby_fire = agent.find_nearest_fire()
+      if nearby_fire and agent.action_points > 0:
+        if agent.pos == nearby_fire:
+          agent.extinguish_fire(nearby_fire[0], nearby_fire[1])
+        else:
+          agent.move_towards_target(nearby_fire)
+
+  def deliver_victim(self, agent):
+    if agent.pos not in agent.model.exits:
+      return False
+    victim = agent.carrying_victim
+    agent.carrying_victim = None
+    agent.model.rescue_victims(victim)
+    return True
+
+  def reveal_target(self, agent):
+    self.reveal(agent, agent.target_poi)
+
+  def reveal(self, agent, poi):
+    # Al levantar a la víctima sale del tablero: el fuego ya no la alcanza y
+    # rescue_victims repone el POI al entregarla
+    model = agent.model
+    if agent.action_points <= 0:
+      return
+    model.reveal_poi(poi.x, poi.y)
+    if poi.type == POIType.VICTIM and poi not in model.lost_victims and not agent.carrying_victim:
+      agent.carrying_victim = poi
+      if poi in model.active_pois:
+        model.active_pois.remove(poi)
+        model.touch("pois")
+    if agent.target_poi is poi:
+      agent.target_poi = None
+    agent.action_points -= 1
+
+  def move_with_fire_handling(self, agent, target):
+    model = agent.model
+    while agent.action_points > 0 and agent.pos != target:
+      if model._get_fire_state(agent.pos[0], agent.pos[1]) != FireState.CLEAR:
+        agent.extinguish_fire(agent.pos[0], agent.pos[1])
+        return
+      if not agent.move_towards_target(target):
+        break
+      if model._get_fire_state(agent.pos[0], agent.pos[1]) == FireState.FIRE:
+        agent.extinguish_fire(agent.pos[0], agent.pos[1])
+        return
+
+class PlannerPolicy(StrategyPolicy):
+  # Roles como "estrategia"; el turno de cada bombero lo decide TurnPlanner
+  # buscando la mejor secuencia de acciones dentro de sus AP. Si una acción
+  # cambia los POIs (revelar, entregar) se vuelve a planear con los AP que quedan.
+  name = "planner"
+  max_replans = 4
+  # Qué tan lejos busca depende de time_budget y de la velocidad de la máquina
+  reproducible = False
+
+  def __init__(self, time_budget=0.01):
+    self.planner = TurnPlanner(time_budget)
+
+  def rescuer_behavior(self, agent):
+    self.play_turn(agent)
+
+  def extinguisher_behavior(self, agent):
+    self.play_turn(agent)
+
+  def play_turn(self, agent):
+    # Un solo plazo para todo el turno, replanes incluidos
+    model = agent.model
+    deadline = time.perf_counter() + self.planner.time_budget
+    for _ in range(self.max_replans):
+      plan = self.planner.plan(agent, deadline)
+      if not plan:
+        return
+      for action in plan:
+        before = (agent.carrying_victim, len(model.active_pois))
+        if not self.execute(agent, action):
+          return
+        if (agent.carrying_victim, len(model.active_pois)) != before:
+          break
+      else:
+        return
+
+  def execute(self, agent, action):
+    model = agent.model
+    kind = action[0]
+    x, y = agent.pos
+    if agent.action_points < 1:
+      return False
+
+    if kind == MOVE:
+      dx, dy = DIRECTIONS[action[1]]
+      target = (x + dx, y + dy)
+      if not model.is_cell_empty(target):
+        return False
+      model.move_agent(agent, target)
+      agent.action_points -= 1
+      if agent.carrying_victim:
+        self.deliver_victim(agent)
+    elif kind == CHOP:
+      agent.chop_wall(x, y, action[1])
+    elif kind == OPEN:
+      agent.open_door(x, y, action[1])
+    elif kind == EXTINGUISH:
+      agent.extinguish_fire(action[1], action[2])
+    elif kind == REVEAL:
+      poi = next((p for p in model.active_pois if p.x == x and p.y == y and not p.revealed), None)
+      if poi is None:
+        return False
+      self.reveal(agent, poi)
+    return True
+
+class RandomWalkPolicy(Policy):
+  # Variante de fireRescueRandom.ipynb: sin roles, cada bombero atiende su
+  # celda (entregar, revelar, apagar) y se mueve a una vecina al azar.
+  # Usa model.policy_random para no tocar la secuencia de fuego y POIs.
+  name = "random"
+
+  def assign_roles(self, model):
+    for agent in model.agent_list:
+      agent.role = FireFighterRole.EXTINGUISHER
+      agent.target_poi = None
+    model.touch("agents")
+
+  def rescuer_behavior(self, agent):
+    self.random_walk(agent)
+
+  def extinguisher_behavior(self, agent):
+    self.random_walk(agent)
+
+  def random_walk(self, agent):
+    while agent.action_points > 0:
+      self.handle_current_cell(agent)
+      if agent.action_points <= 0:
+        break
+      if not self.random_move(agent):
+        self.handle_current_cell(agent)
+        break
+
+  def handle_current_cell(self, agent):
+    model = agent.model
+    x, y = agent.pos
+
+    if agent.carrying_victim and (x, y) in model.exits:
+      victim = agent.carrying_victim
+      agent.carrying_victim = None
+      model.rescue_victims(victim)
+      agent.action_points -= 1
+      return
+
+    for poi in model.active_pois:
+      if poi.x == x and poi.y == y and not poi.revealed:
+        model.reveal_poi(x, y)
+        if poi.type == POIType.VICTIM and not agent.carrying_victim:
+          agent.carrying_victim = poi
+          model.active_pois.remove(poi)
+          model.touch("pois")
+        agent.action_points -= 1
+        return
+
+    if model._get_fire_state(x, y) != FireState.CLEAR:
+      agent.extinguish_fire(x, y)
+
+  def random_move(self, agent):
+    model = agent.model
+    directions = DIRECTIONS[:]
+    model.policy_random.shuffle(directions)
+
+    for dx, dy in directions:
+      new_pos = (agent.pos[0] + dx, agent.pos[1] + dy)
+      if not (0 <= new_pos[0] < model.width and 0 <= new_pos[1] < model.height):
+        continue
+      if not model.is_cell_empty(new_pos):
+        continue
+
+      wall_type, wall_dir = model._get_wall_between_cells(agent.pos[0], agent.pos[1], new_pos[0], new_pos[1])
+      if wall_type == 4:
+        cost = 2
+      elif wall_type in (0, 3):
+        cost = 1
+      else:
+        continue
+
+      if agent.action_points >= cost:
+        if wall_type == 4:
+          agent.open_door(agent.pos[0], agent.pos[1], wall_dir)
+        model.move_agent(agent, new_pos)
+        agent.action_points -= 1
+        return True
+
+    return False
+
+
+POLICIES = {
+  GreedyPolicy.name: GreedyPolicy,
+  StrategyPolicy.name: StrategyPolicy,
+  PlannerPolicy.name: PlannerPolicy,
+  RandomWalkPolicy.name: RandomWalkPolicy,
+}
@@ -0,0 +1,159 @@
+# Almacén de resultados de partidas en SQLite, direccionado por contenido.
+# La llave de una partida es el hash de (layout, configuración, política,
+# semilla, MODEL_VERSION): la misma combinación siempre da la misma llave, así
+# que un lote, barrido o torneo que se vuelve a correr solo juega las partidas
+# que todavía no están guardadas. Cambiar el layout, la configuración o subir
+# MODEL_VERSION genera llaves nuevas y los resultados viejos simplemente no se usan.
+#
+#   games         una fila por partida: llave, metadatos y resultados (OUTCOMES)
+#   step_metrics  opcional: fuego, humo, daño y víctimas al final de cada ronda
+#
+#   python resultStore.py --db results.sqlite            (resumen por política)
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from fireRescueCore import EXITS, MODEL_VERSION
+
+DEFAULT_PATH = "results.sqlite"
+
+# stalled: terminada por estancamiento; timeout: llegó a max_steps sin terminar
+OUTCOMES = ("won", "rescued", "lost_victims", "damage", "steps", "stalled", "timeout")
+STEP_METRICS = ("fires", "smoke", "damage", "rescued", "lost_victims")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS games (
+  key TEXT PRIMARY KEY,
+  layout TEXT NOT NULL,
+  config TEXT NOT NULL,
+  policy TEXT NOT NULL,
+  seed INTEGER NOT NULL,
+  model_version INTEGER NOT NULL,
+  {", ".join(f"{name} INTEGER NOT NULL" for name in OUTCOMES)},
+  created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_run ON games (model_version, layout, config, policy, seed);
+CREATE TABLE IF NOT EXISTS step_metrics (
+  key TEXT NOT NULL REFERENCES games (key) ON DELETE CASCADE,
+  round INTEGER NOT NULL,
+  {", ".join(f"{name} INTEGER NOT NULL" for name in STEP_METRICS)},
+  PRIMARY KEY (key, round)
+) WITHOUT ROWID;
+"""
+
+
+def layout_key(grid_data, exits=EXITS):
+  digest = hashlib.sha256(repr(np.shape(grid_data)).encode())
+  digest.update(np.asarray(grid_data, dtype=np.int8).tobytes())
+  digest.update(repr(sorted(map(tuple, exits))).encode())
+  return digest.hexdigest()[:16]
+
+
+def config_key(config):
+  return json.dumps(config, sort_keys=True, separators=(",", ":"))
+
+
+def game_key(layout, config, policy, seed, model_version=MODEL_VERSION):
+  payload = json.dumps([layout, config_key(config), policy, seed, model_version], separators=(",", ":"))
+  return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultStore:
+  def __init__(self, path=DEFAULT_PATH):
+    self.path = path
+    self.db = sqlite3.connect(path)
+    self.db.execute("PRAGMA journal_mode=WAL")
+    self.db.execute("PRAGMA foreign_keys=ON")
+    self.db.executescript(SCHEMA)
+
+  def close(self):
+    self.db.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def get_many(self, keys):
+    # {llave: resultados} de las llaves que ya están guardadas
+    found = {}
+    keys = list(keys)
+    columns = ", ".join(OUTCOMES)
+    # Por tandas para no pasar el límite de parámetros de SQLite
+    for start in range(0, len(keys), 500):
+      chunk = keys[start:start + 500]
+      rows = self.db.execute(
+        f"SELECT key, {columns} FROM games WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+      for key, *values in rows:
+        found[key] = dict(zip(OUTCOMES, values))
+    return found
+
+  def put_many(self, games):
+    # games: tuplas (llave, layout, config, política, semilla, resultados, métricas por ronda o None)
+    now = time.time()
+    with self.db:
+      for key, layout, config, policy, seed, outcome, rounds in games:
+        self.db.execute(
+          f"INSERT OR REPLACE INTO games (key, layout, config, policy, seed, model_version, "
+          f"{', '.join(OUTCOMES)}, created) VALUES ({', '.join('?' * (len(OUTCOMES) + 7))})",
+          (key, layout, config_key(config), policy, seed, MODEL_VERSION,
+           *(int(outcome[name]) for name in OUTCOMES), now))
+        if rounds:
+          self.db.executemany(
+            f"INSERT OR REPLACE INTO step_metrics (key, round, {', '.join(STEP_METRICS)}) "
+            f"VALUES ({', '.join('?' * (len(STEP_METRICS) + 2))})",
+            [(key, i, *(int(row[name]) for name in STEP_METRICS)) for i, row in enumerate(rounds)])
+
+  def summary(self, layout=None, config=None, policies=None, model_version=MODEL_VERSION):
+    # Partidas y promedio de cada resultado por (layout, config, política), en SQL
+    where = ["model_version = ?"]
+    params = [model_version]
+    if layout is not None:
+      where.append("layout = ?")
+      params.append(layout)
+    if config is not None:
+      where.append("config = ?")
+      params.append(config_key(config))
+    if policies:
+      where.append(f"policy IN ({', '.join('?' * len(policies))})")
+      params.extend(policies)
+    averages = ", ".join(f"AVG({name})" for name in OUTCOMES)
+    rows = self.db.execute(
+      f"SELECT layout, config, policy, COUNT(*), {averages} FROM games "
+      f"WHERE {' AND '.join(where)} GROUP BY layout, config, policy ORDER BY layout, config, policy", params)
+    return [
+      {"layout": layout, "config": config, "policy": policy, "games": games, **dict(zip(OUTCOMES, means))}
+      for layout, config, policy, games, *means in rows
+    ]
+
+  def round_metrics(self, key):
+    rows = self.db.execute(
+      f"SELECT {', '.join(STEP_METRICS)} FROM step_metrics WHERE key = ? ORDER BY round", (key,))
+    return [dict(zip(STEP_METRICS, row)) for row in rows]
+
+
+def print_summary(rows):
+  print(f"\n{'política':<12}{'partidas':>9}" + "".join(f"{name:>14}" for name in OUTCOMES))
+  current = None
+  for row in rows:
+    if (row["layout"], row["config"]) != current:
+      current = (row["layout"], row["config"])
+      print(f"-- layout {row['layout']}  config {row['config']}")
+    print(f"{row['policy']:<12}{row['games']:>9}" + "".join(f"{row[name]:>14.3f}" for name in OUTCOMES))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Resumen de las partidas guardadas")
+  parser.add_argument("--db", default=DEFAULT_PATH)
+  parser.add_argument("--policies", nargs="*")
+  parser.add_argument("--model-version", type=int, default=MODEL_VERSION)
+  args = parser.parse_args()
+
+  with ResultStore(args.db) as store:
+    print_summary(store.summary(policies=args.policies, model_version=args.model_version))
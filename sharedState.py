@@ -0,0 +1,421 @@
+# Estado de partidas en memoria compartida para servir la API con varios
+# procesos (p. ej. gunicorn -w 4). Cada partida tiene un proceso dueño que
+# guarda el modelo vivo, ejecuta en serie todas las escrituras (reset, step,
+# reveal_poi, check_poi_in_fire) y publica el estado en un segmento de memoria
+# compartida. Cualquier worker lee ese segmento directamente, sin pasar por el
+# dueño, así que las lecturas escalan con el número de workers.
+#
+# Segmento "fire_rescue_<partida>":
+#   header   HEADER_DTYPE (magic "FRSM", dimensiones, seq, token, versiones y contadores)
+#   fires    u8[height, width]            valores de FireState
+#   walls    u8[height, width, 4]         tipos de pared
+#   agents   AGENT_RECORD[max_agents]     mismo registro que wireFormat
+#   pois     POI_RECORD[max_pois]
+#   reason   u8[REASON_BYTES]             endReason en UTF-8
+#
+# seq es un seqlock: el dueño lo deja impar mientras escribe y par al terminar.
+# Un lector copia lo que necesita y reintenta si seq cambió o era impar, hasta
+# READ_TIMEOUT segundos (si el dueño murió a mitad de una publicación seq queda
+# impar para siempre). Al cerrarse el dueño borra magic; un segmento sin magic o
+# cuyo nombre ya apunta a otro segmento (el dueño se reinició) está vencido y
+# los workers lo vuelven a abrir.
+#
+# Este módulo no conoce la API: los comandos (nombre -> función(model, *args)),
+# el resultado del reset y risk_weight se le pasan a GameOwner al crearlo. Los
+# dueños se lanzan desde testApi, que es quien tiene la tabla de comandos:
+#
+#   python testApi.py --owners default lab2 --engine array   (dueños)
+#   FIRE_RESCUE_SHARED=1 gunicorn -w 4 -b 0.0.0.0:3690 testApi:app
+
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Process, resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from fireRescueCore import FireState, POI, ROLE_VALUES, STATE_VIEWS, create_model
+from fireRisk import FireRiskMap
+import wireFormat
+
+MAGIC = b"FRSM"
+LAYOUT_VERSION = 2
+REASON_BYTES = 256
+AUTHKEY = os.environ.get("FIRE_RESCUE_AUTHKEY", "fire-rescue").encode()
+READ_TIMEOUT = float(os.environ.get("FIRE_RESCUE_READ_TIMEOUT", "0.5"))
+# Donde Linux expone los segmentos (para reconocer uno reemplazado)
+SHM_DIR = "/dev/shm"
+
+HEADER_DTYPE = np.dtype([
+  ("magic", "S4"), ("layout", "<u2"), ("width", "<u2"), ("height", "<u2"),
+  ("max_agents", "<u2"), ("max_pois", "<u2"), ("seq", "<u8"), ("token", "S12"),
+  ("versions", "<u4", (len(STATE_VIEWS),)), ("step", "<u4"), ("round", "<u4"),
+  ("damage", "<u2"), ("current_agent", "<u2"), ("phase", "u1"), ("flags", "u1"),
+  ("agents", "<u2"), ("pois", "<u2"), ("reason_len", "<u2"),
+])
+
+PHASES = ("AGENT", "FIRE")
+POI_TYPES = {code: poi_type for poi_type, code in wireFormat.POI_TYPE_CODES.items()}
+
+
+class UnknownGame(LookupError):
+  # No hay segmento ni dueño para esa partida
+  pass
+
+
+class StateUnavailable(RuntimeError):
+  # La partida existe pero su estado no se puede leer o escribir ahora
+  pass
+
+
+def segment_name(game):
+  return f"fire_rescue_{game}"
+
+
+def owner_address(game):
+  return os.path.join(tempfile.gettempdir(), f"fire-rescue-{game}.sock")
+
+
+class StateSegment:
+  def __init__(self, name, width=0, height=0, max_agents=16, max_pois=32, create=False):
+    if create:
+      size = self._layout(width, height, max_agents, max_pois)
+      self.shm = SharedMemory(name=name, create=True, size=size)
+    else:
+      self.shm = SharedMemory(name=name)
+      # Solo el dueño borra el segmento; sin esto el resource_tracker de un
+      # worker lo borraría al terminar (Python < 3.13)
+      resource_tracker.unregister(self.shm._name, "shared_memory")
+
+    self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+    if create:
+      self.header["magic"] = MAGIC
+      self.header["layout"] = LAYOUT_VERSION
+      self.header["width"] = width
+      self.header["height"] = height
+      self.header["max_agents"] = max_agents
+      self.header["max_pois"] = max_pois
+    elif bytes(self.header["magic"]) != MAGIC or int(self.header["layout"]) != LAYOUT_VERSION:
+      raise ValueError(f"Segmento {name} con formato desconocido")
+    self.inode = self._inode()
+
+    width, height = int(self.header["width"]), int(self.header["height"])
+    max_agents, max_pois = int(self.header["max_agents"]), int(self.header["max_pois"])
+    self._layout(width, height, max_agents, max_pois)
+    buf = self.shm.buf
+    self.fires = np.ndarray((height, width), dtype=np.uint8, buffer=buf, offset=self.offsets["fires"])
+    self.walls = np.ndarray((height, width, 4), dtype=np.uint8, buffer=buf, offset=self.offsets["walls"])
+    self.agents = np.ndarray(max_agents, dtype=wireFormat.AGENT_RECORD, buffer=buf, offset=self.offsets["agents"])
+    self.pois = np.ndarray(max_pois, dtype=wireFormat.POI_RECORD, buffer=buf, offset=self.offsets["pois"])
+    self.reason = np.ndarray(REASON_BYTES, dtype=np.uint8, buffer=buf, offset=self.offsets["reason"])
+
+  def _layout(self, width, height, max_agents, max_pois):
+    sizes = [
+      ("header", HEADER_DTYPE.itemsize),
+      ("fires", height * width),
+      ("walls", height * width * 4),
+      ("agents", max_agents * wireFormat.AGENT_RECORD.itemsize),
+      ("pois", max_pois * wireFormat.POI_RECORD.itemsize),
+      ("reason", REASON_BYTES),
+    ]
+    self.offsets = {}
+    offset = 0
+    for section, size in sizes:
+      self.offsets[section] = offset
+      offset += size
+    return offset
+
+  def _inode(self):
+    try:
+      return os.stat(os.path.join(SHM_DIR, self.shm.name)).st_ino
+    except FileNotFoundError:
+      return None
+
+  def is_stale(self):
+    # El dueño lo cerró, o murió y otro dueño creó un segmento nuevo con el mismo nombre
+    if bytes(self.header["magic"]) != MAGIC:
+      return True
+    return self.inode is not None and self._inode() != self.inode
+
+  def close(self, unlink=False):
+    if unlink:
+      self.header["magic"] = b""
+    # Las vistas de NumPy deben soltarse antes de cerrar el mapeo
+    self.header = self.fires = self.walls = self.agents = self.pois = self.reason = None
+    self.shm.close()
+    if unlink:
+      self.shm.unlink()
+
+  # --- escritura (solo el dueño) ---
+
+  def publish(self, model):
+    header = self.header
+    seq = int(header["seq"])
+    header["seq"] = seq + 1
+
+    fires = self.fires
+    fires.fill(FireState.CLEAR.value)
+    for x, y in model.smoke_cells:
+      fires[y, x] = FireState.SMOKE.value
+    for x, y in model.fire_cells:
+      fires[y, x] = FireState.FIRE.value
+    self.walls[...] = model.grid_data
+
+    columns = model.agent_columns()
+    n = min(len(columns["id"]), len(self.agents))
+    agents = self.agents
+    agents["id"][:n] = columns["id"][:n]
+    agents["x"][:n] = columns["x"][:n]
+    agents["y"][:n] = columns["y"][:n]
+    agents["role"][:n] = columns["role"][:n]
+    agents["flags"][:n] = columns["knocked_out"][:n] | (columns["carrying"][:n].astype(np.uint8) << 1)
+
+    active = model.active_pois[:len(self.pois)]
+    pois = self.pois
+    for i, poi in enumerate(active):
+      pois[i] = (poi.id, poi.x, poi.y, wireFormat.POI_TYPE_CODES[poi.type], 1 if poi.revealed else 0)
+
+    reason = (model.end_reason or "").encode("utf-8")[:REASON_BYTES]
+    self.reason[:len(reason)] = np.frombuffer(reason, dtype=np.uint8)
+
+    header["token"] = model.game_token.encode()
+    header["versions"] = [model.state_versions[view] for view in STATE_VIEWS]
+    header["step"] = model.step_count
+    header["round"] = model.round_count
+    header["damage"] = model.damage_count
+    header["current_agent"] = model.current_agent_index
+    header["phase"] = PHASES.index(model.phase) if model.phase in PHASES else 0
+    header["flags"] = (1 if model.game_over else 0) | (2 if model.game_won else 0)
+    header["agents"] = n
+    header["pois"] = len(active)
+    header["reason_len"] = len(reason)
+
+    header["seq"] = seq + 2
+
+  # --- lectura (cualquier proceso) ---
+
+  def _read(self, copy_body, timeout=READ_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+      seq = int(self.header["seq"])
+      if not seq & 1:
+        header = self.header.copy()[()]
+        body = copy_body(header) if copy_body else None
+        if int(self.header["seq"]) == seq:
+          return header, body
+      if time.monotonic() > deadline:
+        raise StateUnavailable(f"Segmento {self.shm.name} sin publicación completa en {timeout} s")
+      time.sleep(0)
+
+  def version_info(self):
+    # Token y versiones de la misma publicación (basta para ETag/304)
+    header = self._read(None)[0]
+    return header["token"].decode(), dict(zip(STATE_VIEWS, header["versions"].tolist()))
+
+  def snapshot(self):
+    def copy_body(header):
+      return (self.fires.copy(), self.walls.copy(), self.agents[:int(header["agents"])].copy(),
+              self.pois[:int(header["pois"])].copy(), bytes(self.reason[:int(header["reason_len"])]))
+    header, body = self._read(copy_body)
+    return SharedGameView(header, *body)
+
+
+class SharedGameView:
+  # Copia consistente de una publicación con la misma interfaz de lectura que
+  # FireRescueGame (la usan los payloads de testApi y los packers de wireFormat)
+  def __init__(self, header, fires, walls, agents, pois, reason):
+    self.width = int(header["width"])
+    self.height = int(header["height"])
+    self.game_token = header["token"].decode()
+    self.state_versions = dict(zip(STATE_VIEWS, header["versions"].tolist()))
+    self.step_count = int(header["step"])
+    self.round_count = int(header["round"])
+    self.damage_count = int(header["damage"])
+    self.current_agent_index = int(header["current_agent"])
+    self.phase = PHASES[int(header["phase"])]
+    self.game_over = bool(header["flags"] & 1)
+    self.game_won = bool(header["flags"] & 2)
+    self.end_reason = reason.decode("utf-8", errors="replace")
+    self.grid_data = walls
+    self.fires = fires
+    self.risk_map = FireRiskMap()
+
+    ys, xs = np.nonzero(fires == FireState.FIRE.value)
+    self.fire_cells = set(zip(xs.tolist(), ys.tolist()))
+    ys, xs = np.nonzero(fires == FireState.SMOKE.value)
+    self.smoke_cells = set(zip(xs.tolist(), ys.tolist()))
+    self.agents = agents
+
+    self.active_pois = []
+    for poi_id, x, y, type_code, flags in pois.tolist():
+      poi = POI(poi_id, POI_TYPES[type_code], x, y)
+      poi.revealed = bool(flags & 1)
+      self.active_pois.append(poi)
+
+  def sorted_cells(self, cells):
+    return sorted(cells, key=lambda cell: (cell[1], cell[0]))
+
+  def agent_columns(self):
+    agents = self.agents
+    return {
+      "id": agents["id"],
+      "x": agents["x"],
+      "y": agents["y"],
+      "role": agents["role"],
+      "knocked_out": (agents["flags"] & 1) != 0,
+      "carrying": (agents["flags"] & 2) != 0,
+    }
+
+  def fire_codes(self):
+    return self.fires
+
+  def fire_risk(self):
+    # Se calcula en el worker; testApi lo cachea por la versión "risk"
+    if self.risk_map.risk is None:
+      self.risk_map.update(self.fires, self.grid_data)
+    return self.risk_map.risk
+
+  def agent_records(self):
+    return [
+      {"id": i, "x": x, "y": y, "role": ROLE_VALUES[r], "knocked_out": bool(flags & 1)}
+      for i, x, y, r, flags in self.agents.tolist()
+    ]
+
+
+class GameOwner:
+  # Dueño de una partida: único proceso que modifica el modelo. Atiende a los
+  # workers por un socket local; cada conexión tiene su hilo y los comandos se
+  # ejecutan de a uno con self.lock. commands es {nombre: función(model, *args)}
+  # y reset_result(model) da la respuesta de "reset".
+  def __init__(self, game, commands, reset_result, engine="mesa", risk_weight=0):
+    self.game = game
+    self.commands = commands
+    self.reset_result = reset_result
+    self.engine = engine
+    self.risk_weight = risk_weight
+    self.lock = threading.Lock()
+    self.model = None
+    self.segment = None
+
+  def reset(self):
+    self.model = create_model(engine=self.engine, risk_weight=self.risk_weight)
+    if self.segment is None:
+      name = segment_name(self.game)
+      size = dict(width=self.model.width, height=self.model.height,
+                  max_agents=max(16, len(self.model.agent_list)), create=True)
+      try:
+        self.segment = StateSegment(name, **size)
+      except FileExistsError:
+        # Segmento de un dueño anterior que terminó sin borrarlo
+        SharedMemory(name=name).unlink()
+        self.segment = StateSegment(name, **size)
+    return self.reset_result(self.model)
+
+  def execute(self, command, args):
+    with self.lock:
+      if command == "reset":
+        result = self.reset()
+      else:
+        result = self.commands[command](self.model, *args)
+      self.segment.publish(self.model)
+      return result
+
+  def handle(self, conn):
+    with conn:
+      while True:
+        try:
+          command, args = conn.recv()
+        except EOFError:
+          return
+        try:
+          conn.send(("ok", self.execute(command, args)))
+        except Exception as e:
+          conn.send(("error", str(e)))
+
+  def serve(self):
+    address = owner_address(self.game)
+    if os.path.exists(address):
+      os.unlink(address)
+    listener = None
+    try:
+      self.execute("reset", ())
+      listener = Listener(address, family="AF_UNIX", authkey=AUTHKEY)
+      print(f"Partida '{self.game}': dueño en {address}, segmento {segment_name(self.game)}")
+      while True:
+        conn = listener.accept()
+        threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+    finally:
+      # También si falla el reset o el socket: no quedan segmento ni socket huérfanos
+      if listener is not None:
+        listener.close()
+      if self.segment is not None:
+        self.segment.close(unlink=True)
+        self.segment = None
+      if os.path.exists(address):
+        os.unlink(address)
+
+
+class OwnerClient:
+  # Conexión de un worker con el dueño de una partida (una por proceso)
+  def __init__(self, game):
+    self.game = game
+    self.lock = threading.Lock()
+    self.conn = None
+
+  def call(self, command, *args):
+    with self.lock:
+      if self.conn is None:
+        try:
+          self.conn = Client(owner_address(self.game), family="AF_UNIX", authkey=AUTHKEY)
+        except FileNotFoundError:
+          raise UnknownGame(self.game) from None
+        except OSError as e:
+          raise StateUnavailable(f"Dueño de '{self.game}' no responde: {e}") from None
+      try:
+        self.conn.send((command, args))
+        status, result = self.conn.recv()
+      except (EOFError, OSError) as e:
+        self.conn = None
+        raise StateUnavailable(f"Dueño de '{self.game}' no responde: {e!r}") from None
+    if status != "ok":
+      raise RuntimeError(result)
+    return result
+
+
+def _exit(signum, frame):
+  sys.exit(0)
+
+
+def run_owner(game, commands, reset_result, engine, risk_weight):
+  # SIGTERM sale por el finally de serve() y borra el segmento y el socket
+  signal.signal(signal.SIGTERM, _exit)
+  GameOwner(game, commands, reset_result, engine, risk_weight).serve()
+
+
+def run_owners(games, commands, reset_result, engine="mesa", risk_weight=0):
+  # Un proceso dueño por partida. SIGTERM o SIGINT al lanzador terminan y
+  # esperan a todos los dueños, que borran su segmento y su socket al salir.
+  signal.signal(signal.SIGTERM, _exit)
+  signal.signal(signal.SIGINT, _exit)
+  owners = [Process(target=run_owner, args=(game, commands, reset_result, engine, risk_weight))
+            for game in games]
+  try:
+    for owner in owners:
+      owner.start()
+    for owner in owners:
+      owner.join()
+  finally:
+    for owner in owners:
+      if owner.is_alive():
+        owner.terminate()
+    for owner in owners:
+      if owner.pid is not None:
+        owner.join(5)
+        if owner.is_alive():
+          owner.kill()
+          owner.join()
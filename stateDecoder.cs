@@ -0,0 +1,192 @@
+using System.Text;
+
+// Decodificador del formato binario de la API (ver el encabezado de wireFormat.py).
+// Se pide con el header "Accept: application/x-fire-rescue". Ningún método
+// reserva memoria: escriben en arreglos que el llamador reutiliza entre frames.
+
+public struct StateHeader
+{
+    public byte kind;      // 1 fires, 2 smoke, 3 agents, 4 pois, 5 gamestate
+    public byte encoding;  // 0 registros, 1 bitmask, 2 corridas por fila
+    public int width;
+    public int height;
+    public int count;
+}
+
+public struct AgentRecord
+{
+    public int id;
+    public int x;
+    public int y;
+    public byte role;      // 0 ninguno, 1 rescuer, 2 extinguisher
+    public bool knockedOut;
+    public bool carryingVictim;
+}
+
+public struct POIRecord
+{
+    public int id;
+    public int x;
+    public int y;
+    public byte type;      // 1 victim, 2 false_alarm
+    public bool revealed;
+}
+
+public struct GameStateRecord
+{
+    public byte phase;     // 0 AGENT, 1 FIRE
+    public bool gameOver;
+    public bool gameWon;
+    public int currentAgent;
+    public int damageCount;
+    public long roundCount;
+    public long step;
+    public int endReasonOffset;  // texto UTF-8; usar EndReason() solo si se necesita
+    public int endReasonLength;
+}
+
+public static class BinaryStateDecoder
+{
+    public const string MimeType = "application/x-fire-rescue";
+    public const int HeaderSize = 14;
+    private const int RecordSize = 8;
+    private const int RunSize = 6;
+
+    private static int U16(byte[] data, int offset)
+    {
+        return data[offset] | (data[offset + 1] << 8);
+    }
+
+    private static long U32(byte[] data, int offset)
+    {
+        return (uint)(data[offset] | (data[offset + 1] << 8) | (data[offset + 2] << 16) | (data[offset + 3] << 24));
+    }
+
+    public static bool ReadHeader(byte[] data, out StateHeader header)
+    {
+        header = new StateHeader();
+        if (data == null || data.Length < HeaderSize
+            || data[0] != 'F' || data[1] != 'R' || data[2] != 'S' || data[3] != '1')
+        {
+            return false;
+        }
+        header.kind = data[4];
+        header.encoding = data[5];
+        header.width = U16(data, 6);
+        header.height = U16(data, 8);
+        header.count = (int)U32(data, 10);
+        return true;
+    }
+
+    // Llena cells (índice y * width + x) y devuelve cuántas celdas quedaron encendidas
+    public static int DecodeCells(byte[] data, bool[] cells)
+    {
+        if (!ReadHeader(data, out StateHeader header))
+        {
+            return -1;
+        }
+        int total = header.width * header.height;
+        System.Array.Clear(cells, 0, total);
+
+        int set = 0;
+        if (header.encoding == 1)
+        {
+            int rowBytes = (header.width + 7) / 8;
+            for (int y = 0; y < header.height; y++)
+            {
+                int rowStart = HeaderSize + y * rowBytes;
+                for (int x = 0; x < header.width; x++)
+                {
+                    if ((data[rowStart + (x >> 3)] & (1 << (x & 7))) != 0)
+                    {
+                        cells[y * header.width + x] = true;
+                        set++;
+                    }
+                }
+            }
+        }
+        else if (header.encoding == 2)
+        {
+            for (int i = 0; i < header.count; i++)
+            {
+                int offset = HeaderSize + i * RunSize;
+                int row = U16(data, offset);
+                int col = U16(data, offset + 2);
+                int length = U16(data, offset + 4);
+                for (int x = col; x < col + length; x++)
+                {
+                    cells[row * header.width + x] = true;
+                }
+                set += length;
+            }
+        }
+        return set;
+    }
+
+    // Devuelve cuántos agentes se escribieron en buffer
+    public static int DecodeAgents(byte[] data, AgentRecord[] buffer)
+    {
+        if (!ReadHeader(data, out StateHeader header))
+        {
+            return -1;
+        }
+        int count = System.Math.Min(header.count, buffer.Length);
+        for (int i = 0; i < count; i++)
+        {
+            int offset = HeaderSize + i * RecordSize;
+            buffer[i].id = U16(data, offset);
+            buffer[i].x = U16(data, offset + 2);
+            buffer[i].y = U16(data, offset + 4);
+            buffer[i].role = data[offset + 6];
+            buffer[i].knockedOut = (data[offset + 7] & 1) != 0;
+            buffer[i].carryingVictim = (data[offset + 7] & 2) != 0;
+        }
+        return count;
+    }
+
+    // Devuelve cuántos POIs se escribieron en buffer
+    public static int DecodePOIs(byte[] data, POIRecord[] buffer)
+    {
+        if (!ReadHeader(data, out StateHeader header))
+        {
+            return -1;
+        }
+        int count = System.Math.Min(header.count, buffer.Length);
+        for (int i = 0; i < count; i++)
+        {
+            int offset = HeaderSize + i * RecordSize;
+            buffer[i].id = U16(data, offset);
+            buffer[i].x = U16(data, offset + 2);
+            buffer[i].y = U16(data, offset + 4);
+            buffer[i].type = data[offset + 6];
+            buffer[i].revealed = (data[offset + 7] & 1) != 0;
+        }
+        return count;
+    }
+
+    public static bool DecodeGameState(byte[] data, out GameStateRecord state)
+    {
+        state = new GameStateRecord();
+        if (!ReadHeader(data, out StateHeader header) || header.kind != 5)
+        {
+            return false;
+        }
+        int offset = HeaderSize;
+        state.phase = data[offset];
+        state.gameOver = (data[offset + 1] & 1) != 0;
+        state.gameWon = (data[offset + 1] & 2) != 0;
+        state.currentAgent = U16(data, offset + 2);
+        state.damageCount = U16(data, offset + 4);
+        state.roundCount = U32(data, offset + 8);
+        state.step = U32(data, offset + 12);
+        state.endReasonLength = U16(data, offset + 16);
+        state.endReasonOffset = offset + 18;
+        return true;
+    }
+
+    // Única función que reserva memoria (crea el string)
+    public static string EndReason(byte[] data, GameStateRecord state)
+    {
+        return Encoding.UTF8.GetString(data, state.endReasonOffset, state.endReasonLength);
+    }
+}
@@ -1,25 +1,160 @@
+import argparse
+import os
+import time
+
 from flask import Flask, jsonify, request
-from agentModel import (
-    model, FireState, FireRescueModel, grid_layout,
-    POIType  
-)
+from fireRescueCore import FireState, POIType, STATE_VIEWS, grid_layout, create_model
+import wireFormat
+import sharedState
 
 app = Flask(__name__)
 
+# Motor de simulación: "mesa" (referencia) o "array" (sin mesa, agentes en arreglos)
+ENGINE = os.environ.get("FIRE_RESCUE_ENGINE", "mesa")
 
-# Endpoint para obtener las celdas con humo
-@app.route("/api/smoke", methods=["GET"])
-def get_smoke():
-    smoke = []
-    for y in range(model.height):
-        for x in range(model.width):
-            if model._get_fire_state(x, y) == FireState.SMOKE:
-                smoke.append({"row": y, "col": x})
-    return jsonify({"smoke": smoke})
+# Peso del riesgo de fuego en los caminos y la prioridad de los POIs (0 = modelo original)
+RISK_WEIGHT = float(os.environ.get("FIRE_RESCUE_RISK_WEIGHT", "0"))
 
-# Endpoint para obtener los POIs activos
-@app.route("/api/pois", methods=["GET"])
-def get_pois():
+# Con FIRE_RESCUE_SHARED=1 el estado vive en memoria compartida (sharedState):
+# las lecturas salen del segmento de la partida y las escrituras van a su
+# proceso dueño, así que se pueden correr varios workers (gunicorn -w N).
+# La partida se elige con ?game=<id> (por defecto "default").
+SHARED = os.environ.get("FIRE_RESCUE_SHARED") == "1"
+
+# Tope de trabajo de /api/step con n o until: medios pasos y segundos por petición
+MAX_ADVANCE_STEPS = int(os.environ.get("FIRE_RESCUE_MAX_STEPS", "500"))
+MAX_ADVANCE_SECONDS = float(os.environ.get("FIRE_RESCUE_MAX_SECONDS", "2.0"))
+ADVANCE_UNTIL = ("round_end", "game_over")
+
+# El modelo se construye en la primera petición, no al importar el módulo
+model = None
+
+# Modo compartido: segmento y conexión con el dueño por partida, por proceso
+_segments = {}
+_owners = {}
+
+
+def get_model():
+    global model
+    if model is None:
+        model = create_model(grid_layout, engine=ENGINE, risk_weight=RISK_WEIGHT)
+    return model
+
+
+def game_id():
+    return request.args.get("game", "default")
+
+
+def shared_segment(game):
+    segment = _segments.get(game)
+    if segment is not None and segment.is_stale():
+        # El dueño se reinició o se cerró: se suelta el mapeo viejo y se vuelve a abrir
+        del _segments[game]
+        segment = None
+    if segment is None:
+        try:
+            segment = sharedState.StateSegment(sharedState.segment_name(game))
+        except FileNotFoundError:
+            raise sharedState.UnknownGame(game) from None
+        _segments[game] = segment
+    return segment
+
+
+def run_command(command, *args):
+    # Las escrituras se ejecutan en el proceso dueño de la partida en modo compartido
+    if SHARED:
+        game = game_id()
+        owner = _owners.get(game)
+        if owner is None:
+            owner = _owners[game] = sharedState.OwnerClient(game)
+        return owner.call(command, *args)
+    if command == "reset":
+        global model
+        model = None
+        return reset_result(get_model())
+    return COMMANDS[command](get_model(), *args)
+
+
+@app.errorhandler(sharedState.UnknownGame)
+def unknown_game(e):
+    return jsonify({
+        'success': False,
+        'message': f"Partida desconocida: {e}"
+    }), 404
+
+
+@app.errorhandler(sharedState.StateUnavailable)
+def state_unavailable(e):
+    return jsonify({
+        'success': False,
+        'message': str(e)
+    }), 503
+
+
+# Respuestas serializadas por vista y formato: {(partida, vista, formato): (etag, cuerpo)}
+_view_cache = {}
+
+
+def wants_binary():
+    # Formato binario solo si el cliente lo pide explícitamente en Accept
+    best = request.accept_mimetypes.best_match(["application/json", wireFormat.MIME_TYPE])
+    return best == wireFormat.MIME_TYPE
+
+
+def versioned_response(view, build_payload):
+    # Responde 304 si el cliente ya tiene esta versión (If-None-Match) y
+    # reutiliza el cuerpo ya serializado mientras la vista no cambie
+    if wants_binary() and view in wireFormat.PACKERS:
+        fmt, mimetype = "bin", wireFormat.MIME_TYPE
+    else:
+        fmt, mimetype = "json", "application/json"
+    game = game_id() if SHARED else "default"
+    if SHARED:
+        segment = shared_segment(game)
+        token, versions = segment.version_info()
+    else:
+        model = get_model()
+        token, versions = model.game_token, model.state_versions
+    etag = f"{token}-{view}-{versions[view]}-{fmt}"
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        cached = _view_cache.get((game, view, fmt))
+        if cached is None or cached[0] != etag:
+            if SHARED:
+                # Copia consistente; su versión puede ser más nueva que la del header leído
+                model = segment.snapshot()
+                etag = f"{model.game_token}-{view}-{model.state_versions[view]}-{fmt}"
+            if fmt == "bin":
+                body = wireFormat.PACKERS[view](model)
+            else:
+                body = jsonify(build_payload(model)).get_data()
+            cached = (etag, body)
+            _view_cache[(game, view, fmt)] = cached
+        response = app.response_class(cached[1], mimetype=mimetype)
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept")
+    return response
+
+
+def smoke_payload(model):
+    smoke = [{"row": y, "col": x} for x, y in model.sorted_cells(model.smoke_cells)]
+    return {"smoke": smoke}
+
+
+def fires_payload(model):
+    fires = [{"row": y, "col": x} for x, y in model.sorted_cells(model.fire_cells)]
+    return {"fires": fires}
+
+
+def agents_payload(model):
+    return {"agents": model.agent_records()}
+
+
+def pois_payload(model):
     pois = []
     for poi in model.active_pois:
         poi_data = {
@@ -32,61 +167,264 @@ def get_pois():
         pois.append(poi_data)
     response = {"pois": pois}
     print(f"Respuesta completa: {response}")  
-    return jsonify(response)
+    return response
 
-# Endpoint para revelar un POI
-@app.route("/api/check_poi_in_fire", methods=["GET"])
-def check_poi_in_fire():
-    try:
-        x = int(request.args.get('x'))
-        y = int(request.args.get('y'))
+
+def gamestate_payload(model):
+    return {
+        "gameState": {
+            "phase": model.phase,
+            "currentAgent": model.current_agent_index,
+            "damageCount": model.damage_count,
+            "roundCount": model.round_count,
+            "gameOver": model.game_over,
+            "gameWon": model.game_won,
+            "endReason": model.end_reason if hasattr(model, 'end_reason') else ""
+        }
+    }
+
+
+def risk_payload(model):
+    # Mapa de calor: probabilidad de fuego por celda en las próximas rondas,
+    # por filas (row = y, col = x) como fires y smoke
+    risk = model.fire_risk()
+    return {
+        "risk": {
+            "horizon": model.risk_map.horizon,
+            "rows": model.height,
+            "cols": model.width,
+            "cells": [round(value, 4) for value in risk.ravel().tolist()],
+        }
+    }
+
+
+# Endpoint para obtener las celdas con humo
+@app.route("/api/smoke", methods=["GET"])
+def get_smoke():
+    return versioned_response("smoke", smoke_payload)
+
+# Endpoint para obtener los POIs activos
+@app.route("/api/pois", methods=["GET"])
+def get_pois():
+    return versioned_response("pois", pois_payload)
+
+# Escrituras: cada una recibe el modelo y devuelve el cuerpo JSON. En modo
+# compartido las ejecuta el proceso dueño de la partida (ver run_command).
+def check_poi_in_fire_result(model, x, y):
+    print(f"\nVerificando POI en fuego en ({x}, {y})")
+    print("\nEstado actual de POIs:")
+    for poi in model.active_pois:
+        print(f"- POI en ({poi.x}, {poi.y}): tipo={poi.type.value}, revelado={poi.revealed}")
+    
+    # Buscar el POI en esa posición
+    poi = model._get_poi_at_position(x, y)
+    if poi is None:
+        print(f"No se encontró POI en ({x}, {y})")
+        return {
+            'success': False,
+            'message': 'No hay POI en esta posición'
+        }
         
-        print(f"\nVerificando POI en fuego en ({x}, {y})")
-        print("\nEstado actual de POIs:")
-        for poi in model.active_pois:
-            print(f"- POI en ({poi.x}, {poi.y}): tipo={poi.type.value}, revelado={poi.revealed}")
+    # Si hay un POI y hay fuego, debemos revelarlo
+    if model._get_fire_state(x, y) == FireState.FIRE:
+        print(f"¡Fuego encontrado en POI! Tipo: {poi.type.value}")
+        poi.revealed = True  # Marcar como revelado
+        model.touch("pois")
         
-        # Buscar el POI en esa posición
-        poi = model._get_poi_at_position(x, y)
-        if poi is None:
-            print(f"No se encontró POI en ({x}, {y})")
-            return jsonify({
-                'success': False,
-                'message': 'No hay POI en esta posición'
-            })
-            
-        # Si hay un POI y hay fuego, debemos revelarlo
-        if model._get_fire_state(x, y) == FireState.FIRE:
-            print(f"¡Fuego encontrado en POI! Tipo: {poi.type.value}")
-            poi.revealed = True  # Marcar como revelado
-            
-            # Si es una víctima, agregarla a la lista de perdidas
-            if poi.type == POIType.VICTIM:
-                if poi not in model.lost_victims:
-                    model.lost_victims.append(poi)
-            
-            # Remover el POI actual y generar uno nuevo
-            if poi in model.active_pois:
-                model.active_pois.remove(poi)
-            
-            print("Generando nuevo POI...")
-            new_poi = model.place_new_poi()
-            
-            return jsonify({
-                'success': True,
-                'poiType': poi.type.value,
-                'message': 'POI destruido por fuego',
-                'wasVictim': poi.type == POIType.VICTIM
-            })
+        # Si es una víctima, agregarla a la lista de perdidas
+        if poi.type == POIType.VICTIM:
+            if poi not in model.lost_victims:
+                model.lost_victims.append(poi)
         
-        # Si hay un POI pero no hay fuego
-        print(f"POI encontrado en ({x}, {y}) pero no hay fuego")
-        return jsonify({
+        # Remover el POI actual y generar uno nuevo
+        if poi in model.active_pois:
+            model.active_pois.remove(poi)
+        
+        print("Generando nuevo POI...")
+        new_poi = model.place_new_poi()
+        
+        return {
             'success': True,
             'poiType': poi.type.value,
-            'message': 'POI presente pero no hay fuego',
-            'wasVictim': False
+            'message': 'POI destruido por fuego',
+            'wasVictim': poi.type == POIType.VICTIM
+        }
+    
+    # Si hay un POI pero no hay fuego
+    print(f"POI encontrado en ({x}, {y}) pero no hay fuego")
+    return {
+        'success': True,
+        'poiType': poi.type.value,
+        'message': 'POI presente pero no hay fuego',
+        'wasVictim': False
+    }
+
+
+def reveal_poi_result(model, x, y):
+    print(f"\nIntento de revelar POI en ({x}, {y})")
+    print("Estado actual de POIs:")
+    for poi in model.active_pois:
+        print(f"- POI en ({poi.x}, {poi.y}): tipo={poi.type.value}, revelado={poi.revealed}")
+    
+    # Buscar el POI en esa posición
+    poi = model._get_poi_at_position(x, y)
+    if poi is None:
+        print(f"No se encontró POI en ({x}, {y})")
+        return {
+            'success': False,
+            'message': 'No hay POI en esta posición'
+        }
+        
+    print(f"POI encontrado: tipo={poi.type.value}, revelado={poi.revealed}")
+    if poi.revealed:
+        return {
+            'success': False,
+            'message': 'POI ya fue revelado'
+        }
+        
+    # Revelar el POI
+    print(f"Revelando POI en ({x}, {y})")
+    was_revealed = model.reveal_poi(x, y)
+    print(f"POI revelado: {was_revealed}")
+    
+    # Preparar respuesta
+    response = {
+        'success': True,
+        'poiType': poi.type.value,
+        'wasRevealed': poi.revealed,
+        'message': 'POI revelado exitosamente'
+    }
+    
+    print(f"Enviando respuesta: {response}")
+    return response
+
+
+def reset_result(model):
+    return {"message": "Modelo reiniciado"}
+
+
+def step_result(model):
+    model.step()
+    return {
+        "message": "Modelo avanzado",
+        "step": model.step_count,
+        "fires": fires_payload(model)["fires"],
+        "agents": agents_payload(model)["agents"]
+    }
+
+
+def cell_diff(before, after):
+    return {
+        "add": [{"row": y, "col": x} for x, y in sorted(after - before, key=lambda c: (c[1], c[0]))],
+        "remove": [{"row": y, "col": x} for x, y in sorted(before - after, key=lambda c: (c[1], c[0]))],
+    }
+
+
+def poi_records(model):
+    return [{"x": poi.x, "y": poi.y, "type": poi.type.value, "revealed": poi.revealed}
+            for poi in model.active_pois]
+
+
+class FrameRecorder:
+    # Cambios de cada medio paso respecto al anterior, para que el cliente los
+    # anime sin pedir cada vista. Solo se revisan las vistas cuya versión subió
+    # y cada cuadro lleva únicamente lo que cambió.
+    def __init__(self, model):
+        self.model = model
+        self.versions = dict(model.state_versions)
+        self.fires = set(model.fire_cells)
+        self.smoke = set(model.smoke_cells)
+        self.agents = {record["id"]: record for record in model.agent_records()}
+        self.game_state = gamestate_payload(model)["gameState"]
+        self.frames = []
+
+    def record(self):
+        model = self.model
+        changed = {view for view in STATE_VIEWS if model.state_versions[view] != self.versions[view]}
+        self.versions = dict(model.state_versions)
+        frame = {"step": model.step_count}
+
+        if "fires" in changed and model.fire_cells != self.fires:
+            frame["fires"] = cell_diff(self.fires, model.fire_cells)
+            self.fires = set(model.fire_cells)
+        if "smoke" in changed and model.smoke_cells != self.smoke:
+            frame["smoke"] = cell_diff(self.smoke, model.smoke_cells)
+            self.smoke = set(model.smoke_cells)
+        if "agents" in changed:
+            records = model.agent_records()
+            moved = [record for record in records if self.agents.get(record["id"]) != record]
+            if moved:
+                frame["agents"] = moved
+            self.agents = {record["id"]: record for record in records}
+        if "pois" in changed:
+            frame["pois"] = poi_records(model)
+
+        game_state = gamestate_payload(model)["gameState"]
+        delta = {key: value for key, value in game_state.items() if self.game_state.get(key) != value}
+        if delta:
+            frame["gameState"] = delta
+        self.game_state = game_state
+        self.frames.append(frame)
+
+
+def advance_result(model, n, until=None, frames=False):
+    # Avanza hasta n medios pasos, hasta el fin de la ronda (vuelve a tocarle al
+    # primer agente) o hasta el fin del juego, sin pasar de los topes del servidor.
+    # stopped dice por qué paró: "n", "round_end", "game_over" o "limit". Sin n
+    # (solo until) el único tope es el del servidor y llegar a él es "limit".
+    recorder = FrameRecorder(model) if frames else None
+    limit = MAX_ADVANCE_STEPS if n is None else min(n, MAX_ADVANCE_STEPS)
+    deadline = time.perf_counter() + MAX_ADVANCE_SECONDS
+    steps = 0
+    while True:
+        if model.game_over:
+            stopped = "game_over"
+            break
+        if steps >= limit or time.perf_counter() >= deadline:
+            stopped = "n" if n is not None and steps >= n else "limit"
+            break
+        model.step()
+        steps += 1
+        if recorder:
+            recorder.record()
+        if until == "round_end" and model.phase == "AGENT" and model.current_agent_index == 0:
+            stopped = "round_end"
+            break
+
+    response = {
+        "message": "Modelo avanzado",
+        "step": model.step_count,
+        "steps": steps,
+        "stopped": stopped,
+    }
+    if recorder:
+        response["frames"] = recorder.frames
+    else:
+        response.update({
+            "fires": fires_payload(model)["fires"],
+            "smoke": smoke_payload(model)["smoke"],
+            "agents": agents_payload(model)["agents"],
+            "pois": poi_records(model),
+            "gameState": gamestate_payload(model)["gameState"],
         })
+    return response
+
+
+COMMANDS = {
+    "check_poi_in_fire": check_poi_in_fire_result,
+    "reveal_poi": reveal_poi_result,
+    "step": step_result,
+    "advance": advance_result,
+}
+
+
+# Endpoint para revelar un POI
+@app.route("/api/check_poi_in_fire", methods=["GET"])
+def check_poi_in_fire():
+    try:
+        x = int(request.args.get('x'))
+        y = int(request.args.get('y'))
+        return jsonify(run_command("check_poi_in_fire", x, y))
         
     except Exception as e:
         return jsonify({
@@ -100,43 +438,7 @@ def reveal_poi():
         data = request.form
         x = int(data['x'])
         y = int(data['y'])
-        
-        print(f"\nIntento de revelar POI en ({x}, {y})")
-        print("Estado actual de POIs:")
-        for poi in model.active_pois:
-            print(f"- POI en ({poi.x}, {poi.y}): tipo={poi.type.value}, revelado={poi.revealed}")
-        
-        # Buscar el POI en esa posición
-        poi = model._get_poi_at_position(x, y)
-        if poi is None:
-            print(f"No se encontró POI en ({x}, {y})")
-            return jsonify({
-                'success': False,
-                'message': 'No hay POI en esta posición'
-            })
-            
-        print(f"POI encontrado: tipo={poi.type.value}, revelado={poi.revealed}")
-        if poi.revealed:
-            return jsonify({
-                'success': False,
-                'message': 'POI ya fue revelado'
-            })
-            
-        # Revelar el POI
-        print(f"Revelando POI en ({x}, {y})")
-        was_revealed = model.reveal_poi(x, y)
-        print(f"POI revelado: {was_revealed}")
-        
-        # Preparar respuesta
-        response = {
-            'success': True,
-            'poiType': poi.type.value,
-            'wasRevealed': poi.revealed,
-            'message': 'POI revelado exitosamente'
-        }
-        
-        print(f"Enviando respuesta: {response}")
-        return jsonify(response)
+        return jsonify(run_command("reveal_poi", x, y))
         
     except Exception as e:
         return jsonify({
@@ -147,82 +449,70 @@ def reveal_poi():
 # Endpoint para reiniciar el modelo y comenzar desde el estado inicial
 @app.route("/api/reset", methods=["POST"])
 def reset_model():
-    global model
-    model = FireRescueModel(grid_layout)
-    return jsonify({"message": "Modelo reiniciado"})
+    return jsonify(run_command("reset"))
 
 # Endpoint de fuegos (ahora dinámico)
 @app.route("/api/fires", methods=["GET"])
 def get_fires():
-    fires = []
-    for y in range(model.height):
-        for x in range(model.width):
-            if model._get_fire_state(x, y) == FireState.FIRE:
-                fires.append({"row": y, "col": x})
-    return jsonify({"fires": fires})
+    return versioned_response("fires", fires_payload)
 
 # Endpoint de agentes (dinámico)
 @app.route("/api/agents", methods=["GET"])
 def get_agents():
-    agents = []
-    for agent in model.agent_list:
-        agents.append({
-            "id": agent.unique_id,
-            "x": agent.pos[0],
-            "y": agent.pos[1],
-            "role": agent.role.value if agent.role else None,
-            "knocked_out": agent.is_knocked_out()
-        })
-    return jsonify({"agents": agents})
+    return versioned_response("agents", agents_payload)
 
 #  Endpoint de humo (dinámico)
 
 @app.route("/api/gamestate", methods=["GET"])
 def get_game_state():
-    return jsonify({
-        "gameState": {
-            "phase": model.phase,
-            "currentAgent": model.current_agent_index,
-            "damageCount": model.damage_count,
-            "roundCount": model.round_count,
-            "gameOver": model.game_over,
-            "gameWon": model.game_won,
-            "endReason": model.end_reason if hasattr(model, 'end_reason') else ""
-        }
-    })
+    return versioned_response("gamestate", gamestate_payload)
+
+# Mapa de calor del riesgo de fuego (solo JSON)
+@app.route("/api/risk", methods=["GET"])
+def get_risk():
+    return versioned_response("risk", risk_payload)
 
+# Sin parámetros avanza medio paso (un turno de agente o una fase de fuego).
+# Con ?n=k y/o ?until=round_end|game_over avanza varios en una sola petición;
+# &frames=1 devuelve los cambios de cada medio paso en vez del estado final.
 @app.route("/api/step", methods=["POST"])
 def step_model():
-    model.step()
-    fires = []
-    for y in range(model.height):
-        for x in range(model.width):
-            if model._get_fire_state(x, y) == FireState.FIRE:
-                fires.append({"row": y, "col": x})
-    agents = []
-    for agent in model.agent_list:
-        agents.append({
-            "id": agent.unique_id,
-            "x": agent.pos[0],
-            "y": agent.pos[1],
-            "role": agent.role.value if agent.role else None,
-            "knocked_out": agent.is_knocked_out()
-        })
-    return jsonify({
-        "message": "Modelo avanzado",
-        "step": model.step_count,
-        "fires": fires,
-        "agents": agents
-    })
+    if not any(key in request.values for key in ("n", "until", "frames")):
+        return jsonify(run_command("step"))
+    try:
+        until = request.values.get("until")
+        if until is not None and until not in ADVANCE_UNTIL:
+            raise ValueError(f"until debe ser uno de {', '.join(ADVANCE_UNTIL)}")
+        n = request.values.get("n")
+        n = int(n) if n is not None else (1 if until is None else None)
+        if n is not None and n < 1:
+            raise ValueError("n debe ser al menos 1")
+        frames = request.values.get("frames", "0").lower() in ("1", "true")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    return jsonify(run_command("advance", n, until, frames))
 
 
 
 if __name__ == "__main__":
-    print("Iniciando servidor de debug...")
-    print("Endpoints disponibles:")
-    print("   GET /api/fires")
-    print("   GET /api/smoke")
-    app.run(host="0.0.0.0", port=3690, debug=True)
+    # python testApi.py                       servidor de debug
+    # python testApi.py --owners default lab2 dueños de partidas para FIRE_RESCUE_SHARED=1
+    parser = argparse.ArgumentParser(description="API de Fire Rescue")
+    parser.add_argument("--owners", nargs="+", metavar="GAME",
+                        help="lanzar los procesos dueños de estas partidas (memoria compartida)")
+    parser.add_argument("--engine", default=ENGINE, choices=["mesa", "array"])
+    args = parser.parse_args()
+    if args.owners:
+        sharedState.run_owners(args.owners, COMMANDS, reset_result, args.engine, RISK_WEIGHT)
+    else:
+        print("Iniciando servidor de debug...")
+        print("Endpoints disponibles:")
+        print("   GET /api/fires")
+        print("   GET /api/smoke")
+        app.run(host="0.0.0.0", port=3690, debug=True)
 
 
 
@@ -0,0 +1,206 @@
+# Turno simultáneo del motor de arreglos (simultaneous=True): resolución de
+# conflictos de _resolve_moves, un tick de _batched_tick contra las mismas
+# acciones del turno secuencial, e invariantes del tablero (ocupación, AP,
+# fuego) que tienen que valer igual en los dos modos, también en tableros
+# grandes por copias. Las reglas que el motor reescribe con arreglos (roles,
+# humo a fuego) dan lo mismo que las de FireRescueGame.
+
+import contextlib
+import copy
+import io
+
+import numpy as np
+import pytest
+
+from arrayModel import MAX_AP, NO_POI, ArrayFireRescueModel, tiled_layout
+from fireRescueCore import FireRescueGame, FireState, POIType, create_model, grid_layout
+from policies import POLICIES
+
+
+def new_model(num_firefighters=4, seed=0, simultaneous=True, grid=grid_layout, **kwargs):
+  with contextlib.redirect_stdout(io.StringIO()):
+    return ArrayFireRescueModel(grid, num_firefighters=num_firefighters, seed=seed,
+                                simultaneous=simultaneous, policy=POLICIES["greedy"](), **kwargs)
+
+
+def place(model, positions):
+  # Mueve a los bomberos a positions sin pasar por las reglas
+  table = model.agents
+  model.occupancy[:] = 0
+  for i, (x, y) in enumerate(positions):
+    table.x[i], table.y[i] = x, y
+    model.occupancy[y, x] = i + 1
+
+
+def resolve(model, moves):
+  # moves: {índice: celda destino}; devuelve {índice: se mueve}
+  movers = np.array(sorted(moves))
+  tx = np.array([moves[i][0] for i in movers.tolist()])
+  ty = np.array([moves[i][1] for i in movers.tolist()])
+  return dict(zip(movers.tolist(), model._resolve_moves(movers, tx, ty).tolist()))
+
+
+def test_resolve_moves_same_target_lowest_index_wins():
+  model = new_model()
+  place(model, [(2, 2), (4, 2), (0, 5), (7, 5)])
+  assert resolve(model, {0: (3, 2), 1: (3, 2)}) == {0: True, 1: False}
+
+
+def test_resolve_moves_occupied_cell():
+  model = new_model()
+  place(model, [(2, 2), (3, 2), (4, 2), (7, 5)])
+  # 1 no se mueve: 0 queda bloqueado
+  assert resolve(model, {0: (3, 2)}) == {0: False}
+  # 1 se va a una celda libre: 0 entra detrás
+  assert resolve(model, {0: (3, 2), 1: (3, 3)}) == {0: True, 1: True}
+  # Cadena 0 -> 1 -> 2 con 2 quieto: se bloquean los dos
+  assert resolve(model, {0: (3, 2), 1: (4, 2)}) == {0: False, 1: False}
+  # 1 pierde su destino contra 0 y bloquea también a 2, que iba a su celda
+  place(model, [(2, 3), (3, 2), (4, 2), (7, 5)])
+  assert resolve(model, {0: (3, 3), 1: (3, 3), 2: (3, 2)}) == {0: True, 1: False, 2: False}
+
+
+@pytest.mark.parametrize("ap, state, expected_state, expected_ap", [
+  (4, FireState.FIRE, FireState.CLEAR, 2),
+  (1, FireState.FIRE, FireState.SMOKE, 0),
+  (3, FireState.SMOKE, FireState.CLEAR, 2),
+])
+def test_tick_extinguishes_like_sequential(ap, state, expected_state, expected_ap):
+  simultaneous = new_model()
+  sequential = new_model(simultaneous=False)
+  for model in (simultaneous, sequential):
+    place(model, [(6, 4), (0, 5), (7, 5), (3, 0)])
+    model._set_fire_state(6, 4, state)
+    model.agents.action_points[0] = ap
+  simultaneous._batched_tick(np.array([0]))
+  sequential.agent_list[0].extinguish_fire(6, 4)
+  for model in (simultaneous, sequential):
+    assert model._get_fire_state(6, 4) == expected_state
+    assert model.agents.action_points[0] == expected_ap
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_tick_follows_sequential_exit_field(seed):
+  # Un bombero con víctima da el mismo primer paso que move_towards_exit
+  model = new_model(seed=seed)
+  victim = next(poi for poi in model.all_pois if poi.type == POIType.VICTIM)
+  table = model.agents
+  table.carrying[0] = victim.id
+  table.target[0] = NO_POI
+  table.action_points[0] = MAX_AP
+  start = model.agent_list[0].pos
+  model._set_fire_state(*start, FireState.CLEAR)
+  step = model.exit_flow_field().next_step(start)
+  if step is None:
+    return
+  wall, direction = model._get_wall_between_cells(*start, *step)
+  empty = model.is_cell_empty(step)
+  model._refresh_fields()
+  model._batched_tick(np.array([0]))
+  assert table.action_points[0] == MAX_AP - 1 or (wall in (0, 3) and not empty)
+  if wall in (0, 3):
+    assert model.agent_list[0].pos == (step if empty else start)
+  else:
+    assert model.agent_list[0].pos == start
+    assert model.grid_data[start[1], start[0], direction] != wall
+
+
+def play(model, max_steps):
+  with contextlib.redirect_stdout(io.StringIO()):
+    while not model.is_game_over() and model.step_count < max_steps:
+      model.step()
+      yield model
+
+
+def check_invariants(model, before):
+  table = model.agents
+  n = table.count
+  xs, ys = table.x[:n], table.y[:n]
+  # Nadie comparte celda y occupancy coincide con las posiciones
+  assert np.count_nonzero(model.occupancy) == n
+  np.testing.assert_array_equal(model.occupancy[ys, xs], np.arange(n) + 1)
+  assert (table.action_points[:n] >= 0).all()
+  # A lo más MAX_AP pasos por turno
+  moved = np.abs(xs - before[0]) + np.abs(ys - before[1])
+  assert (moved <= MAX_AP).all()
+  codes = model.fire_codes()
+  assert {(int(x), int(y)) for y, x in np.argwhere(codes == FireState.FIRE.value)} == model.fire_cells
+  assert {(int(x), int(y)) for y, x in np.argwhere(codes == FireState.SMOKE.value)} == model.smoke_cells
+  if model.simultaneous:
+    # En el turno secuencial (reglas originales) dos bomberos pueden cargar la misma víctima
+    carried = table.carrying[:n][table.carrying[:n] != NO_POI].tolist()
+    assert len(set(carried)) == len(carried)
+
+
+def play_checked(model, max_steps):
+  with contextlib.redirect_stdout(io.StringIO()):
+    while not model.is_game_over() and model.step_count < max_steps:
+      n = model.agents.count
+      before = (model.agents.x[:n].copy(), model.agents.y[:n].copy())
+      model.step()
+      check_invariants(model, before)
+  return model
+
+
+@pytest.mark.parametrize("simultaneous", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_invariants_in_both_modes(simultaneous, seed):
+  model = play_checked(new_model(6, seed, simultaneous), 400)
+  assert model.step_count > 0
+
+
+def test_simultaneous_on_tiled_board():
+  grid, exits = tiled_layout(4, 4)
+  model = play_checked(new_model(40, 1, grid=grid, exits=exits, tiles=(4, 4)), 40)
+  assert model.round_count > 0
+
+
+def test_large_tiles_poi_ids():
+  # Con 60 x 60 copias hay 54000 POIs: los ids no caben en int16
+  grid, exits = tiled_layout(60, 60)
+  model = new_model(300, 0, grid=grid, exits=exits, tiles=(60, 60))
+  assert max(poi.id for poi in model.all_pois) > 2 ** 15
+  big = next(poi for poi in model.active_pois if poi.id > 2 ** 15)
+  agent = model.agent_list[0]
+  agent.target_poi = big
+  assert agent.target_poi is big
+  agent.carrying_victim = big
+  assert model.agents.carrying[0] == big.id
+  targets = {int(t) for t in model.agents.target[:300] if t != NO_POI}
+  assert targets <= {poi.id for poi in model.active_pois}
+
+
+def test_sequential_mode_does_not_log_wall_changes():
+  model = play_checked(new_model(6, 3, simultaneous=False), 400)
+  assert model.walls_version > 0
+  assert model._wall_changes == []
+
+
+@pytest.mark.parametrize("tiles, num_firefighters", [((1, 1), 5), ((2, 2), 16)])
+@pytest.mark.parametrize("risk_weight", [0, 5])
+@pytest.mark.parametrize("seed", range(3))
+def test_vectorized_rules_match_core(seed, risk_weight, tiles, num_firefighters):
+  # spread_smoke_to_fire, strategy_assign_roles y greedy_assign_roles del motor
+  # de arreglos contra los de FireRescueGame en los estados de una partida; en
+  # el tablero por copias hay pares suficientes para la versión por arreglos
+  grid, exits = tiled_layout(*tiles)
+  model = create_model(grid, engine="array", exits=exits, tiles=tiles, num_firefighters=num_firefighters,
+                       seed=seed, risk_weight=risk_weight, policy=POLICIES["estrategia"]())
+  vectorized = 0
+  for model in play(model, 150):
+    vectorized += not model._few_pairs()
+    reference = copy.deepcopy(model)
+    FireRescueGame.spread_smoke_to_fire(reference)
+    model.spread_smoke_to_fire()
+    assert model.fire_cells == reference.fire_cells
+    assert model.smoke_cells == reference.smoke_cells
+    np.testing.assert_array_equal(model.fire_values, model.fire_states.to_dense())
+
+    for assign in ("strategy_assign_roles", "greedy_assign_roles"):
+      args = (3,) if assign == "strategy_assign_roles" else ()
+      getattr(FireRescueGame, assign)(model, *args)
+      expected = (model.agents.role.copy(), model.agents.target.copy())
+      getattr(model, assign)(*args)
+      np.testing.assert_array_equal(model.agents.role, expected[0])
+      np.testing.assert_array_equal(model.agents.target, expected[1])
+  assert vectorized or tiles == (1, 1)
@@ -0,0 +1,82 @@
+# Paridad de BitboardFire con las fases de fuego del modelo de referencia: en
+# partidas con semilla y sin semilla (random.seed, fuego y POIs comparten el
+# módulo random), cada fase de fuego del motor de bitboards (con copias de
+# fire_random y poi_random) tiene que dejar el mismo fuego, humo, paredes,
+# daño y POIs que la fase del modelo.
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from bitboardFire import BitboardFire, copy_rng
+from fireRescueCore import create_model
+from policies import POLICIES
+
+
+def fire_state(model):
+  width = model.width
+  return {
+    "codes": model.fire_codes().tolist(),
+    "walls": model.grid_data.reshape(-1).tolist(),
+    "damage": model.damage_count,
+    "lost": len(model.lost_victims),
+    "pois": [(poi.id, poi.y * width + poi.x) for poi in model.active_pois],
+  }
+
+
+def bitboard_state(engine):
+  return {
+    "codes": engine.fire_codes().tolist(),
+    "walls": engine.wall_codes,
+    "damage": engine.damage_count,
+    "lost": engine.lost_victims,
+    "pois": [(poi_id, index) for poi_id, _, index in engine.active_pois],
+  }
+
+
+def check_fire_phases(model):
+  phases = 0
+  with contextlib.redirect_stdout(io.StringIO()):
+    while not model.is_game_over() and model.step_count < 600:
+      if model.phase != "FIRE":
+        model.step()
+        continue
+      engine = BitboardFire.from_model(model)
+      engine.fire_phase()
+      model.step()
+      assert bitboard_state(engine) == fire_state(model), f"fase de fuego {phases}"
+      if engine.game_over:
+        assert model.game_over and model.end_reason == engine.end_reason
+      phases += 1
+  assert phases > 0
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_fire_phases_match_model(seed):
+  check_fire_phases(create_model(seed=seed, policy=POLICIES["greedy"]()))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_fire_phases_match_unseeded_model(seed):
+  random.seed(seed)
+  model = create_model(policy=POLICIES["greedy"]())
+  assert model.fire_random is model.poi_random
+  check_fire_phases(model)
+
+
+def test_from_model_leaves_model_streams_untouched():
+  model = create_model(seed=7)
+  before = (model.fire_random.getstate(), model.poi_random.getstate())
+  engine = BitboardFire.from_model(model)
+  for _ in range(20):
+    engine.fire_phase()
+  assert (model.fire_random.getstate(), model.poi_random.getstate()) == before
+
+
+def test_copy_rng_is_independent():
+  rng = random.Random(3)
+  other = copy_rng(rng)
+  assert [other.random() for _ in range(5)] == [rng.random() for _ in range(5)]
+  assert copy_rng(random).random() == random.random()
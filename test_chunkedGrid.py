@@ -0,0 +1,45 @@
+# ChunkedGrid y FreeCells contra el recorrido completo del tablero: los bloques
+# tienen que leerse como el arreglo denso y FreeCells tiene que ser la misma
+# lista de celdas libres en orden por filas (random.choice y random.sample
+# eligen las mismas celdas).
+
+import random
+
+import numpy as np
+import pytest
+
+from chunkedGrid import ChunkedGrid, FreeCells
+
+
+def brute_force_free(width, height, taken):
+  taken = set(taken)
+  return [(x, y) for y in range(height) for x in range(width) if y * width + x not in taken]
+
+
+@pytest.mark.parametrize("width, height, count", [(8, 6, 0), (8, 6, 5), (7, 5, 34), (7, 5, 35), (33, 17, 200)])
+def test_free_cells_matches_brute_force(width, height, count):
+  rng = random.Random(width * 1000 + count)
+  taken = rng.sample(range(width * height), count) + [0] * (count > 0)
+  free = FreeCells(width, width * height, taken)
+  expected = brute_force_free(width, height, taken)
+  assert len(free) == len(expected)
+  assert list(free) == expected
+  with pytest.raises(IndexError):
+    free[len(expected)]
+  if expected:
+    assert random.Random(1).sample(free, min(3, len(free))) == random.Random(1).sample(expected, min(3, len(free)))
+
+
+def test_chunked_grid_matches_dense():
+  rng = np.random.default_rng(0)
+  grid = ChunkedGrid(37, 50, chunk_size=8)
+  dense = np.zeros((37, 50), dtype=np.int8)
+  for _ in range(2000):
+    y, x = int(rng.integers(37)), int(rng.integers(50))
+    value = int(rng.choice([0, 0, 1, 2]))
+    grid[y, x] = value
+    dense[y, x] = value
+  np.testing.assert_array_equal(grid.to_dense(), dense)
+  for key in grid.active_chunks():
+    y0, y1, x0, x1 = grid.chunk_bounds(key)
+    assert grid.counts[key] == np.count_nonzero(dense[y0:y1, x0:x1]) > 0
@@ -0,0 +1,120 @@
+# wall_hash se actualiza en walls_changed con cada daño o puerta abierta; tiene
+# que ser siempre el hash de recorrer todas las paredes. state_hash no depende
+# del motor: mesa y array dan el mismo hash en cada medio paso. check_stalemate
+# termina la partida cuando un estado se repite cycle_repeats veces o pasan
+# stall_rounds rondas sin progreso, y el progreso reinicia la cuenta.
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from arrayModel import tiled_layout
+from fireRescueCore import FireState, create_model, layout_wall_hash
+from policies import POLICIES
+
+
+def play(model, max_steps=300):
+  with contextlib.redirect_stdout(io.StringIO()):
+    while not model.is_game_over() and model.step_count < max_steps:
+      model.step()
+      yield model
+
+
+@pytest.mark.parametrize("engine", ["mesa", "array"])
+@pytest.mark.parametrize("seed", range(5))
+def test_running_wall_hash(engine, seed):
+  model = create_model(engine=engine, seed=seed, policy=POLICIES["estrategia"]())
+  assert model.wall_hash == layout_wall_hash(model.grid_data)
+  for model in play(model):
+    assert model.wall_hash == layout_wall_hash(model.grid_data)
+  assert model.walls_version > 0
+
+
+def test_running_wall_hash_simultaneous():
+  grid, exits = tiled_layout(4, 4)
+  model = create_model(grid, engine="array", exits=exits, seed=2, num_firefighters=40, simultaneous=True,
+                       tiles=(4, 4), policy=POLICIES["greedy"]())
+  for model in play(model, 60):
+    assert model.wall_hash == layout_wall_hash(model.grid_data)
+  assert model.walls_version > 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_state_hash_matches_between_engines(seed):
+  hashes = {}
+  for engine in ("mesa", "array"):
+    model = create_model(engine=engine, seed=seed, policy=POLICIES["greedy"]())
+    hashes[engine] = [model.state_hash() for model in play(model)]
+  assert hashes["mesa"] == hashes["array"]
+
+
+def quiet_model(engine="mesa"):
+  with contextlib.redirect_stdout(io.StringIO()):
+    return create_model(engine=engine, seed=1, policy=POLICIES["greedy"]())
+
+
+def check(model):
+  with contextlib.redirect_stdout(io.StringIO()):
+    model.check_stalemate()
+
+
+@pytest.mark.parametrize("engine", ["mesa", "array"])
+def test_repeated_state_stalls_after_cycle_repeats(engine):
+  model = quiet_model(engine)
+  model.cycle_repeats = 3
+  check(model)
+  check(model)
+  assert not model.game_over
+  check(model)
+  assert model.stalled and model.game_over and not model.game_won
+  assert "3 veces" in model.end_reason
+
+
+def test_progress_resets_cycle_count():
+  model = quiet_model()
+  model.cycle_repeats = 3
+  check(model)
+  check(model)
+  model.damage_count += 1
+  check(model)
+  check(model)
+  assert not model.game_over
+  check(model)
+  assert model.stalled
+
+
+def test_stall_rounds_without_repeated_state():
+  model = quiet_model()
+  model.stall_rounds = 4
+  cells = [(x, 5) for x in range(model.width)]
+  check(model)
+  for x, y in cells[:4]:
+    # Estados distintos (humo en otra celda) sin progreso
+    model._set_fire_state(x, y, FireState.SMOKE)
+    assert not model.game_over
+    check(model)
+  assert model.stalled
+  assert "4 rondas" in model.end_reason
+
+
+def test_state_hash_changes_with_fire_and_walls():
+  model = quiet_model()
+  seen = {model.state_hash()}
+  model._set_fire_state(7, 5, FireState.SMOKE)
+  seen.add(model.state_hash())
+  model._set_fire_state(7, 5, FireState.CLEAR)
+  assert model.state_hash() in seen
+  y, x, direction = next(zip(*np.nonzero(model.grid_data == 2)))
+  model.damage_wall(int(x), int(y), int(direction))
+  seen.add(model.state_hash())
+  assert len(seen) == 3
+
+
+def test_stall_rounds_zero_disables_check():
+  model = quiet_model()
+  model.stall_rounds = 0
+  for _ in range(10):
+    check(model)
+  assert not model.game_over
@@ -0,0 +1,61 @@
+# El mapa de riesgo incremental (FireRiskMap.update, que solo recalcula la zona
+# alrededor de los cambios) tiene que dar lo mismo que recalcular el tablero
+# completo con ignition_risk, en partidas reales y en tableros grandes.
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from arrayModel import tiled_layout
+from fireRescueCore import create_model
+from fireRisk import FireRiskMap, ignition_risk
+from policies import POLICIES
+
+
+def assert_matches_full(model):
+  risk = model.fire_risk()
+  full = ignition_risk(model.fire_codes(), model.grid_data, model.risk_map.horizon)
+  np.testing.assert_allclose(risk, full, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["mesa", "array"])
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_risk_matches_full_recompute(engine, seed):
+  model = create_model(engine=engine, seed=seed, policy=POLICIES["greedy"](), risk_weight=4)
+  assert model.risk_weight == 4
+  with contextlib.redirect_stdout(io.StringIO()):
+    assert_matches_full(model)
+    while not model.is_game_over() and model.step_count < 300:
+      model.step()
+      assert_matches_full(model)
+
+
+def test_incremental_risk_on_large_board():
+  # En un tablero grande los cambios quedan lejos de los bordes y se usa la ventana
+  grid, exits = tiled_layout(6, 6)
+  model = create_model(grid, engine="array", exits=exits, seed=3, policy=POLICIES["greedy"](), risk_weight=4,
+                       tiles=(6, 6))
+  assert model.damage_limit == 36 * 24 and len(model.active_pois) == 36 * 3
+  with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(120):
+      if model.is_game_over():
+        break
+      model.step()
+      assert_matches_full(model)
+
+
+def test_update_with_random_changes():
+  rng = np.random.default_rng(0)
+  codes = rng.choice([0, 0, 0, 1, 2], size=(40, 50)).astype(np.int8)
+  walls = rng.choice([0, 0, 1, 2, 3, 4], size=(40, 50, 4)).astype(np.int8)
+  risk_map = FireRiskMap(horizon=3)
+  risk_map.update(codes, walls)
+  for _ in range(30):
+    codes = codes.copy()
+    walls = walls.copy()
+    y, x = rng.integers(40), rng.integers(50)
+    codes[y, x] = rng.integers(3)
+    walls[rng.integers(40), rng.integers(50), rng.integers(4)] = rng.integers(5)
+    np.testing.assert_allclose(risk_map.update(codes, walls), ignition_risk(codes, walls, 3), rtol=0, atol=1e-12)
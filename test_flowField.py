@@ -0,0 +1,106 @@
+# Campos de flujo contra una búsqueda independiente: relajar hasta punto fijo
+# el costo de moverse de cada celda a su vecina (pared propia en esa dirección,
+# MOVE_COSTS) tiene que dar las mismas distancias que FlowField, y cada
+# next_step baja la distancia exactamente el costo del paso.
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from fireRescueCore import create_model
+from flowField import DIRECTIONS, MOVE_COSTS, OPPOSITE, FlowField
+from policies import POLICIES
+
+
+def reference_costs(grid, targets):
+  height, width = grid.shape[:2]
+  cost = np.full((height, width), np.inf)
+  for x, y in targets:
+    cost[y, x] = 0
+  changed = True
+  while changed:
+    changed = False
+    for y in range(height):
+      for x in range(width):
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+          nx, ny = x + dx, y + dy
+          if 0 <= nx < width and 0 <= ny < height and grid[y, x, direction] in MOVE_COSTS:
+            candidate = cost[ny, nx] + MOVE_COSTS[grid[y, x, direction]]
+            if candidate < cost[y, x]:
+              cost[y, x] = candidate
+              changed = True
+  return cost
+
+
+def check_field(field, grid):
+  np.testing.assert_array_equal(field.cost, reference_costs(grid, field.targets))
+  height, width = grid.shape[:2]
+  for y in range(height):
+    for x in range(width):
+      step = field.next_step((x, y))
+      if field.cost[y, x] == 0 or np.isinf(field.cost[y, x]):
+        assert step is None
+        continue
+      direction = DIRECTIONS.index((step[0] - x, step[1] - y))
+      assert field.distance(step) + MOVE_COSTS[grid[y, x, direction]] == field.cost[y, x]
+
+
+def set_wall(grid, x, y, direction, value):
+  # Pone la pared en las dos celdas que separa
+  dx, dy = DIRECTIONS[direction]
+  grid[y, x, direction] = value
+  grid[y + dy, x + dx, OPPOSITE[direction]] = value
+
+
+def small_board():
+  # 6 x 4 (cabe el escenario inicial) con una pared entera, una dañada, una
+  # puerta cerrada y una abierta
+  grid = np.zeros((4, 6, 4), dtype=np.int8)
+  for y in range(4):
+    set_wall(grid, 1, y, 1, 2)
+  set_wall(grid, 1, 2, 1, 4)
+  set_wall(grid, 3, 0, 2, 1)
+  set_wall(grid, 3, 1, 2, 2)
+  set_wall(grid, 3, 2, 1, 3)
+  set_wall(grid, 2, 3, 1, 2)
+  set_wall(grid, 4, 1, 1, 4)
+  set_wall(grid, 4, 2, 1, 2)
+  return grid
+
+
+@pytest.mark.parametrize("engine", ["mesa", "array"])
+@pytest.mark.parametrize("exits", [[(0, 0)], [(5, 3)], [(0, 3), (5, 0)]])
+def test_small_board_matches_reference(engine, exits):
+  with contextlib.redirect_stdout(io.StringIO()):
+    model = create_model(small_board(), engine=engine, exits=exits, seed=0, policy=POLICIES["greedy"]())
+  check_field(model.exit_flow_field(), model.grid_data)
+
+
+def test_stop_at_is_exact_up_to_limit():
+  grid = small_board()
+  full = FlowField(grid, [(0, 0)])
+  field = FlowField(grid, [(0, 0)], stop_at=[(2, 1)])
+  reached = field.cost <= field.limit
+  assert reached[1, 2]
+  np.testing.assert_array_equal(field.cost[reached], full.cost[reached])
+
+
+def test_exit_flow_field_follows_wall_changes():
+  with contextlib.redirect_stdout(io.StringIO()):
+    model = create_model(seed=0, policy=POLICIES["greedy"]())
+  field = model.exit_flow_field()
+  check_field(field, model.grid_data)
+  assert model.exit_flow_field() is field
+
+  # Una puerta cerrada que se abre y una pared que se daña cambian el campo
+  y, x, direction = next(zip(*np.nonzero(model.grid_data == 4)))
+  model.grid_data[y, x, direction] = 3
+  model.walls_changed(x, y, direction, 4)
+  y, x, direction = next(zip(*np.nonzero(model.grid_data == 2)))
+  with contextlib.redirect_stdout(io.StringIO()):
+    model.damage_wall(x, y, direction)
+  field = model.exit_flow_field()
+  assert field.version == model.walls_version
+  check_field(field, model.grid_data)
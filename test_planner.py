@@ -0,0 +1,120 @@
+# TurnPlanner: la tabla de transposición evalúa una sola vez cada estado a la
+# misma profundidad restante aunque se llegue por órdenes distintos, y da el
+# mismo valor que la búsqueda sin tabla. Ningún plan gasta más AP de los que
+# tiene el bombero.
+
+import collections
+import contextlib
+import io
+
+import pytest
+
+from fireRescueCore import FireState, create_model
+from planner import CHOP, EXTINGUISH, MOVE, OPEN, PASSABLE, REVEAL, DIRECTIONS, TurnPlanner
+from policies import POLICIES
+
+
+class CountingPlanner(TurnPlanner):
+  # Cuenta las evaluaciones por (hash, profundidad restante) y los aciertos de la tabla
+  def _setup(self, agent):
+    super()._setup(agent)
+    self.evaluated = collections.Counter()
+    self.hits = 0
+
+  def _search(self, depth):
+    entry = self.table.get(self.hash)
+    if entry is not None and entry[0] >= depth:
+      self.hits += 1
+    self.depth = depth
+    return super()._search(depth)
+
+  def _evaluate(self):
+    self.evaluated[(self.hash, self.depth)] += 1
+    return super()._evaluate()
+
+
+class NoTable(dict):
+  def __setitem__(self, key, value):
+    pass
+
+
+class NoTablePlanner(CountingPlanner):
+  def _setup(self, agent):
+    super()._setup(agent)
+    self.table = NoTable()
+
+
+def new_model(seed):
+  with contextlib.redirect_stdout(io.StringIO()):
+    return create_model(seed=seed, policy=POLICIES["estrategia"]())
+
+
+def search(planner, agent, depth):
+  planner._setup(agent)
+  planner.deadline = float('inf')
+  return planner._search(depth)
+
+
+def smoke_around(model, agent):
+  # Humo en la celda del bombero y en una vecina sin pared: apagar las dos en
+  # cualquier orden lleva al mismo estado
+  x, y = agent.pos
+  for direction, (dx, dy) in enumerate(DIRECTIONS):
+    nx, ny = x + dx, y + dy
+    if 0 <= nx < model.width and 0 <= ny < model.height and model.grid_data[y, x, direction] in PASSABLE:
+      model._set_fire_state(x, y, FireState.SMOKE)
+      model._set_fire_state(nx, ny, FireState.SMOKE)
+      return True
+  return False
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_transposition_evaluates_repeated_state_once(seed):
+  model = new_model(seed)
+  agent = model.agent_list[0]
+  assert smoke_around(model, agent)
+  agent.action_points = 4
+  planner = CountingPlanner()
+  value, plan = search(planner, agent, 4)
+  assert planner.hits > 0
+  assert max(planner.evaluated.values()) == 1
+
+  reference = NoTablePlanner()
+  assert search(reference, agent, 4)[0] == value
+  assert sum(reference.evaluated.values()) > sum(planner.evaluated.values())
+
+
+def plan_cost(model, plan, ap):
+  # Costo en AP de un plan con las reglas del juego, sin tocar el modelo
+  fires = {}
+  cost = 0
+  for action in plan:
+    assert action[0] in (MOVE, CHOP, OPEN, EXTINGUISH, REVEAL)
+    if action[0] == EXTINGUISH:
+      _, x, y = action
+      state = fires.get((x, y), model.fire_states[y, x].value)
+      if state == FireState.FIRE.value and ap - cost >= 2:
+        fires[(x, y)] = FireState.CLEAR.value
+        cost += 2
+        continue
+      fires[(x, y)] = state - 1
+    cost += 1
+  return cost
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_plan_never_exceeds_action_points(seed):
+  model = new_model(seed)
+  planner = TurnPlanner(time_budget=0.002)
+  plans = 0
+  with contextlib.redirect_stdout(io.StringIO()):
+    while not model.is_game_over() and model.step_count < 40:
+      # Cada bombero recupera sus AP al empezar su turno (reset_ap)
+      for agent in model.agent_list:
+        for ap in range(1, 9):
+          agent.action_points = ap
+          plan = planner.plan(agent)
+          assert plan_cost(model, plan, ap) <= ap
+          plans += bool(plan)
+      model.step()
+  assert plans > 0
@@ -0,0 +1,90 @@
+# resultStore: llaves por contenido (mismo layout, configuración, política,
+# semilla y MODEL_VERSION dan la misma llave), get_many / put_many / summary
+# sobre una base temporal, y el torneo reutilizando solo las partidas de
+# políticas reproducibles.
+
+import numpy as np
+import pytest
+
+import tournament
+from fireRescueCore import EXITS, MODEL_VERSION, grid_layout
+from resultStore import OUTCOMES, ResultStore, game_key, layout_key
+
+CONFIG = {"engine": "array", "max_steps": 2000}
+
+
+def outcome(value):
+  return {name: value for name in OUTCOMES}
+
+
+@pytest.fixture
+def store(tmp_path):
+  with ResultStore(str(tmp_path / "results.sqlite")) as store:
+    yield store
+
+
+def test_keys_are_content_addressed():
+  layout = layout_key(grid_layout, EXITS)
+  assert layout == layout_key(np.array(grid_layout), list(EXITS))
+  damaged = np.array(grid_layout)
+  damaged[0, 0, 0] = 0
+  assert layout_key(damaged, EXITS) != layout
+  assert layout_key(grid_layout, EXITS[:1]) != layout
+
+  key = game_key(layout, CONFIG, "greedy", 3)
+  assert key == game_key(layout, dict(reversed(list(CONFIG.items()))), "greedy", 3)
+  others = [
+    game_key(layout, CONFIG, "greedy", 4),
+    game_key(layout, CONFIG, "random", 3),
+    game_key(layout, {**CONFIG, "max_steps": 100}, "greedy", 3),
+    game_key(layout, CONFIG, "greedy", 3, MODEL_VERSION + 1),
+  ]
+  assert key not in others and len(set(others)) == len(others)
+
+
+def test_put_and_get_many(store):
+  layout = layout_key(grid_layout, EXITS)
+  keys = [game_key(layout, CONFIG, "greedy", seed) for seed in range(1200)]
+  rounds = [{"fires": 1, "smoke": 2, "damage": 3, "rescued": 0, "lost_victims": 0}] * 2
+  store.put_many([(key, layout, CONFIG, "greedy", seed, outcome(seed % 2), rounds if seed == 0 else None)
+                  for seed, key in enumerate(keys[:1000])])
+  # Más de 500 llaves: get_many consulta por tandas
+  found = store.get_many(keys)
+  assert set(found) == set(keys[:1000])
+  assert found[keys[1]] == outcome(1)
+  assert store.get_many([game_key(layout, CONFIG, "random", 0)]) == {}
+  assert store.round_metrics(keys[0]) == rounds
+  assert store.round_metrics(keys[1]) == []
+
+  # Volver a guardar la misma llave la reemplaza
+  store.put_many([(keys[0], layout, CONFIG, "greedy", 0, outcome(5), None)])
+  assert store.get_many([keys[0]])[keys[0]] == outcome(5)
+
+
+def test_summary(store):
+  layout = layout_key(grid_layout, EXITS)
+  games = [(game_key(layout, CONFIG, policy, seed), layout, CONFIG, policy, seed, outcome(value), None)
+           for policy, values in (("greedy", [0, 1, 1, 0]), ("random", [1, 1]))
+           for seed, value in enumerate(values)]
+  store.put_many(games)
+  rows = {row["policy"]: row for row in store.summary()}
+  assert rows["greedy"]["games"] == 4 and rows["greedy"]["won"] == 0.5
+  assert rows["random"]["games"] == 2 and rows["random"]["damage"] == 1.0
+  assert [row["policy"] for row in store.summary(policies=["random"])] == ["random"]
+  assert store.summary(config={"engine": "mesa"}) == []
+  assert store.summary(model_version=MODEL_VERSION + 1) == []
+
+
+def test_tournament_reuses_only_reproducible_policies(store, capsys):
+  names = ["greedy", "planner"]
+  first = tournament.run_tournament(names, games=2, max_steps=12, store=store, workers=1)
+  assert "0 partidas reutilizadas, 2 nuevas" in capsys.readouterr().out
+  assert {row["policy"] for row in store.summary()} == {"greedy"}
+
+  second = tournament.run_tournament(names, games=2, max_steps=12, store=store, workers=1)
+  out = capsys.readouterr().out
+  assert "2 partidas reutilizadas, 0 nuevas" in out
+  assert "planner no reproducible" in out
+  assert [game["greedy"] for game in second] == [game["greedy"] for game in first]
+  assert all("planner" in game for game in second)
+  assert store.summary()[0]["games"] == 2
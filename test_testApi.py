@@ -0,0 +1,157 @@
+# API de testApi con el cliente de prueba de Flask: /api/step con varios medios
+# pasos (n, until, frames) y las razones de parada, y los ETag por vista
+# (304 con If-None-Match, versiones que solo suben en la vista que cambió).
+
+import contextlib
+import io
+
+import pytest
+
+import testApi
+from fireRescueCore import create_model
+from policies import POLICIES
+
+
+@pytest.fixture
+def client():
+  testApi.model = create_model(seed=4, policy=POLICIES["greedy"]())
+  testApi._view_cache.clear()
+  with contextlib.redirect_stdout(io.StringIO()):
+    yield testApi.app.test_client()
+  testApi.model = None
+
+
+def advance(client, **params):
+  response = client.post("/api/step", data=params)
+  assert response.status_code == 200
+  return response.get_json()
+
+
+def test_step_n_with_frames(client):
+  model = testApi.model
+  fires = set(model.fire_cells)
+  start = model.step_count
+  result = advance(client, n=6, frames=1)
+  assert (result["steps"], result["stopped"], result["step"]) == (6, "n", start + 6)
+  frames = result["frames"]
+  assert [frame["step"] for frame in frames] == list(range(start + 1, start + 7))
+  # Los cambios de cada cuadro reconstruyen el fuego final
+  for frame in frames:
+    diff = frame.get("fires", {"add": [], "remove": []})
+    fires -= {(cell["col"], cell["row"]) for cell in diff["remove"]}
+    fires |= {(cell["col"], cell["row"]) for cell in diff["add"]}
+  assert fires == model.fire_cells
+
+
+def test_step_n_without_frames_returns_state(client):
+  result = advance(client, n=3)
+  assert result["stopped"] == "n"
+  assert "frames" not in result
+  assert {cell["col"] for cell in result["fires"]} == {x for x, _ in testApi.model.fire_cells}
+  assert result["gameState"]["phase"] == testApi.model.phase
+
+
+def test_until_round_end(client):
+  result = advance(client, until="round_end")
+  model = testApi.model
+  assert result["stopped"] == "round_end"
+  assert model.phase == "AGENT" and model.current_agent_index == 0
+
+
+def test_until_game_over(client, monkeypatch):
+  monkeypatch.setattr(testApi, "MAX_ADVANCE_STEPS", 5000)
+  monkeypatch.setattr(testApi, "MAX_ADVANCE_SECONDS", 60.0)
+  result = advance(client, until="game_over")
+  assert result["stopped"] == "game_over"
+  assert testApi.model.game_over
+  again = advance(client, n=2)
+  assert (again["steps"], again["stopped"]) == (0, "game_over")
+
+
+def test_server_cap_is_reported_as_limit(client, monkeypatch):
+  monkeypatch.setattr(testApi, "MAX_ADVANCE_STEPS", 3)
+  # Sin n, el tope del servidor es lo que para: no es "n"
+  result = advance(client, until="game_over")
+  assert (result["steps"], result["stopped"]) == (3, "limit")
+  result = advance(client, n=10)
+  assert (result["steps"], result["stopped"]) == (3, "limit")
+  result = advance(client, n=3)
+  assert (result["steps"], result["stopped"]) == (3, "n")
+
+
+def test_time_cap_is_reported_as_limit(client, monkeypatch):
+  monkeypatch.setattr(testApi, "MAX_ADVANCE_SECONDS", 0.0)
+  result = advance(client, n=4)
+  assert (result["steps"], result["stopped"]) == (0, "limit")
+
+
+@pytest.mark.parametrize("params", [{"n": 0}, {"n": "abc"}, {"until": "forever"}, {"n": -2, "until": "round_end"}])
+def test_step_bad_input(client, params):
+  step = testApi.model.step_count
+  response = client.post("/api/step", data=params)
+  assert response.status_code == 400
+  assert response.get_json()["success"] is False
+  assert testApi.model.step_count == step
+
+
+# --- ETag / 304 por vista ---
+
+VIEWS = ("fires", "smoke", "agents", "pois", "gamestate", "risk")
+
+
+def etags(client):
+  return {view: client.get(f"/api/{view}").headers["ETag"] for view in VIEWS}
+
+
+def test_matching_etag_returns_304(client):
+  for view in VIEWS:
+    response = client.get(f"/api/{view}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    cached = client.get(f"/api/{view}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b""
+    assert cached.headers["ETag"] == etag
+    assert client.get(f"/api/{view}", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_mutation_bumps_only_its_view(client):
+  model = testApi.model
+  poi = next(poi for poi in model.active_pois if not poi.revealed)
+  before = dict(model.state_versions)
+  old = etags(client)
+  response = client.post("/api/reveal_poi", data={"x": poi.x, "y": poi.y})
+  assert response.get_json()["success"]
+  changed = {view for view in VIEWS if model.state_versions[view] != before[view]}
+  # Una falsa alarma repone un POI y reasigna roles (agents); fuego, humo,
+  # riesgo y estado del juego no cambian
+  assert "pois" in changed and changed <= {"pois", "agents"}
+  new = etags(client)
+  assert {view for view in VIEWS if new[view] != old[view]} == changed
+  assert client.get("/api/pois", headers={"If-None-Match": old["pois"]}).status_code == 200
+
+
+def test_unchanged_view_keeps_etag_after_step(client):
+  model = testApi.model
+  unchanged_seen = False
+  for _ in range(20):
+    before = dict(model.state_versions)
+    old = etags(client)
+    client.post("/api/step")
+    new = etags(client)
+    for view in VIEWS:
+      if model.state_versions[view] == before[view]:
+        unchanged_seen = True
+        assert new[view] == old[view]
+        assert client.get(f"/api/{view}", headers={"If-None-Match": old[view]}).status_code == 304
+      else:
+        assert new[view] != old[view]
+  assert unchanged_seen
+  assert new["gamestate"] != old["gamestate"]
+
+
+def test_reset_changes_every_etag(client):
+  old = etags(client)
+  client.post("/api/reset")
+  new = etags(client)
+  assert all(new[view] != old[view] for view in VIEWS)
@@ -0,0 +1,70 @@
+# El formato binario es un contrato con stateDecoder.cs: para cada vista, lo que
+# decodifica el decodificador de referencia tiene que coincidir con el JSON que
+# sirve la API para el mismo estado.
+
+import contextlib
+import io
+
+import pytest
+
+import testApi
+import wireFormat
+from fireRescueCore import create_model
+from policies import POLICIES
+
+BINARY = {"Accept": wireFormat.MIME_TYPE}
+
+
+def fetch(client, path):
+  as_json = client.get(path).get_json()
+  response = client.get(path, headers=BINARY)
+  assert response.mimetype == wireFormat.MIME_TYPE
+  return as_json, response.get_data()
+
+
+def game_states(engine, seed):
+  # Estado inicial, algunos medios pasos intermedios y el final de la partida
+  model = create_model(engine=engine, seed=seed, policy=POLICIES["greedy"]())
+  yield model
+  while not model.is_game_over() and model.step_count < 400:
+    model.step()
+    if model.step_count % 7 == 0:
+      yield model
+  yield model
+
+
+@pytest.mark.parametrize("engine", ["mesa", "array"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_binary_views_match_json(engine, seed):
+  client = testApi.app.test_client()
+  encodings = set()
+  with contextlib.redirect_stdout(io.StringIO()):
+    for model in game_states(engine, seed):
+      testApi.model = model
+
+      for view in ("fires", "smoke"):
+        as_json, data = fetch(client, f"/api/{view}")
+        kind, encoding, width, height, _ = wireFormat.read_header(data)
+        assert (width, height) == (model.width, model.height)
+        assert kind == (wireFormat.KIND_FIRES if view == "fires" else wireFormat.KIND_SMOKE)
+        encodings.add(encoding)
+        expected = [(cell["col"], cell["row"]) for cell in as_json[view]]
+        assert wireFormat.unpack_cells(data) == expected
+
+      as_json, data = fetch(client, "/api/agents")
+      decoded = wireFormat.unpack_agents(data)
+      assert [{key: agent[key] for key in as_json["agents"][0]} for agent in decoded] == as_json["agents"]
+      assert [agent["carrying"] for agent in decoded] == [bool(agent.carrying_victim) for agent in model.agent_list]
+
+      as_json, data = fetch(client, "/api/pois")
+      decoded = wireFormat.unpack_pois(data)
+      assert [poi.pop("id") for poi in decoded] == [poi.id for poi in model.active_pois]
+      assert decoded == as_json["pois"]
+
+      as_json, data = fetch(client, "/api/gamestate")
+      decoded = wireFormat.unpack_gamestate(data)
+      assert decoded.pop("step") == model.step_count
+      assert decoded == as_json["gameState"]
+  testApi.model = None
+  # Las partidas pasan por las dos codificaciones de celdas
+  assert encodings == {wireFormat.ENCODING_BITMASK, wireFormat.ENCODING_RUNS}
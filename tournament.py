@@ -0,0 +1,178 @@
+# Torneo de políticas con números aleatorios comunes (CRN).
+# Cada semilla se juega una vez con cada política; como el fuego y los POIs
+# usan generadores propios (FireRescueGame._seed_streams), todas las políticas
+# enfrentan la misma secuencia de incendios y de POIs. Se comparan diferencias
+# pareadas por semilla contra la política base, cuya varianza es menor
+# que la de dos lotes independientes.
+#
+# Con --store las partidas se guardan en resultStore y al repetir el torneo
+# solo se juegan las combinaciones (política, semilla) que faltan. Las
+# políticas no reproducibles (Policy.reproducible, p. ej. planner con su plazo
+# de tiempo) se juegan siempre y no se guardan.
+#
+#   python tournament.py --games 400 --policies greedy estrategia random
+#   python tournament.py --games 400 --store results.sqlite
+#   python tournament.py --games 400 --risk-weight 4     (caminos y POIs según el riesgo de fuego)
+
+import argparse
+import contextlib
+import math
+import os
+import statistics
+from multiprocessing import Pool
+
+from fireRescueCore import CYCLE_REPEATS, EXITS, STALL_ROUNDS, create_model, grid_layout
+from policies import POLICIES
+from resultStore import OUTCOMES, ResultStore, game_key, layout_key
+
+METRICS = OUTCOMES
+
+def play_game(policy_name, seed, engine="array", max_steps=2000, record_rounds=False, risk_weight=0):
+  # Con record_rounds el resultado trae "rounds": fuego, humo, daño y víctimas al cerrar cada ronda
+  model = create_model(engine=engine, seed=seed, policy=POLICIES[policy_name](), risk_weight=risk_weight)
+  rounds = []
+  while not model.is_game_over() and model.step_count < max_steps:
+    model.step()
+    if record_rounds and model.phase == "AGENT" and model.current_agent_index == 0:
+      rounds.append({
+        "fires": len(model.fire_cells),
+        "smoke": len(model.smoke_cells),
+        "damage": model.damage_count,
+        "rescued": len(model.rescued_victims),
+        "lost_victims": len(model.lost_victims),
+      })
+  outcome = {
+    "won": int(model.game_won),
+    "rescued": len(model.rescued_victims),
+    "lost_victims": len(model.lost_victims),
+    "damage": model.damage_count,
+    "steps": model.step_count,
+    "stalled": int(model.stalled),
+    "timeout": int(not model.is_game_over()),
+  }
+  if record_rounds:
+    outcome["rounds"] = rounds
+  return outcome
+
+def play_seed(task):
+  # Todas las políticas sobre la misma semilla, en el mismo proceso
+  policy_names, seed, engine, max_steps, record_rounds, risk_weight = task
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    return seed, {name: play_game(name, seed, engine, max_steps, record_rounds, risk_weight)
+                  for name in policy_names}
+
+def run_tournament(policy_names, games=200, engine="array", max_steps=2000, base_seed=0, workers=None,
+                   store=None, record_rounds=False, risk_weight=0):
+  # Con store (ResultStore) se reutilizan las partidas guardadas y se guardan las nuevas
+  seeds = range(base_seed, base_seed + games)
+  layout = layout_key(grid_layout, EXITS)
+  config = {"engine": engine, "max_steps": max_steps, "stall_rounds": STALL_ROUNDS, "cycle_repeats": CYCLE_REPEATS}
+  if risk_weight:
+    # Solo si se usa, para que las llaves de las partidas sin riesgo no cambien
+    config["risk_weight"] = risk_weight
+  reusable = [name for name in policy_names if POLICIES[name].reproducible]
+  keys = {(name, seed): game_key(layout, config, name, seed) for seed in seeds for name in reusable}
+  stored = store.get_many(keys.values()) if store else {}
+
+  results = {seed: {} for seed in seeds}
+  tasks = []
+  for seed in seeds:
+    missing = []
+    for name in policy_names:
+      outcome = stored.get(keys.get((name, seed)))
+      if outcome is None:
+        missing.append(name)
+      else:
+        results[seed][name] = outcome
+    if missing:
+      tasks.append((tuple(missing), seed, engine, max_steps, record_rounds, risk_weight))
+
+  new_games = []
+  if tasks:
+    with Pool(processes=workers) as pool:
+      for seed, played in pool.imap_unordered(play_seed, tasks, chunksize=max(1, len(tasks) // 64)):
+        for name, outcome in played.items():
+          rounds = outcome.pop("rounds", None)
+          results[seed][name] = outcome
+          if (name, seed) in keys:
+            new_games.append((keys[(name, seed)], layout, config, name, seed, outcome, rounds))
+  if store:
+    store.put_many(new_games)
+    print(f"Almacén {store.path}: {len(keys) - len(new_games)} partidas reutilizadas, {len(new_games)} nuevas"
+          + "".join(f", {name} no reproducible (sin guardar)" for name in policy_names if name not in reusable))
+  return [results[seed] for seed in seeds]
+
+def paired_difference(results, policy, baseline, metric, confidence=0.95):
+  # Media de (policy - baseline) por semilla con intervalo de confianza normal.
+  # "efficiency" es cuántas veces más partidas necesitaría una comparación con
+  # lotes independientes para el mismo ancho de intervalo.
+  diffs = [game[policy][metric] - game[baseline][metric] for game in results]
+  n = len(diffs)
+  mean = statistics.fmean(diffs)
+  sd = statistics.stdev(diffs) if n > 1 else 0.0
+  z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+  half_width = z * sd / math.sqrt(n) if n else 0.0
+
+  unpaired_var = 0.0
+  if n > 1:
+    unpaired_var = (statistics.variance([game[policy][metric] for game in results])
+                    + statistics.variance([game[baseline][metric] for game in results]))
+  if sd > 0:
+    efficiency = unpaired_var / sd ** 2
+  else:
+    efficiency = 1.0 if unpaired_var == 0 else float("inf")
+
+  return {
+    "mean": mean,
+    "low": mean - half_width,
+    "high": mean + half_width,
+    "significant": half_width < abs(mean),
+    "efficiency": efficiency,
+  }
+
+def print_report(results, policy_names, baseline, confidence=0.95):
+  print(f"\n{'='*60}")
+  print(f"TORNEO: {len(results)} semillas, base = {baseline}")
+  print(f"{'='*60}")
+
+  print(f"\n{'política':<12}" + "".join(f"{metric:>14}" for metric in METRICS))
+  for name in policy_names:
+    means = [statistics.fmean(game[name][metric] for game in results) for metric in METRICS]
+    print(f"{name:<12}" + "".join(f"{mean:>14.3f}" for mean in means))
+
+  for name in policy_names:
+    if name == baseline:
+      continue
+    print(f"\n{name} - {baseline} (IC {confidence:.0%}, pareado por semilla):")
+    for metric in METRICS:
+      diff = paired_difference(results, name, baseline, metric, confidence)
+      mark = "*" if diff["significant"] else " "
+      print(f"  {metric:<13} {diff['mean']:>+9.3f}  [{diff['low']:+.3f}, {diff['high']:+.3f}] {mark}"
+            f"  eficiencia CRN x{diff['efficiency']:.1f}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Torneo de políticas con números aleatorios comunes")
+  parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+  parser.add_argument("--baseline", default="greedy", choices=list(POLICIES))
+  parser.add_argument("--games", type=int, default=200)
+  parser.add_argument("--engine", default="array", choices=["array", "mesa"])
+  parser.add_argument("--max-steps", type=int, default=2000)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--workers", type=int, default=None)
+  parser.add_argument("--confidence", type=float, default=0.95)
+  parser.add_argument("--store", help="base SQLite de resultStore para reutilizar partidas")
+  parser.add_argument("--round-metrics", action="store_true", help="guardar métricas por ronda en el almacén")
+  parser.add_argument("--risk-weight", type=float, default=0,
+                      help="peso del riesgo de fuego en caminos y POIs (0 = modelo original)")
+  args = parser.parse_args()
+
+  names = list(dict.fromkeys([args.baseline] + args.policies))
+  store = ResultStore(args.store) if args.store else None
+  try:
+    results = run_tournament(names, args.games, args.engine, args.max_steps, args.seed, args.workers,
+                             store, args.round_metrics, args.risk_weight)
+  finally:
+    if store:
+      store.close()
+  print_report(results, names, args.baseline, args.confidence)
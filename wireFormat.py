@@ -0,0 +1,198 @@
+# Formato binario compacto para las vistas de estado de la API.
+# Se pide con "Accept: application/x-fire-rescue"; sin ese header la API sigue
+# respondiendo JSON. Todos los enteros son little-endian.
+#
+# Encabezado (14 bytes, igual para todas las vistas):
+#   0  char[4] magic    "FRS1"
+#   4  u8      kind     1 = fires, 2 = smoke, 3 = agents, 4 = pois, 5 = gamestate
+#   5  u8      encoding 0 = registros fijos, 1 = bitmask, 2 = corridas por fila
+#   6  u16     width
+#   8  u16     height
+#   10 u32     count    celdas (bitmask), corridas (runs) o registros
+#
+# fires / smoke, encoding 1 (bitmask): height filas de (width + 7) / 8 bytes.
+#   La celda (x, y) está encendida si data[14 + y * rowBytes + x / 8] tiene el
+#   bit (x % 8) en 1 (bit 0 = menos significativo).
+# fires / smoke, encoding 2 (corridas): count registros de 6 bytes
+#   u16 row, u16 col, u16 length; celdas (col .. col + length - 1) de la fila row.
+#   El servidor elige la codificación más corta.
+#
+# agents (8 bytes por registro):
+#   u16 id, u16 x, u16 y, u8 role (0 = ninguno, 1 = rescuer, 2 = extinguisher),
+#   u8 flags (bit 0 = knocked_out, bit 1 = cargando víctima)
+# pois (8 bytes por registro):
+#   u16 id, u16 x, u16 y, u8 type (1 = victim, 2 = false_alarm),
+#   u8 flags (bit 0 = revealed)
+# gamestate (count = 1, 16 bytes + texto):
+#   u8 phase (0 = AGENT, 1 = FIRE), u8 flags (bit 0 = gameOver, bit 1 = gameWon),
+#   u16 currentAgent, u16 damageCount, u16 reserved, u32 roundCount, u32 step,
+#   y después u16 largo + endReason en UTF-8.
+#
+# El decodificador de Unity está en stateDecoder.cs.
+
+import struct
+import numpy as np
+
+from fireRescueCore import POIType, ROLE_VALUES
+
+MIME_TYPE = "application/x-fire-rescue"
+MAGIC = b"FRS1"
+
+KIND_FIRES = 1
+KIND_SMOKE = 2
+KIND_AGENTS = 3
+KIND_POIS = 4
+KIND_GAMESTATE = 5
+
+ENCODING_RECORDS = 0
+ENCODING_BITMASK = 1
+ENCODING_RUNS = 2
+
+HEADER = struct.Struct("<4sBBHHI")
+GAMESTATE = struct.Struct("<BBHHHII")
+
+AGENT_RECORD = np.dtype([("id", "<u2"), ("x", "<u2"), ("y", "<u2"), ("role", "u1"), ("flags", "u1")])
+POI_RECORD = np.dtype([("id", "<u2"), ("x", "<u2"), ("y", "<u2"), ("type", "u1"), ("flags", "u1")])
+RUN_RECORD = np.dtype([("row", "<u2"), ("col", "<u2"), ("length", "<u2")])
+
+POI_TYPE_CODES = {POIType.VICTIM: 1, POIType.FALSE: 2}
+PHASE_CODES = {"AGENT": 0, "FIRE": 1}
+POI_TYPE_VALUES = {code: poi_type.value for poi_type, code in POI_TYPE_CODES.items()}
+PHASE_VALUES = {code: phase for phase, code in PHASE_CODES.items()}
+
+
+def _header(kind, encoding, model, count):
+  return HEADER.pack(MAGIC, kind, encoding, model.width, model.height, count)
+
+
+def pack_cells(model, kind, cells):
+  # Corridas horizontales a partir de las celdas ordenadas por fila; el
+  # bitmask solo se arma cuando resulta más corto
+  runs = []
+  for x, y in model.sorted_cells(cells):
+    if runs and runs[-1][0] == y and runs[-1][1] + runs[-1][2] == x:
+      runs[-1][2] += 1
+    else:
+      runs.append([y, x, 1])
+
+  row_bytes = (model.width + 7) // 8
+  if len(runs) * RUN_RECORD.itemsize <= model.height * row_bytes:
+    records = np.array([tuple(run) for run in runs], dtype=RUN_RECORD)
+    return _header(kind, ENCODING_RUNS, model, len(records)) + records.tobytes()
+
+  mask = np.zeros((model.height, model.width), dtype=bool)
+  xs, ys = zip(*cells)
+  mask[list(ys), list(xs)] = True
+  bits = np.packbits(mask, axis=1, bitorder="little")
+  return _header(kind, ENCODING_BITMASK, model, len(cells)) + bits.tobytes()
+
+
+def pack_fires(model):
+  return pack_cells(model, KIND_FIRES, model.fire_cells)
+
+
+def pack_smoke(model):
+  return pack_cells(model, KIND_SMOKE, model.smoke_cells)
+
+
+def pack_agents(model):
+  columns = model.agent_columns()
+  records = np.empty(len(columns["id"]), dtype=AGENT_RECORD)
+  records["id"] = columns["id"]
+  records["x"] = columns["x"]
+  records["y"] = columns["y"]
+  records["role"] = columns["role"]
+  records["flags"] = columns["knocked_out"] | (columns["carrying"].astype(np.uint8) << 1)
+  return _header(KIND_AGENTS, ENCODING_RECORDS, model, len(records)) + records.tobytes()
+
+
+def pack_pois(model):
+  pois = model.active_pois
+  records = np.empty(len(pois), dtype=POI_RECORD)
+  records["id"] = [poi.id for poi in pois]
+  records["x"] = [poi.x for poi in pois]
+  records["y"] = [poi.y for poi in pois]
+  records["type"] = [POI_TYPE_CODES[poi.type] for poi in pois]
+  records["flags"] = [1 if poi.revealed else 0 for poi in pois]
+  return _header(KIND_POIS, ENCODING_RECORDS, model, len(records)) + records.tobytes()
+
+
+def pack_gamestate(model):
+  flags = (1 if model.game_over else 0) | (2 if model.game_won else 0)
+  reason = (model.end_reason or "").encode("utf-8")
+  body = GAMESTATE.pack(PHASE_CODES.get(model.phase, 0), flags, model.current_agent_index,
+                        model.damage_count, 0, model.round_count, model.step_count)
+  return (_header(KIND_GAMESTATE, ENCODING_RECORDS, model, 1) + body
+          + struct.pack("<H", len(reason)) + reason)
+
+
+PACKERS = {
+  "fires": pack_fires,
+  "smoke": pack_smoke,
+  "agents": pack_agents,
+  "pois": pack_pois,
+  "gamestate": pack_gamestate,
+}
+
+
+def read_header(data):
+  magic, kind, encoding, width, height, count = HEADER.unpack_from(data)
+  if magic != MAGIC:
+    raise ValueError("No es un mensaje FRS1")
+  return kind, encoding, width, height, count
+
+
+def unpack_cells(data):
+  # Decodificador de referencia para clientes en Python
+  kind, encoding, width, height, count = read_header(data)
+  if encoding == ENCODING_BITMASK:
+    row_bytes = (width + 7) // 8
+    bits = np.frombuffer(data, dtype=np.uint8, count=height * row_bytes, offset=HEADER.size)
+    mask = np.unpackbits(bits.reshape(height, row_bytes), axis=1, bitorder="little")[:, :width]
+    ys, xs = np.nonzero(mask)
+    return list(zip(xs.tolist(), ys.tolist()))
+  runs = np.frombuffer(data, dtype=RUN_RECORD, count=count, offset=HEADER.size)
+  return [(col + i, row) for row, col, length in runs.tolist() for i in range(length)]
+
+
+# Decodificadores de referencia de los registros, con las mismas llaves que el
+# JSON de la API (más los campos que solo viajan en binario: id y carrying)
+def unpack_agents(data):
+  count = read_header(data)[4]
+  records = np.frombuffer(data, dtype=AGENT_RECORD, count=count, offset=HEADER.size)
+  return [
+    {
+      "id": agent_id,
+      "x": x,
+      "y": y,
+      "role": ROLE_VALUES[role],
+      "knocked_out": bool(flags & 1),
+      "carrying": bool(flags & 2),
+    }
+    for agent_id, x, y, role, flags in records.tolist()
+  ]
+
+
+def unpack_pois(data):
+  count = read_header(data)[4]
+  records = np.frombuffer(data, dtype=POI_RECORD, count=count, offset=HEADER.size)
+  return [
+    {"id": poi_id, "x": x, "y": y, "type": POI_TYPE_VALUES[poi_type], "revealed": bool(flags & 1)}
+    for poi_id, x, y, poi_type, flags in records.tolist()
+  ]
+
+
+def unpack_gamestate(data):
+  phase, flags, current_agent, damage, _, rounds, step = GAMESTATE.unpack_from(data, HEADER.size)
+  offset = HEADER.size + GAMESTATE.size
+  (length,) = struct.unpack_from("<H", data, offset)
+  return {
+    "phase": PHASE_VALUES[phase],
+    "currentAgent": current_agent,
+    "damageCount": damage,
+    "roundCount": rounds,
+    "gameOver": bool(flags & 1),
+    "gameWon": bool(flags & 2),
+    "endReason": data[offset + 2:offset + 2 + length].decode("utf-8"),
+    "step": step,
+  }